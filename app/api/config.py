@@ -2,13 +2,14 @@
 
 import os
 import logging
+from datetime import datetime
 from typing import Optional, List
 from fastapi import APIRouter, Depends, HTTPException, Response
 from fastapi.responses import FileResponse, PlainTextResponse
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
-from app.database.database import get_db
+from app.database.database import get_db, get_read_db
 from app.services.config_generator import ConfigurationGenerator
 from app.services.model_service import ModelService
 from app.services.provider_service import ProviderService
@@ -26,6 +27,8 @@ class SyncRequest(BaseModel):
     
     provider_ids: Optional[List[int]] = None
     export_yaml_path: Optional[str] = None
+    # Run an incremental sync even if nothing changed since the last one
+    force: bool = False
 
 
 class SyncResponse(BaseModel):
@@ -37,6 +40,7 @@ class SyncResponse(BaseModel):
     completed_at: Optional[str] = None
     changes_summary: Optional[str] = None
     error_message: Optional[str] = None
+    export_status: Optional[str] = None
 
 
 class SyncStatusResponse(BaseModel):
@@ -59,6 +63,7 @@ class SyncHistoryResponse(BaseModel):
     completed_at: Optional[str] = None
     error_message: Optional[str] = None
     changes_summary: Optional[str] = None
+    export_status: Optional[str] = None
 
 
 def get_config_generator(db: Session = Depends(get_db)) -> ConfigurationGenerator:
@@ -109,7 +114,8 @@ async def sync_configuration(
             sync_record = await sync_service.sync_configuration_incremental(
                 db,
                 provider_ids=request.provider_ids,
-                export_yaml_path=request.export_yaml_path
+                export_yaml_path=request.export_yaml_path,
+                force=request.force
             )
         else:
             # Fall back to full sync if requested
@@ -125,7 +131,8 @@ async def sync_configuration(
             started_at=sync_record.started_at.isoformat(),
             completed_at=sync_record.completed_at.isoformat() if sync_record.completed_at else None,
             changes_summary=sync_record.changes_summary,
-            error_message=sync_record.error_message
+            error_message=sync_record.error_message,
+            export_status=sync_record.export_status
         )
         
     except RuntimeError as e:
@@ -136,8 +143,8 @@ async def sync_configuration(
 
 
 @router.get("/sync/status", response_model=SyncStatusResponse)
-async def get_sync_status(
-    db: Session = Depends(get_db),
+def get_sync_status(
+    db: Session = Depends(get_read_db),
     sync_service: SyncService = Depends(get_sync_service)
 ):
     """Get status of current sync operation and last sync.
@@ -161,7 +168,8 @@ async def get_sync_status(
                 "started_at": last.started_at.isoformat(),
                 "completed_at": last.completed_at.isoformat() if last.completed_at else None,
                 "changes_summary": last.changes_summary,
-                "error_message": last.error_message
+                "error_message": last.error_message,
+                "export_status": last.export_status
             }
         
         if not status:
@@ -182,20 +190,24 @@ async def get_sync_status(
 
 
 @router.get("/sync/history", response_model=List[SyncHistoryResponse])
-async def get_sync_history(
+def get_sync_history(
     limit: int = 10,
     offset: int = 0,
-    db: Session = Depends(get_db),
+    before: Optional[datetime] = None,
+    before_id: Optional[int] = None,
+    db: Session = Depends(get_read_db),
     sync_service: SyncService = Depends(get_sync_service)
 ):
     """Get history of past sync operations.
     
-    Returns a list of sync records ordered by most recent first.
+    Returns a list of sync records ordered by most recent first. Pass the
+    started_at and id of the last record as `before` and `before_id` to
+    fetch the next page.
     
     Requirements: 11.4
     """
     try:
-        history = sync_service.get_sync_history(db, limit, offset)
+        history = sync_service.get_sync_history(db, limit, offset, before, before_id)
         
         return [
             SyncHistoryResponse(
@@ -204,7 +216,8 @@ async def get_sync_history(
                 started_at=record.started_at.isoformat(),
                 completed_at=record.completed_at.isoformat() if record.completed_at else None,
                 error_message=record.error_message,
-                changes_summary=record.changes_summary
+                changes_summary=record.changes_summary,
+                export_status=record.export_status
             )
             for record in history
         ]
@@ -213,7 +226,7 @@ async def get_sync_history(
 
 
 @router.get("/uni-api/yaml", response_class=PlainTextResponse)
-async def get_uniapi_yaml(
+def get_uniapi_yaml(
     db: Session = Depends(get_db),
     config_gen: ConfigurationGenerator = Depends(get_config_generator)
 ):
@@ -245,7 +258,7 @@ async def get_uniapi_yaml(
 
 
 @router.get("/uni-api/download")
-async def download_uniapi_yaml(
+def download_uniapi_yaml(
     db: Session = Depends(get_db),
     config_gen: ConfigurationGenerator = Depends(get_config_generator)
 ):
@@ -275,7 +288,7 @@ async def download_uniapi_yaml(
 
 
 @router.post("/uni-api/export")
-async def export_uniapi_yaml_to_volume(
+def export_uniapi_yaml_to_volume(
     db: Session = Depends(get_db),
     config_gen: ConfigurationGenerator = Depends(get_config_generator)
 ):
@@ -336,7 +349,8 @@ async def sync_gptload_only(
             started_at=sync_record.started_at.isoformat(),
             completed_at=sync_record.completed_at.isoformat() if sync_record.completed_at else None,
             changes_summary=sync_record.changes_summary,
-            error_message=sync_record.error_message
+            error_message=sync_record.error_message,
+            export_status=sync_record.export_status
         )
         
     except RuntimeError as e:
@@ -346,7 +360,7 @@ async def sync_gptload_only(
 
 
 @router.post("/sync-uniapi")
-async def sync_uniapi_only(
+def sync_uniapi_only(
     db: Session = Depends(get_db),
     config_gen: ConfigurationGenerator = Depends(get_config_generator)
 ):
@@ -358,10 +372,7 @@ async def sync_uniapi_only(
     Requirements: 6.1, 21.1, 22.1
     """
     try:
-        # Generate YAML
-        yaml_content = config_gen.generate_uniapi_yaml(db)
-        
-        # Export to default path
+        # Export to default path (generates the YAML, merged with that file)
         export_path = os.getenv("UNIAPI_CONFIG_PATH", "/app/uni-api-config/api.yaml")
         os.makedirs(os.path.dirname(export_path), exist_ok=True)
         
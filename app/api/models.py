@@ -61,7 +61,7 @@ def get_model_service() -> ModelService:
 
 
 @router.get("/providers/{provider_id}/models", response_model=List[ModelResponse])
-async def list_models(
+def list_models(
     provider_id: int,
     include_inactive: bool = False,
     db: Session = Depends(get_db),
@@ -91,7 +91,7 @@ async def list_models(
 
 
 @router.put("/models/{model_id}/normalize", response_model=ModelResponse)
-async def normalize_model(
+def normalize_model(
     model_id: int,
     request: NormalizeModelRequest,
     db: Session = Depends(get_db),
@@ -129,7 +129,7 @@ async def normalize_model(
 
 
 @router.delete("/models/batch-delete", response_model=BulkDeleteResponse)
-async def batch_delete_models(
+def batch_delete_models(
     request: BulkDeleteRequest,
     db: Session = Depends(get_db),
     service: ModelService = Depends(get_model_service)
@@ -159,7 +159,7 @@ async def batch_delete_models(
 
 
 @router.delete("/models/{model_id}", status_code=204)
-async def delete_model(
+def delete_model(
     model_id: int,
     db: Session = Depends(get_db),
     service: ModelService = Depends(get_model_service)
@@ -180,7 +180,7 @@ async def delete_model(
 
 
 @router.post("/models/bulk-delete", response_model=BulkDeleteResponse)
-async def bulk_delete_models(
+def bulk_delete_models(
     request: BulkDeleteRequest,
     db: Session = Depends(get_db),
     service: ModelService = Depends(get_model_service)
@@ -210,7 +210,7 @@ async def bulk_delete_models(
 
 
 @router.post("/models/{model_id}/reset", response_model=ModelResponse)
-async def reset_model_name(
+def reset_model_name(
     model_id: int,
     db: Session = Depends(get_db),
     service: ModelService = Depends(get_model_service)
@@ -238,7 +238,7 @@ async def reset_model_name(
 
 
 @router.put("/models/batch-normalize", response_model=BatchNormalizeResponse)
-async def batch_normalize_models(
+def batch_normalize_models(
     request: BatchNormalizeRequest,
     db: Session = Depends(get_db),
     service: ModelService = Depends(get_model_service)
@@ -271,7 +271,7 @@ class NormalizedNameInfo(BaseModel):
 
 
 @router.get("/models/normalized-names", response_model=List[NormalizedNameInfo])
-async def get_normalized_names(
+def get_normalized_names(
     db: Session = Depends(get_db),
     service: ModelService = Depends(get_model_service)
 ):
@@ -108,15 +108,11 @@ async def create_provider(
             channel_type=provider.channel_type,
         )
         
-        # Get masked key for response
-        providers_list = service.list_providers(db)
-        provider_dict = next((p for p in providers_list if p["id"] == new_provider.id), None)
-        
         return ProviderResponse(
             id=new_provider.id,
             name=new_provider.name,
             base_url=new_provider.base_url,
-            api_key_masked=provider_dict["api_key_masked"] if provider_dict else "***",
+            api_key_masked=service.get_masked_key(new_provider),
             channel_type=new_provider.channel_type,
             created_at=new_provider.created_at.isoformat(),
             updated_at=new_provider.updated_at.isoformat(),
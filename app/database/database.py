@@ -2,8 +2,12 @@
 
 import os
 import logging
-from sqlalchemy import create_engine, inspect
-from sqlalchemy.orm import declarative_base, sessionmaker
+from contextlib import contextmanager
+from typing import Iterator
+from sqlalchemy import DateTime, create_engine, inspect
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
+from sqlalchemy.sql.functions import FunctionElement
 
 from app.config import settings
 
@@ -16,11 +20,19 @@ os.makedirs("data", exist_ok=True)
 engine = create_engine(
     settings.database_url,
     connect_args={"check_same_thread": False} if "sqlite" in settings.database_url else {},
+    # Room for every statement shape the services issue, so compiled SQL
+    # is not evicted from the cache between requests
+    query_cache_size=1200,
 )
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Read-only requests use the same pool with connections in autocommit mode,
+# so their queries run without a BEGIN/COMMIT (or a held snapshot) around them
+read_engine = engine.execution_options(isolation_level="AUTOCOMMIT")
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
 # Create declarative base for models
 Base = declarative_base()
 
@@ -34,6 +46,66 @@ def get_db():
         db.close()
 
 
+def get_read_db():
+    """Get database session dependency for read-only endpoints.
+    
+    Never commit through this session: every statement is committed on its
+    own as it runs.
+    """
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+class utcnow(FunctionElement):
+    """Current UTC time from the database clock, as a naive timestamp.
+    
+    Matches the naive-UTC convention of the DateTime columns regardless of
+    the database server's time zone.
+    """
+    type = DateTime()
+    inherit_cache = True
+
+
+@compiles(utcnow)
+def _compile_utcnow(element, compiler, **kw):
+    return "CURRENT_TIMESTAMP"
+
+
+@compiles(utcnow, "sqlite")
+def _compile_utcnow_sqlite(element, compiler, **kw):
+    # 'now' is already UTC; CURRENT_TIMESTAMP would drop the milliseconds
+    return "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
+
+@compiles(utcnow, "postgresql")
+def _compile_utcnow_postgresql(element, compiler, **kw):
+    return "TIMEZONE('utc', CURRENT_TIMESTAMP)"
+
+
+@contextmanager
+def no_expire_on_commit(session: Session) -> Iterator[Session]:
+    """Keep loaded attributes after commits made inside the block.
+    
+    Objects written and committed within the block stay usable without a
+    reload SELECT on the next attribute access.
+    
+    Args:
+        session: Session to adjust.
+        
+    Yields:
+        The same session.
+    """
+    previous = session.expire_on_commit
+    session.expire_on_commit = False
+    try:
+        yield session
+    finally:
+        session.expire_on_commit = previous
+
+
 def init_db():
     """Initialize database tables.
     
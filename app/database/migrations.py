@@ -50,9 +50,128 @@ def migrate_database(db: Session) -> None:
                 logger.error(f"Failed to add config_hash column: {e}")
                 db.rollback()
     
+    # Migration 2: Add partial index for active models by provider and name
+    if 'models' in inspector.get_table_names():
+        indexes = [index['name'] for index in inspector.get_indexes('models')]
+        
+        if 'ix_models_provider_active_norm' not in indexes:
+            logger.info("Adding ix_models_provider_active_norm index to models table")
+            try:
+                from app.models.model import Model
+                
+                index = next(
+                    index for index in Model.__table__.indexes
+                    if index.name == 'ix_models_provider_active_norm'
+                )
+                index.create(bind=engine, checkfirst=True)
+                # Refresh planner statistics so the new index is used right away
+                with engine.begin() as conn:
+                    conn.execute(text("ANALYZE models"))
+                logger.info("Successfully added ix_models_provider_active_norm index")
+            except Exception as e:
+                logger.error(f"Failed to add ix_models_provider_active_norm index: {e}")
+    
+    # Migration 3: Add api_key_masked to providers and backfill existing rows
+    if 'providers' in inspector.get_table_names():
+        columns = [col['name'] for col in inspector.get_columns('providers')]
+        
+        if 'api_key_masked' not in columns:
+            logger.info("Adding api_key_masked column to providers table")
+            try:
+                db.execute(text(
+                    "ALTER TABLE providers ADD COLUMN api_key_masked VARCHAR"
+                ))
+                db.commit()
+                logger.info("Successfully added api_key_masked column")
+            except Exception as e:
+                logger.error(f"Failed to add api_key_masked column: {e}")
+                db.rollback()
+        
+        _backfill_api_key_masks(db)
+    
+    # Migration 4: Add history index on sync_records
+    # Migration 5: Add config_fingerprint to sync_records
+    if 'sync_records' in inspector.get_table_names():
+        columns = [col['name'] for col in inspector.get_columns('sync_records')]
+        
+        if 'config_fingerprint' not in columns:
+            logger.info("Adding config_fingerprint column to sync_records table")
+            try:
+                db.execute(text(
+                    "ALTER TABLE sync_records ADD COLUMN config_fingerprint VARCHAR"
+                ))
+                db.commit()
+                logger.info("Successfully added config_fingerprint column")
+            except Exception as e:
+                logger.error(f"Failed to add config_fingerprint column: {e}")
+                db.rollback()
+        
+        # Migration 6: Add export_status to sync_records
+        if 'export_status' not in columns:
+            logger.info("Adding export_status column to sync_records table")
+            try:
+                db.execute(text(
+                    "ALTER TABLE sync_records ADD COLUMN export_status VARCHAR"
+                ))
+                db.commit()
+                logger.info("Successfully added export_status column")
+            except Exception as e:
+                logger.error(f"Failed to add export_status column: {e}")
+                db.rollback()
+        
+        indexes = [index['name'] for index in inspector.get_indexes('sync_records')]
+        
+        if 'ix_sync_records_started_at_desc' not in indexes:
+            logger.info("Adding ix_sync_records_started_at_desc index to sync_records table")
+            try:
+                from app.models.sync_record import SyncRecord
+                
+                index = next(
+                    index for index in SyncRecord.__table__.indexes
+                    if index.name == 'ix_sync_records_started_at_desc'
+                )
+                index.create(bind=engine, checkfirst=True)
+                logger.info("Successfully added ix_sync_records_started_at_desc index")
+            except Exception as e:
+                logger.error(f"Failed to add ix_sync_records_started_at_desc index: {e}")
+    
     logger.info("Database migrations complete")
 
 
+def _backfill_api_key_masks(db: Session) -> None:
+    """Store the masked API key for providers created before the column existed.
+    
+    Each key is decrypted once here so that listing providers never has to.
+    
+    Args:
+        db: Database session.
+    """
+    from app.models.provider import Provider
+    from app.services.encryption_service import EncryptionService
+    from app.services.provider_service import mask_api_key
+    
+    try:
+        providers = db.query(Provider).filter(Provider.api_key_masked.is_(None)).all()
+        if not providers:
+            return
+        
+        logger.info(f"Backfilling api_key_masked for {len(providers)} providers")
+        encryption_service = EncryptionService()
+        for provider in providers:
+            try:
+                api_key = encryption_service.decrypt(provider.api_key_encrypted)
+            except Exception as e:
+                logger.error(f"Failed to decrypt API key for provider {provider.id}: {e}")
+                continue
+            provider.api_key_masked = mask_api_key(api_key)
+        
+        db.commit()
+        logger.info("Successfully backfilled api_key_masked")
+    except Exception as e:
+        logger.error(f"Failed to backfill api_key_masked: {e}")
+        db.rollback()
+
+
 def get_migration_status(db: Session) -> dict:
     """Get the status of database migrations.
     
@@ -80,4 +199,33 @@ def get_migration_status(db: Session) -> dict:
         if 'config_hash' in columns:
             status['migrations_applied'].append('gptload_groups.config_hash')
     
+    # Check providers migrations
+    if 'providers' in status['tables']:
+        columns = [col['name'] for col in inspector.get_columns('providers')]
+        
+        if 'api_key_masked' in columns:
+            status['migrations_applied'].append('providers.api_key_masked')
+    
+    # Check models migrations
+    if 'models' in status['tables']:
+        indexes = [index['name'] for index in inspector.get_indexes('models')]
+        
+        if 'ix_models_provider_active_norm' in indexes:
+            status['migrations_applied'].append('models.ix_models_provider_active_norm')
+    
+    # Check sync_records migrations
+    if 'sync_records' in status['tables']:
+        columns = [col['name'] for col in inspector.get_columns('sync_records')]
+        
+        if 'config_fingerprint' in columns:
+            status['migrations_applied'].append('sync_records.config_fingerprint')
+        
+        if 'export_status' in columns:
+            status['migrations_applied'].append('sync_records.export_status')
+        
+        indexes = [index['name'] for index in inspector.get_indexes('sync_records')]
+        
+        if 'ix_sync_records_started_at_desc' in indexes:
+            status['migrations_applied'].append('sync_records.ix_sync_records_started_at_desc')
+    
     return status
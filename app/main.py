@@ -15,6 +15,7 @@ from app.api.config import router as config_router
 from app.api.models import router as models_router
 from app.api.gptload import router as gptload_router
 from app.services.encryption_service import EncryptionService
+from app.services.provider_service import get_http_client, close_http_client
 from app.models.provider import Provider
 from app.models.model import Model
 from app.models.gptload_group import GPTLoadGroup
@@ -74,6 +75,14 @@ async def startup_event():
     EncryptionService()
     # Initialize database
     init_db()
+    # Open the shared HTTP client used for provider requests
+    get_http_client()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release shared resources on shutdown."""
+    await close_http_client()
 
 
 @app.get("/")
@@ -1,9 +1,10 @@
 """Model database model."""
 
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, UniqueConstraint, Index
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, UniqueConstraint, Index, func
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship, backref
-from app.database.database import Base
+from app.database.database import Base, utcnow
 
 
 class Model(Base):
@@ -17,7 +18,7 @@ class Model(Base):
     normalized_name = Column(String, nullable=True)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=utcnow())
 
     # Relationship
     provider = relationship("Provider", backref=backref("models", cascade="all, delete-orphan", passive_deletes=True))
@@ -27,4 +28,22 @@ class Model(Base):
         UniqueConstraint('provider_id', 'original_name', name='uq_provider_original_name'),
         Index('ix_models_provider_id', 'provider_id'),
         Index('ix_models_normalized_name', 'normalized_name'),
+        # Covers duplicate detection / splitting: active models of a provider
+        # grouped by name
+        Index(
+            'ix_models_provider_active_norm',
+            'provider_id', 'normalized_name', 'original_name',
+            sqlite_where=is_active == True,
+            postgresql_where=is_active == True,
+        ),
     )
+
+    @hybrid_property
+    def effective_name(self) -> str:
+        """Name exposed to clients: the normalized name if set, else the original name."""
+        return self.normalized_name or self.original_name
+
+    @effective_name.expression
+    def effective_name(cls):
+        """SQL form of effective_name; empty normalized names fall back like in Python."""
+        return func.coalesce(func.nullif(cls.normalized_name, ''), cls.original_name)
@@ -14,6 +14,8 @@ class Provider(Base):
     name = Column(String, nullable=False, unique=True)
     base_url = Column(String, nullable=False)
     api_key_encrypted = Column(String, nullable=False)
+    # Display-only mask of the API key, stored so listings never need to decrypt
+    api_key_masked = Column(String, nullable=True)
     channel_type = Column(String, nullable=False, default="openai")
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -1,8 +1,7 @@
 """Sync record database model."""
 
-from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Text, CheckConstraint
-from app.database.database import Base
+from sqlalchemy import Column, Integer, String, DateTime, Text, CheckConstraint, Index
+from app.database.database import Base, utcnow
 
 
 class SyncRecord(Base):
@@ -12,12 +11,29 @@ class SyncRecord(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     status = Column(String, nullable=False)  # pending, in_progress, success, failed
-    started_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, server_default=utcnow())
     completed_at = Column(DateTime, nullable=True)
     error_message = Column(Text, nullable=True)
     changes_summary = Column(Text, nullable=True)
+    # Fingerprint of the sync inputs after a clean sync; an incremental sync
+    # with the same fingerprint has nothing to do
+    config_fingerprint = Column(String, nullable=True)
+    # Outcome of the uni-api YAML export, written after the sync itself has
+    # finished: pending, success, failed, superseded (a later sync's export
+    # was written first); NULL if the sync exported nothing
+    export_status = Column(String, nullable=True)
+
+    # Fetch server-generated values (started_at) with the INSERT itself
+    # (RETURNING) instead of a follow-up SELECT
+    __mapper_args__ = {"eager_defaults": True}
 
     # Constraints
     __table_args__ = (
         CheckConstraint("status IN ('pending', 'in_progress', 'success', 'failed')", name='ck_sync_status'),
+        # Serves history listing newest first and its keyset pagination
+        Index(
+            'ix_sync_records_started_at_desc',
+            started_at.desc(), id.desc(),
+            postgresql_include=['status', 'completed_at'],
+        ),
     )
@@ -1,6 +1,7 @@
 """Configuration generator for GPT-Load and uni-api."""
 
 import logging
+from collections import Counter
 from typing import List, Dict, Optional, Any, Tuple
 from sqlalchemy.orm import Session
 import yaml
@@ -10,16 +11,70 @@ from app.models.model import Model
 from app.models.gptload_group import GPTLoadGroup
 from app.services.model_service import ModelService, ProviderSplit
 from app.services.provider_service import ProviderService
-from app.services.gptload_client import GPTLoadClient
+from app.services.gptload_client import DEFAULT_SYNC_CONCURRENCY, GPTLoadClient
 from app.services.provider_splitter import ProviderSplitter, ProviderConfig
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# libyaml-backed loader when PyYAML was built with it, pure Python otherwise
+try:
+    from yaml import CSafeLoader as _YAMLSafeLoader
+except ImportError:
+    from yaml import SafeLoader as _YAMLSafeLoader
+
+# Keys every uni-api provider entry must have
+UNIAPI_PROVIDER_REQUIRED_KEYS = ("provider", "base_url", "api", "model")
+
+# Keys of an incremental sync result that list changed groups
+INCREMENTAL_CHANGE_KEYS = (
+    "standard_groups_created",
+    "standard_groups_updated",
+    "standard_groups_deleted",
+    "aggregate_groups_created",
+    "aggregate_groups_deleted",
+)
+
+
+def summarize_incremental_changes(result: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Pre-aggregate an incremental sync result for change summaries.
+    
+    Only the first three entries of each list are looked at, except for the
+    deleted aggregate groups, whose reasons are counted.
+    
+    Args:
+        result: Result of generate_gptload_configuration_incremental.
+        
+    Returns:
+        Dictionary mapping each change key to {"count", "names"} (the first
+        three group names); aggregate_groups_deleted also has "reasons"
+        ({reason: count}), and "errors" maps to {"count", "first"}.
+    """
+    summary = {}
+    for key in INCREMENTAL_CHANGE_KEYS:
+        groups = result.get(key) or []
+        summary[key] = {
+            "count": len(groups),
+            "names": [g.get('name', 'unknown') for g in groups[:3]]
+        }
+    
+    summary["aggregate_groups_deleted"]["reasons"] = Counter(
+        g.get('reason', 'unknown') for g in result.get("aggregate_groups_deleted") or []
+    )
+    
+    errors = result.get("errors") or []
+    summary["errors"] = {"count": len(errors), "first": errors[0] if errors else None}
+    
+    return summary
+
 
 class ConfigurationGenerator:
     """Service for generating GPT-Load and uni-api configurations."""
 
+    # Last (configuration repr, YAML) pair dumped; shared by every instance
+    # since the API builds a generator per request
+    _last_yaml_dump: Optional[Tuple[str, str]] = None
+
     def __init__(
         self,
         model_service: ModelService,
@@ -37,7 +92,8 @@ class ConfigurationGenerator:
     async def generate_gptload_configuration(
         self,
         db: Session,
-        provider_ids: Optional[List[int]] = None
+        provider_ids: Optional[List[int]] = None,
+        concurrency: int = DEFAULT_SYNC_CONCURRENCY
     ) -> Dict[str, Any]:
         """Generate GPT-Load configuration using improved two-step sync.
         
@@ -52,6 +108,7 @@ class ConfigurationGenerator:
             db: Database session.
             provider_ids: Optional list of provider IDs to configure.
                          If None, configures all providers.
+            concurrency: Maximum number of GPT-Load group creations in flight.
             
         Returns:
             Dictionary with configuration results:
@@ -155,7 +212,7 @@ class ConfigurationGenerator:
         async with GPTLoadClient() as gptload_client:
             # Step 1: Create standard groups
             logger.info("Step 1: Creating standard groups")
-            step1_result = await gptload_client.sync_config_step1(split_groups)
+            step1_result = await gptload_client.sync_config_step1(split_groups, concurrency)
             
             if step1_result["errors"]:
                 all_errors.extend(step1_result["errors"])
@@ -366,6 +423,8 @@ class ConfigurationGenerator:
                 - aggregate_groups_created: List of created aggregate groups
                 - aggregate_groups_deleted: List of deleted aggregate groups
                 - errors: List of any errors encountered
+                - change_summary: Counts and first names per change list
+                  (see summarize_incremental_changes)
                 - summary: Human-readable summary
             
         Raises:
@@ -603,20 +662,18 @@ class ConfigurationGenerator:
                 logger.error(error_msg)
                 raise
         
-        # Build summary
-        summary_parts = []
-        if result['standard_groups_created']:
-            summary_parts.append(f"{len(result['standard_groups_created'])} standard groups created")
-        if result['standard_groups_updated']:
-            summary_parts.append(f"{len(result['standard_groups_updated'])} standard groups updated")
-        if result['standard_groups_deleted']:
-            summary_parts.append(f"{len(result['standard_groups_deleted'])} standard groups deleted")
-        if result['aggregate_groups_created']:
-            summary_parts.append(f"{len(result['aggregate_groups_created'])} aggregate groups created")
-        if result['aggregate_groups_deleted']:
-            summary_parts.append(f"{len(result['aggregate_groups_deleted'])} aggregate groups deleted")
-        if result['errors']:
-            summary_parts.append(f"{len(result['errors'])} errors")
+        # Build summary (counts and names are aggregated once here, so the
+        # sync record summary does not walk the lists again)
+        change_summary = summarize_incremental_changes(result)
+        result['change_summary'] = change_summary
+        
+        summary_parts = [
+            f"{change_summary[key]['count']} {key.replace('_groups_', ' groups ')}"
+            for key in INCREMENTAL_CHANGE_KEYS
+            if change_summary[key]['count']
+        ]
+        if change_summary['errors']['count']:
+            summary_parts.append(f"{change_summary['errors']['count']} errors")
         
         result['summary'] = "; ".join(summary_parts) if summary_parts else "No changes"
         
@@ -902,6 +959,38 @@ class ConfigurationGenerator:
     ) -> str:
         """Generate uni-api configuration YAML with intelligent merging.
         
+        See generate_uniapi_yaml_with_count, which also returns the number of
+        provider entries.
+        
+        Args:
+            db: Database session.
+            gptload_base_url: GPT-Load base URL (defaults to settings.gptload_url).
+            gptload_auth_key: GPT-Load auth key (defaults to settings.gptload_auth_key).
+            existing_yaml_path: Path to existing api.yaml file (defaults to /app/uni-api-config/api.yaml).
+            
+        Returns:
+            YAML configuration string.
+            
+        Raises:
+            ValueError: If configuration is invalid.
+        """
+        yaml_str, _ = self.generate_uniapi_yaml_with_count(
+            db,
+            gptload_base_url,
+            gptload_auth_key,
+            existing_yaml_path
+        )
+        return yaml_str
+
+    def generate_uniapi_yaml_with_count(
+        self,
+        db: Session,
+        gptload_base_url: Optional[str] = None,
+        gptload_auth_key: Optional[str] = None,
+        existing_yaml_path: Optional[str] = None
+    ) -> Tuple[str, int]:
+        """Generate uni-api configuration YAML and count its provider entries.
+        
         Creates a uni-api configuration that points to GPT-Load proxy endpoints.
         If an existing YAML file exists, it will:
         1. Read and parse the existing file
@@ -916,7 +1005,7 @@ class ConfigurationGenerator:
             existing_yaml_path: Path to existing api.yaml file (defaults to /app/uni-api-config/api.yaml).
             
         Returns:
-            YAML configuration string.
+            Tuple of (YAML configuration string, number of provider entries).
             
         Raises:
             ValueError: If configuration is invalid.
@@ -998,12 +1087,22 @@ class ConfigurationGenerator:
         # Validate configuration
         self._validate_uniapi_config(config)
         
-        # Convert to YAML with proper indentation for list items
-        yaml_str = self._dump_yaml_with_indent(config)
+        # Convert to YAML with proper indentation for list items, reusing the
+        # last document if the configuration is unchanged. The YAML is a pure
+        # function of config, and repr() is exact for the plain values it
+        # holds (it tells a date from a string that looks like one) and far
+        # cheaper than the pure-Python dump.
+        cache_key = repr(config)
+        cached = ConfigurationGenerator._last_yaml_dump
+        if cached is not None and cached[0] == cache_key:
+            yaml_str = cached[1]
+        else:
+            yaml_str = self._dump_yaml_with_indent(config)
+            ConfigurationGenerator._last_yaml_dump = (cache_key, yaml_str)
         
         logger.info(f"Generated uni-api YAML with {len(providers)} provider entries")
         
-        return yaml_str
+        return yaml_str, len(providers)
 
     def _dump_yaml_with_indent(self, data: Dict[str, Any]) -> str:
         """Dump YAML with proper indentation for list items.
@@ -1061,22 +1160,41 @@ class ConfigurationGenerator:
         
         try:
             with open(yaml_path, 'r', encoding='utf-8') as f:
-                existing_config = yaml.safe_load(f)
-            
-            if existing_config is None:
-                logger.warning(f"Existing YAML file at {yaml_path} is empty")
-                return None
-            
-            logger.info(f"Successfully read existing YAML file from {yaml_path}")
-            return existing_config
+                text = f.read()
+        except Exception as e:
+            logger.error(f"Error reading existing YAML file at {yaml_path}: {e}")
+            return None
+        
+        return self._read_existing_yaml_from_text(text, yaml_path)
+
+    def _read_existing_yaml_from_text(
+        self,
+        text: str,
+        source: str = "<string>"
+    ) -> Optional[Dict[str, Any]]:
+        """Parse the text of an existing api.yaml file.
+        
+        Args:
+            text: YAML document text.
+            source: Where the text came from, for log messages.
             
+        Returns:
+            Parsed YAML configuration as dictionary, or None if the text is
+            empty or not valid YAML.
+        """
+        try:
+            existing_config = yaml.load(text, Loader=_YAMLSafeLoader)
         except yaml.YAMLError as e:
-            logger.error(f"Failed to parse existing YAML file at {yaml_path}: {e}")
+            logger.error(f"Failed to parse existing YAML file at {source}: {e}")
             logger.warning("Will create new configuration file")
             return None
-        except Exception as e:
-            logger.error(f"Error reading existing YAML file at {yaml_path}: {e}")
+        
+        if existing_config is None:
+            logger.warning(f"Existing YAML file at {source} is empty")
             return None
+        
+        logger.info(f"Successfully read existing YAML file from {source}")
+        return existing_config
 
     def _remove_dummy_providers(
         self,
@@ -1317,14 +1435,13 @@ class ConfigurationGenerator:
             if not isinstance(provider, dict):
                 raise ValueError(f"Provider {i} is not a dictionary")
             
-            required_keys = ["provider", "base_url", "api", "model"]
-            for key in required_keys:
+            for key in UNIAPI_PROVIDER_REQUIRED_KEYS:
                 if key not in provider:
                     raise ValueError(f"Provider {i} missing required key '{key}'")
             
             # Validate base_url format
             base_url = provider["base_url"]
-            if not base_url.startswith("http://") and not base_url.startswith("https://"):
+            if not base_url.startswith(("http://", "https://")):
                 raise ValueError(f"Provider {i} has invalid base_url: {base_url}")
             
             # Validate model is a list
@@ -1365,6 +1482,25 @@ class ConfigurationGenerator:
             existing_yaml_path=file_path
         )
         
+        return self.write_uniapi_yaml(file_path, yaml_content)
+
+    def write_uniapi_yaml(self, file_path: str, yaml_content: str) -> str:
+        """Write already generated uni-api YAML to a file.
+        
+        Use this instead of export_uniapi_yaml_to_file when the YAML has
+        just been generated (with existing_yaml_path=file_path), so it is
+        not generated a second time.
+        
+        Args:
+            file_path: Path to write YAML file.
+            yaml_content: YAML configuration string.
+            
+        Returns:
+            Path to the written file.
+            
+        Raises:
+            IOError: If file write fails.
+        """
         # Write to file with proper error handling
         try:
             # Create directory if it doesn't exist
@@ -1374,13 +1510,29 @@ class ConfigurationGenerator:
                 os.makedirs(directory, exist_ok=True)
                 logger.info(f"Ensured directory exists: {directory}")
             
-            # Write the file
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(yaml_content)
-            
-            # Set file permissions (readable by all, writable by owner)
-            # This ensures the uni-api container can read the file
-            os.chmod(file_path, 0o644)
+            # Write the file: encode once and hand the bytes to a binary
+            # writer in a single call (no text-layer encoding/newline pass).
+            # It goes to a temporary file that replaces the target, so a sync
+            # merging with the file never reads a partly written one. The
+            # name (e.g. ".api.yaml.x1y2z3.tmp") makes files left behind by a
+            # crashed process easy to find in the shared volume.
+            import tempfile
+            fd, tmp_path = tempfile.mkstemp(
+                dir=directory or None,
+                prefix=f".{os.path.basename(file_path)}.",
+                suffix='.tmp'
+            )
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(yaml_content.encode('utf-8'))
+                
+                # Set file permissions (readable by all, writable by owner)
+                # This ensures the uni-api container can read the file
+                os.chmod(tmp_path, 0o644)
+                os.replace(tmp_path, file_path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
             logger.info(f"Set file permissions to 0o644 for {file_path}")
             
             logger.info(f"uni-api YAML exported successfully to {file_path}")
@@ -1,6 +1,7 @@
 """Encryption service for securing API keys."""
 
 import sys
+from typing import Optional
 from cryptography.fernet import Fernet, InvalidToken
 from app.config import settings
 
@@ -8,18 +9,28 @@ from app.config import settings
 class EncryptionService:
     """Service for encrypting and decrypting sensitive data."""
 
-    def __init__(self):
-        """Initialize encryption service with key from settings."""
-        self._validate_encryption_key()
-        self._fernet = Fernet(settings.encryption_key.encode())
+    def __init__(self, encryption_key: Optional[str] = None):
+        """Initialize encryption service.
+        
+        Args:
+            encryption_key: Fernet key to use instead of the ENCRYPTION_KEY
+                setting (e.g. in tests).
+        """
+        if encryption_key is None:
+            encryption_key = settings.encryption_key
+        self._validate_encryption_key(encryption_key)
+        self._fernet = Fernet(encryption_key.encode())
 
-    def _validate_encryption_key(self) -> None:
+    def _validate_encryption_key(self, encryption_key: Optional[str]) -> None:
         """Validate that encryption key is properly configured.
         
+        Args:
+            encryption_key: The Fernet key to validate.
+        
         Raises:
             SystemExit: If encryption key is missing or invalid.
         """
-        if not settings.encryption_key:
+        if not encryption_key:
             print("ERROR: ENCRYPTION_KEY environment variable is not set.", file=sys.stderr)
             print("The service cannot start without a valid encryption key.", file=sys.stderr)
             print("Generate a key with: python -c \"from cryptography.fernet import Fernet; print(Fernet.generate_key().decode())\"", file=sys.stderr)
@@ -27,7 +38,7 @@ class EncryptionService:
         
         try:
             # Validate that the key is a valid Fernet key
-            Fernet(settings.encryption_key.encode())
+            Fernet(encryption_key.encode())
         except Exception as e:
             print(f"ERROR: Invalid ENCRYPTION_KEY format: {e}", file=sys.stderr)
             print("Generate a valid key with: python -c \"from cryptography.fernet import Fernet; print(Fernet.generate_key().decode())\"", file=sys.stderr)
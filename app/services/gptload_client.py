@@ -1,7 +1,8 @@
 """GPT-Load API client for managing groups and keys."""
 
+import asyncio
 import logging
-from typing import List, Dict, Optional, Any, Tuple
+from typing import List, Dict, Optional, Any, Set, Tuple
 import httpx
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
@@ -9,6 +10,9 @@ from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Default number of group-creation requests in flight at once during a sync
+DEFAULT_SYNC_CONCURRENCY = 8
+
 
 class GPTLoadClient:
     """Client for interacting with GPT-Load REST API."""
@@ -625,15 +629,19 @@ class GPTLoadClient:
 
     async def sync_config_step1(
         self,
-        split_groups: List[Any]  # List of SplitGroup from provider_splitter
+        split_groups: List[Any],  # List of SplitGroup from provider_splitter
+        concurrency: int = DEFAULT_SYNC_CONCURRENCY
     ) -> Dict[str, Any]:
         """Step 1: Create all standard groups and return ID mappings.
         
         This is the first step of the two-step sync process. It creates all
-        standard groups and returns mappings needed for step 2.
+        standard groups and returns mappings needed for step 2. Groups are
+        independent of each other, so up to ``concurrency`` creation requests
+        run at once over the client's connection pool.
         
         Args:
             split_groups: List of SplitGroup configurations (standard groups only).
+            concurrency: Maximum number of creation requests in flight.
             
         Returns:
             Dictionary with:
@@ -652,13 +660,15 @@ class GPTLoadClient:
         
         logger.info(f"Step 1: Creating {len(standard_groups)} standard groups")
         
-        for split_group in standard_groups:
-            try:
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def create(split_group) -> int:
+            async with semaphore:
                 # Determine test model (use first model from redirect rules)
+                # Use the original model name (value) as test_model
                 test_model = None
                 if split_group.model_redirect_rules:
-                    # Use the original model name (value) as test_model
-                    test_model = list(split_group.model_redirect_rules.values())[0]
+                    test_model = next(iter(split_group.model_redirect_rules.values()))
                 
                 # Create the standard group
                 created_group = await self.create_standard_group(
@@ -670,21 +680,32 @@ class GPTLoadClient:
                     test_model=test_model,
                     description=f"Auto-generated group for {split_group.provider_name}"
                 )
-                
-                group_id = created_group.get("id")
-                if not group_id:
-                    raise ValueError(f"No group ID returned for '{split_group.group_name}'")
-                
-                # Store mappings
-                group_name_to_id[split_group.group_name] = group_id
-                group_name_to_apikey[split_group.group_name] = split_group.api_key
-                
-                logger.info(f"Created standard group: {split_group.group_name} (ID: {group_id})")
-                
-            except Exception as e:
-                error_msg = f"{split_group.group_name}: {str(e)}"
+            
+            group_id = created_group.get("id")
+            if not group_id:
+                raise ValueError(f"No group ID returned for '{split_group.group_name}'")
+            return group_id
+        
+        results = await asyncio.gather(
+            *(create(split_group) for split_group in standard_groups),
+            return_exceptions=True
+        )
+        
+        # Collect in input order so the mappings are deterministic
+        for split_group, result in zip(standard_groups, results):
+            if isinstance(result, Exception):
+                error_msg = f"{split_group.group_name}: {str(result)}"
                 errors.append(error_msg)
                 logger.error(f"Failed to create standard group: {error_msg}")
+                continue
+            if isinstance(result, BaseException):
+                raise result
+            
+            # Store mappings
+            group_name_to_id[split_group.group_name] = result
+            group_name_to_apikey[split_group.group_name] = split_group.api_key
+            
+            logger.info(f"Created standard group: {split_group.group_name} (ID: {result})")
         
         success = len(errors) == 0
         message = f"Created {len(group_name_to_id)}/{len(standard_groups)} standard groups"
@@ -1532,10 +1553,21 @@ class GPTLoadClient:
         logger.info(f"Creating {len(new_standard_groups)} new standard groups (Scenario D)")
         
         created_groups = []
-        updated_aggregates = []
+        updated_aggregates: Set[int] = set()
         errors = []
         
-        # Create standard groups
+        from app.services.provider_splitter import ProviderSplitter
+        
+        # Index aggregates by the sanitized model name they serve
+        aggregate_prefix = "aggregate-"
+        aggregates_by_model = {
+            name[len(aggregate_prefix):]: aggregate_id
+            for name, aggregate_id in existing_aggregates.items()
+            if name.startswith(aggregate_prefix)
+        }
+        
+        # Create standard groups and attach each one to its matching aggregates
+        # as soon as it exists, so no second pass over created_groups is needed
         for group_config in new_standard_groups:
             group_name = group_config.get('name')
             
@@ -1582,51 +1614,39 @@ class GPTLoadClient:
                 error_msg = f"Create standard group {group_name}: {str(e)}"
                 errors.append(error_msg)
                 logger.error(f"Failed to create standard group: {error_msg}")
-        
-        # Build group name to ID mapping for new groups
-        new_group_name_to_id = {g['name']: g['id'] for g in created_groups}
-        
-        # Add new groups to existing aggregates ONLY if their model matches
-        from app.services.provider_splitter import ProviderSplitter
-        
-        for group_info in created_groups:
-            group_name = group_info['name']
-            group_id = group_info['id']
-            
-            # Find the group config to get its model_redirect_rules
-            group_config = next((g for g in new_standard_groups if g.get('name') == group_name), None)
-            if not group_config:
                 continue
             
-            model_redirect_rules = group_config.get('model_redirect_rules', {})
-            
-            # For each normalized model this group serves, find the matching aggregate
+            # Add the new group to existing aggregates ONLY if their model matches.
+            # Several normalized names can sanitize to the same aggregate, so
+            # collect the targets first and attach once per aggregate.
+            matching_aggregates = {}
             for normalized_model in model_redirect_rules.keys():
                 sanitized_model = ProviderSplitter.sanitize_name(normalized_model)
-                expected_aggregate_name = f"aggregate-{sanitized_model}"
-                
-                # Only add to the aggregate if it exists AND matches this model
-                if expected_aggregate_name in existing_aggregates:
-                    aggregate_id = existing_aggregates[expected_aggregate_name]
-                    try:
-                        await self.add_sub_groups_with_equal_weights(
-                            aggregate_id,
-                            [group_id],
-                            weight=10
-                        )
-                        
-                        if aggregate_id not in updated_aggregates:
-                            updated_aggregates.append(aggregate_id)
-                        
-                        logger.info(f"Added {group_name} to matching aggregate {expected_aggregate_name}")
-                        
-                    except Exception as e:
-                        error_msg = f"Add {group_name} to aggregate {expected_aggregate_name}: {str(e)}"
-                        errors.append(error_msg)
-                        logger.error(f"Failed to add to aggregate: {error_msg}")
+                aggregate_id = aggregates_by_model.get(sanitized_model)
+                if aggregate_id is not None:
+                    matching_aggregates.setdefault(
+                        aggregate_id, f"{aggregate_prefix}{sanitized_model}"
+                    )
+            
+            for aggregate_id, aggregate_name in matching_aggregates.items():
+                try:
+                    await self.add_sub_groups_with_equal_weights(
+                        aggregate_id,
+                        [group_id],
+                        weight=10
+                    )
+                    
+                    updated_aggregates.add(aggregate_id)
+                    
+                    logger.info(f"Added {group_name} to matching aggregate {aggregate_name}")
+                    
+                except Exception as e:
+                    error_msg = f"Add {group_name} to aggregate {aggregate_name}: {str(e)}"
+                    errors.append(error_msg)
+                    logger.error(f"Failed to add to aggregate: {error_msg}")
         
         return {
             "created_groups": created_groups,
-            "updated_aggregates": updated_aggregates,
+            "updated_aggregates": list(updated_aggregates),
             "errors": errors
         }
@@ -1,16 +1,83 @@
 """Model service for managing LLM models."""
 
 import logging
-from typing import List, Optional, Dict, Tuple
-from datetime import datetime
-from sqlalchemy.orm import Session
+from collections import defaultdict
+from functools import lru_cache
+from types import MappingProxyType
+from typing import List, Optional, Dict, Mapping, Tuple
+from sqlalchemy import bindparam, event, func, select
+from sqlalchemy.orm import Session, selectinload
 from sqlalchemy.exc import IntegrityError
 
+from app.database.database import utcnow
 from app.models.model import Model
 from app.models.provider import Provider
 
 logger = logging.getLogger(__name__)
 
+# Rows fetched per round trip when streaming large model lists
+STREAM_BATCH_SIZE = 1000
+
+# Statements used on hot paths, built once and reused with bound parameters so
+# SQLAlchemy can serve the compiled SQL straight from its statement cache
+_STMT_MODEL_BY_ID = select(Model).where(Model.id == bindparam('model_id'))
+
+_STMT_MODEL_BY_ID_FOR_UPDATE = _STMT_MODEL_BY_ID.with_for_update()
+
+# Locks the provider row: serializes normalizations within one provider, so two
+# of them cannot both pass the duplicate check for the same new name (FOR UPDATE
+# on the probe alone only locks rows that already exist)
+_STMT_LOCK_PROVIDER = select(Provider.id).where(
+    Provider.id == bindparam('provider_id')
+).with_for_update()
+
+_STMT_DUPLICATE_NAME = select(Model.id).where(
+    Model.provider_id == bindparam('provider_id'),
+    Model.normalized_name == bindparam('normalized_name'),
+    Model.id != bindparam('model_id'),
+    Model.is_active == True
+).limit(1)
+
+_STMT_ACTIVE_NAMES_BY_PROVIDER = select(Model.id, Model.effective_name).where(
+    Model.provider_id == bindparam('provider_id'),
+    Model.is_active == True
+).execution_options(yield_per=STREAM_BATCH_SIZE)
+
+
+@lru_cache(maxsize=1024)
+def _sanitize_group_name(name: str) -> str:
+    """Sanitize a normalized name for use in a group name (dots become dashes)."""
+    return name.replace('.', '-')
+
+
+# Session.info key for the per-session models-by-provider cache. Sessions are
+# request-scoped (see get_db), so the cache lives for one request at most.
+_MODELS_CACHE_KEY = "model_service.models_by_provider"
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _clear_models_cache(session: Session) -> None:
+    """Drop cached model lists whenever the session's transaction ends."""
+    session.info.pop(_MODELS_CACHE_KEY, None)
+
+
+@event.listens_for(Session, "after_flush")
+def _clear_models_cache_after_flush(session: Session, flush_context) -> None:
+    """Drop cached model lists once a flush has written changes."""
+    session.info.pop(_MODELS_CACHE_KEY, None)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _clear_models_cache_on_dml(orm_execute_state) -> None:
+    """Drop cached model lists before an ORM-enabled INSERT/UPDATE/DELETE runs.
+    
+    Covers bulk statements (e.g. Query.update, insert(Model)), which bypass
+    the flush.
+    """
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info.pop(_MODELS_CACHE_KEY, None)
+
 
 class ProviderSplit:
     """Represents a split provider configuration."""
@@ -34,18 +101,21 @@ class ProviderSplit:
         self.models = models
         self.normalized_name = normalized_name
         self.is_duplicate_group = is_duplicate_group
+        
+        # The model list is fixed once the split is built, so compute the
+        # redirect rules once instead of on every lookup
+        self._rules = MappingProxyType({
+            model.effective_name: model.original_name
+            for model in models
+        })
     
-    def get_model_redirect_rules(self) -> Dict[str, str]:
+    def get_model_redirect_rules(self) -> Mapping[str, str]:
         """Get model redirect rules for this split.
         
         Returns:
-            Dictionary mapping normalized names to original names.
+            Read-only mapping of normalized names to original names.
         """
-        rules = {}
-        for model in self.models:
-            normalized = model.normalized_name if model.normalized_name else model.original_name
-            rules[normalized] = model.original_name
-        return rules
+        return self._rules
 
 
 class ModelService:
@@ -82,17 +152,28 @@ class ModelService:
             ValueError: If model not found or (if allow_duplicates=False) duplicate 
                        normalized name within provider.
         """
-        # Get the model
-        model = db.query(Model).filter(Model.id == model_id).first()
+        # Get the model, locking the row so the duplicate check and the update
+        # below run in the same transaction
+        model = db.execute(
+            _STMT_MODEL_BY_ID_FOR_UPDATE, {'model_id': model_id}
+        ).scalar_one_or_none()
         if not model:
             raise ValueError(f"Model {model_id} not found")
         
+        # Serialize with other normalizations of this provider's models until
+        # the commit below (SQLite has no row locks and compiles this without
+        # FOR UPDATE)
+        db.execute(_STMT_LOCK_PROVIDER, {'provider_id': model.provider_id})
+        
         # Check for duplicate normalized name within the same provider
-        duplicate = db.query(Model).filter(
-            Model.provider_id == model.provider_id,
-            Model.normalized_name == normalized_name,
-            Model.id != model_id,
-            Model.is_active == True
+        # (only the ID is needed, so avoid hydrating a full Model)
+        duplicate = db.execute(
+            _STMT_DUPLICATE_NAME,
+            {
+                'provider_id': model.provider_id,
+                'normalized_name': normalized_name,
+                'model_id': model_id,
+            }
         ).first()
         
         if duplicate:
@@ -109,7 +190,6 @@ class ModelService:
         
         # Update the normalized name
         model.normalized_name = normalized_name
-        model.updated_at = datetime.utcnow()
         
         try:
             db.commit()
@@ -136,13 +216,12 @@ class ModelService:
         Raises:
             ValueError: If model not found.
         """
-        model = db.query(Model).filter(Model.id == model_id).first()
+        model = db.execute(_STMT_MODEL_BY_ID, {'model_id': model_id}).scalar_one_or_none()
         if not model:
             raise ValueError(f"Model {model_id} not found")
         
         # Reset normalized name to None (will use original_name)
         model.normalized_name = None
-        model.updated_at = datetime.utcnow()
         
         try:
             db.commit()
@@ -165,26 +244,32 @@ class ModelService:
             Dictionary mapping normalized names to lists of models with that name.
             Only includes names that appear more than once.
         """
-        # Get all active models for the provider
-        models = db.query(Model).filter(
-            Model.provider_id == provider_id,
-            Model.is_active == True
-        ).all()
-        
-        # Group by effective name (normalized_name if set, otherwise original_name)
-        name_groups: Dict[str, List[Model]] = {}
-        for model in models:
-            effective_name = model.normalized_name if model.normalized_name else model.original_name
-            if effective_name not in name_groups:
-                name_groups[effective_name] = []
-            name_groups[effective_name].append(model)
-        
-        # Filter to only duplicates (names with more than one model)
-        duplicates = {
-            name: models_list
-            for name, models_list in name_groups.items()
-            if len(models_list) > 1
+        # Stream only the ID and effective name (computed in SQL)
+        rows = db.execute(_STMT_ACTIVE_NAMES_BY_PROVIDER, {'provider_id': provider_id})
+        
+        # Group IDs by effective name (normalized_name if set, otherwise original_name)
+        name_groups: Dict[str, List[int]] = defaultdict(list)
+        row_count = 0
+        for model_id, effective_name in rows:
+            name_groups[effective_name].append(model_id)
+            row_count += 1
+        
+        # Every name is distinct, so there is nothing to filter
+        if len(name_groups) == row_count:
+            return {}
+        
+        # Load full models only for names that appear more than once
+        duplicate_ids = {
+            model_id: name
+            for name, ids in name_groups.items()
+            if len(ids) > 1
+            for model_id in ids
         }
+        duplicates: Dict[str, List[Model]] = defaultdict(list)
+        if duplicate_ids:
+            for model in db.query(Model).filter(Model.id.in_(duplicate_ids)).order_by(Model.id):
+                duplicates[duplicate_ids[model.id]].append(model)
+        duplicates = dict(duplicates)
         
         if duplicates:
             logger.info(
@@ -201,6 +286,10 @@ class ModelService:
     ) -> List[Model]:
         """Get all models for a provider.
         
+        Results are cached on the session until it writes anything (flush or
+        bulk INSERT/UPDATE/DELETE) or its transaction ends, so repeated lookups
+        within one request hit the DB once.
+        
         Args:
             db: Database session.
             provider_id: Provider ID.
@@ -209,12 +298,18 @@ class ModelService:
         Returns:
             List of Model instances.
         """
-        query = db.query(Model).filter(Model.provider_id == provider_id)
+        cache = db.info.setdefault(_MODELS_CACHE_KEY, {})
+        cache_key = (provider_id, include_inactive)
         
-        if not include_inactive:
-            query = query.filter(Model.is_active == True)
+        if cache_key not in cache:
+            query = db.query(Model).filter(Model.provider_id == provider_id)
+            
+            if not include_inactive:
+                query = query.filter(Model.is_active == True)
+            
+            cache[cache_key] = query.all()
         
-        return query.all()
+        return list(cache[cache_key])
 
     def get_model(self, db: Session, model_id: int) -> Optional[Model]:
         """Get a model by ID.
@@ -226,7 +321,8 @@ class ModelService:
         Returns:
             Model instance or None if not found.
         """
-        return db.query(Model).filter(Model.id == model_id).first()
+        # Session.get() checks the session's identity map before querying
+        return db.get(Model, model_id)
 
     def delete_model(self, db: Session, model_id: int) -> bool:
         """Delete a model by marking it as inactive.
@@ -243,7 +339,6 @@ class ModelService:
             return False
         
         model.is_active = False
-        model.updated_at = datetime.utcnow()
         
         try:
             db.commit()
@@ -282,18 +377,18 @@ class ModelService:
             return {"deleted_count": 0}
         
         try:
-            # Get all models
-            models = db.query(Model).filter(Model.id.in_(model_ids)).all()
+            # Get the provider of each requested model (no need to load full rows)
+            rows = db.query(Model.id, Model.provider_id).filter(Model.id.in_(model_ids)).all()
             
-            if not models:
+            if not rows:
                 return {"deleted_count": 0}
             
             # Verify all models belong to the same provider if specified
             if provider_id:
-                for model in models:
-                    if model.provider_id != provider_id:
+                for model_id, model_provider_id in rows:
+                    if model_provider_id != provider_id:
                         raise ValueError(
-                            f"Model {model.id} does not belong to provider {provider_id}"
+                            f"Model {model_id} does not belong to provider {provider_id}"
                         )
             
             # Check if we're deleting all models from a provider
@@ -304,24 +399,24 @@ class ModelService:
                     Model.is_active == True
                 ).count()
                 
-                if len(models) >= total_active:
+                if len(rows) >= total_active:
                     warning = f"Deleting all {total_active} active models from provider {provider_id}"
                     logger.warning(warning)
             
-            # Mark all models as inactive
-            for model in models:
-                model.is_active = False
-                model.updated_at = datetime.utcnow()
+            # Mark all models as inactive in a single UPDATE stamped by the database
+            db.query(Model).filter(Model.id.in_([row.id for row in rows])).update(
+                {Model.is_active: False, Model.updated_at: utcnow()}
+            )
             
             db.commit()
             
             result = {
-                "deleted_count": len(models)
+                "deleted_count": len(rows)
             }
             if warning:
                 result["warning"] = warning
             
-            logger.info(f"Bulk deleted {len(models)} models")
+            logger.info(f"Bulk deleted {len(rows)} models")
             return result
             
         except Exception as e:
@@ -346,26 +441,75 @@ class ModelService:
             
         Returns:
             List of ProviderSplit objects representing the split configuration.
+            
+        Raises:
+            ValueError: If provider not found.
         """
-        # Get provider
-        provider = db.query(Provider).filter(Provider.id == provider_id).first()
-        if not provider:
+        splits_by_provider = self.split_providers_by_duplicates(db, [provider_id])
+        if provider_id not in splits_by_provider:
             raise ValueError(f"Provider {provider_id} not found")
         
-        # Get all active models for the provider
-        models = self.get_models_by_provider(db, provider_id, include_inactive=False)
+        return splits_by_provider[provider_id]
+
+    def split_providers_by_duplicates(
+        self,
+        db: Session,
+        provider_ids: List[int]
+    ) -> Dict[int, List[ProviderSplit]]:
+        """Split several providers by duplicate normalized names in one pass.
+        
+        Providers and their active models are loaded with two queries in total
+        (one for providers, one ``selectinload`` for models), instead of two
+        queries per provider.
+        
+        Args:
+            db: Database session.
+            provider_ids: Provider IDs to split.
+            
+        Returns:
+            Dictionary mapping provider ID to its list of ProviderSplit objects.
+            Provider IDs that do not exist are omitted.
+        """
+        if not provider_ids:
+            return {}
+        
+        providers = db.query(Provider).options(
+            selectinload(Provider.models.and_(Model.is_active == True))
+        ).filter(Provider.id.in_(provider_ids)).all()
+        
+        # Re-check is_active in case a collection was already loaded unfiltered
+        # earlier in this session
+        return {
+            provider.id: self._build_provider_splits(
+                provider, [m for m in provider.models if m.is_active]
+            )
+            for provider in providers
+        }
+
+    def _build_provider_splits(
+        self,
+        provider: Provider,
+        models: List[Model]
+    ) -> List[ProviderSplit]:
+        """Build the split configuration for one provider's active models.
+        
+        Args:
+            provider: Provider being split.
+            models: Active models belonging to the provider.
+            
+        Returns:
+            List of ProviderSplit objects representing the split configuration.
+        """
+        provider_id = provider.id
         
         if not models:
             logger.info(f"No models found for provider {provider_id}")
             return []
         
         # Step 1: Group models by normalized name
-        normalized_groups: Dict[str, List[Model]] = {}
+        normalized_groups: Dict[str, List[Model]] = defaultdict(list)
         for model in models:
-            effective_name = model.normalized_name if model.normalized_name else model.original_name
-            if effective_name not in normalized_groups:
-                normalized_groups[effective_name] = []
-            normalized_groups[effective_name].append(model)
+            normalized_groups[model.effective_name].append(model)
         
         # Step 2: Identify duplicates and non-duplicates
         duplicates: Dict[str, List[Model]] = {}
@@ -385,7 +529,7 @@ class ModelService:
         for normalized_name, model_list in sorted(duplicates.items()):
             for model in model_list:
                 # Sanitize group name: convert dots to dashes
-                sanitized_name = normalized_name.replace('.', '-')
+                sanitized_name = _sanitize_group_name(normalized_name)
                 group_name = f"{provider.name}-{split_index}-{sanitized_name}"
                 
                 split = ProviderSplit(
@@ -433,7 +577,8 @@ class ModelService:
         """Get all normalized names across providers.
         
         This is useful for identifying which models appear across multiple providers
-        and need aggregate groups.
+        and need aggregate groups. Note that ``get_cross_provider_duplicates`` no
+        longer uses this method; it filters in SQL instead of building the full map.
         
         Args:
             db: Database session.
@@ -447,17 +592,14 @@ class ModelService:
         if provider_ids:
             query = query.filter(Model.provider_id.in_(provider_ids))
         
-        models = query.all()
+        models = query.yield_per(STREAM_BATCH_SIZE)
         
         # Group by effective normalized name
-        name_groups: Dict[str, List[Tuple[int, Model]]] = {}
+        name_groups: Dict[str, List[Tuple[int, Model]]] = defaultdict(list)
         for model in models:
-            effective_name = model.normalized_name if model.normalized_name else model.original_name
-            if effective_name not in name_groups:
-                name_groups[effective_name] = []
-            name_groups[effective_name].append((model.provider_id, model))
+            name_groups[model.effective_name].append((model.provider_id, model))
         
-        return name_groups
+        return dict(name_groups)
 
     def get_cross_provider_duplicates(
         self,
@@ -476,15 +618,32 @@ class ModelService:
             Dictionary mapping normalized names to lists of (provider_id, model) tuples.
             Only includes names that appear in multiple providers.
         """
-        all_names = self.get_all_normalized_names(db, provider_ids)
+        effective_name = Model.effective_name
+        
+        # Let the database find names used by more than one provider
+        names_query = db.query(effective_name).filter(Model.is_active == True)
+        if provider_ids:
+            names_query = names_query.filter(Model.provider_id.in_(provider_ids))
+        names_query = names_query.group_by(effective_name).having(
+            func.count(func.distinct(Model.provider_id)) > 1
+        )
+        names = [row[0] for row in names_query.all()]
         
-        # Filter to only names that appear in multiple providers
-        cross_provider = {}
-        for name, provider_model_list in all_names.items():
-            # Get unique provider IDs
-            unique_providers = set(provider_id for provider_id, _ in provider_model_list)
-            if len(unique_providers) > 1:
-                cross_provider[name] = provider_model_list
+        if not names:
+            return {}
+        
+        # Fetch only the models participating in those names
+        models_query = db.query(Model).filter(
+            Model.is_active == True,
+            effective_name.in_(names)
+        )
+        if provider_ids:
+            models_query = models_query.filter(Model.provider_id.in_(provider_ids))
+        
+        cross_provider: Dict[str, List[Tuple[int, Model]]] = defaultdict(list)
+        for model in models_query.all():
+            cross_provider[model.effective_name].append((model.provider_id, model))
+        cross_provider = dict(cross_provider)
         
         if cross_provider:
             logger.info(
@@ -528,13 +687,14 @@ class ModelService:
                     raise ValueError("Each update must have 'model_id' and 'normalized_name'")
                 
                 # Get the model
-                model = db.query(Model).filter(Model.id == model_id).first()
+                model = db.execute(
+                    _STMT_MODEL_BY_ID, {'model_id': model_id}
+                ).scalar_one_or_none()
                 if not model:
                     raise ValueError(f"Model {model_id} not found")
                 
                 # Update the normalized name (allow duplicates for provider splitting)
                 model.normalized_name = normalized_name
-                model.updated_at = datetime.utcnow()
                 updated_count += 1
                 
                 logger.debug(
@@ -566,14 +726,15 @@ class ModelService:
                 - provider_count: Number of unique providers using this name
                 - model_count: Total number of models with this name
         """
-        # Get all active models
-        models = db.query(Model).filter(Model.is_active == True).all()
+        # Stream only the columns needed for counting
+        rows = db.query(
+            Model.id, Model.provider_id, Model.effective_name
+        ).filter(Model.is_active == True).yield_per(STREAM_BATCH_SIZE)
         
         # Group by effective normalized name
         name_data: Dict[str, Dict[str, set]] = {}
         
-        for model in models:
-            effective_name = model.normalized_name if model.normalized_name else model.original_name
+        for model_id, provider_id, effective_name in rows:
             
             if effective_name not in name_data:
                 name_data[effective_name] = {
@@ -581,8 +742,8 @@ class ModelService:
                     'model_ids': set()
                 }
             
-            name_data[effective_name]['providers'].add(model.provider_id)
-            name_data[effective_name]['model_ids'].add(model.id)
+            name_data[effective_name]['providers'].add(provider_id)
+            name_data[effective_name]['model_ids'].add(model_id)
         
         # Convert to counts and sort
         result = {}
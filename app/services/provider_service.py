@@ -1,18 +1,213 @@
 """Provider service for managing LLM API providers."""
 
+import asyncio
+import hashlib
 import logging
-from typing import List, Optional
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from datetime import datetime
+from sqlalchemy import func, insert, update
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 import httpx
 
+from app.database.database import utcnow
 from app.models.provider import Provider
 from app.models.model import Model
 from app.services.encryption_service import EncryptionService
 
 logger = logging.getLogger(__name__)
 
+# Shared HTTP client for provider requests. Reusing one pooled client keeps
+# connections (and TLS sessions) to provider endpoints alive between calls.
+# Timeouts are set per request by the callers.
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the shared HTTP client, creating it on first use.
+    
+    Returns:
+        The shared httpx.AsyncClient instance.
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        # The transport owns the pool, so the limits are set on it; retries
+        # re-attempt failed connects without surfacing them to callers
+        _http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(30.0, connect=5.0),
+            transport=httpx.AsyncHTTPTransport(
+                retries=3,
+                limits=httpx.Limits(max_keepalive_connections=100, max_connections=1000)
+            )
+        )
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """Close the shared HTTP client if it was created."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+# Status codes worth retrying when fetching models (rate limits, overloaded
+# or briefly unavailable upstreams); anything else is returned to the caller
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504, 529})
+MODELS_FETCH_ATTEMPTS = 3
+MAX_RETRY_DELAY = 30.0
+
+
+def _retry_delay(response: httpx.Response, attempt: int) -> float:
+    """Get how long to wait before retrying a request.
+    
+    Args:
+        response: The retryable response.
+        attempt: Zero-based attempt number that produced the response.
+        
+    Returns:
+        Seconds to wait, from Retry-After when it is given in seconds,
+        otherwise exponential backoff.
+    """
+    try:
+        delay = float(response.headers.get("Retry-After", 2 ** attempt))
+    except (TypeError, ValueError):
+        delay = float(2 ** attempt)
+    return min(max(delay, 0.0), MAX_RETRY_DELAY)
+
+
+# Model lists seen while validating credentials, reused by the fetch-models call
+# that usually follows right after a provider is added. Entries are keyed by a
+# hash of (base_url, api_key) so raw keys are never held as dict keys.
+MODELS_CACHE_TTL = 10.0
+MODELS_CACHE_MAXSIZE = 256
+_models_cache: Dict[str, Tuple[float, List[str]]] = {}
+
+
+# Successful credential validations, so repeated "test credentials" clicks and
+# provider edits within a minute skip the network round-trip. Only positive
+# results are kept; a failure is always re-checked.
+VALIDATION_CACHE_TTL = 60.0
+VALIDATION_CACHE_MAXSIZE = 256
+_validation_cache: Dict[Tuple[str, bytes, str], float] = {}
+
+
+def _validation_cache_key(base_url: str, api_key: str, channel_type: str) -> Tuple[str, bytes, str]:
+    """Build the validation cache key for a set of provider credentials."""
+    key_hash = hashlib.blake2b(api_key.encode(), digest_size=16).digest()
+    return (base_url.rstrip('/'), key_hash, channel_type)
+
+
+def _is_recently_validated(base_url: str, api_key: str, channel_type: str) -> bool:
+    """Check whether these credentials passed validation within the TTL."""
+    key = _validation_cache_key(base_url, api_key, channel_type)
+    expires = _validation_cache.get(key)
+    if expires is None:
+        return False
+    if expires <= time.monotonic():
+        del _validation_cache[key]
+        return False
+    return True
+
+
+def _remember_validation(base_url: str, api_key: str, channel_type: str) -> None:
+    """Record a successful validation."""
+    now = time.monotonic()
+    if len(_validation_cache) >= VALIDATION_CACHE_MAXSIZE:
+        # Drop expired entries first, then the oldest ones if still full
+        for key in [k for k, expires in _validation_cache.items() if expires <= now]:
+            del _validation_cache[key]
+        while len(_validation_cache) >= VALIDATION_CACHE_MAXSIZE:
+            del _validation_cache[next(iter(_validation_cache))]
+    _validation_cache[_validation_cache_key(base_url, api_key, channel_type)] = now + VALIDATION_CACHE_TTL
+
+
+def _models_cache_key(base_url: str, api_key: str) -> str:
+    """Build the models cache key for a set of provider credentials."""
+    raw = f"{base_url.rstrip('/')}|{api_key}".encode()
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+def _store_cached_models(base_url: str, api_key: str, model_names: List[str]) -> None:
+    """Remember a freshly fetched model list for a short time."""
+    now = time.monotonic()
+    if len(_models_cache) >= MODELS_CACHE_MAXSIZE:
+        # Drop expired entries first, then the oldest ones if still full
+        for key in [k for k, (expires, _) in _models_cache.items() if expires <= now]:
+            del _models_cache[key]
+        while len(_models_cache) >= MODELS_CACHE_MAXSIZE:
+            del _models_cache[next(iter(_models_cache))]
+    _models_cache[_models_cache_key(base_url, api_key)] = (now + MODELS_CACHE_TTL, model_names)
+
+
+def _pop_cached_models(base_url: str, api_key: str) -> Optional[List[str]]:
+    """Take a cached model list if one is still fresh."""
+    entry = _models_cache.pop(_models_cache_key(base_url, api_key), None)
+    if entry is None or entry[0] <= time.monotonic():
+        return None
+    return entry[1]
+
+
+def mask_api_key(api_key: str) -> str:
+    """Mask an API key for display, showing only the first 3 and last 4 characters.
+    
+    Args:
+        api_key: Plain-text API key.
+        
+    Returns:
+        Masked key; keys of 10 characters or fewer are fully masked.
+    """
+    if len(api_key) > 10:
+        return f"{api_key[:3]}{'*' * 15}{api_key[-4:]}"
+    return "*" * len(api_key)
+
+
+def _keep_model_list_keys(pairs: List[Tuple[str, Any]]) -> Dict[str, Any]:
+    """JSON object hook that keeps only the keys needed to list model names.
+    
+    Model catalogs can carry a lot of per-model metadata. Dropping it while
+    decoding means only ``{"data": [{"id": ...}, ...]}`` is kept in memory.
+    """
+    return {key: value for key, value in pairs if key in ("data", "id")}
+
+
+def _parse_model_names(data: Any) -> Optional[List[str]]:
+    """Extract model names from an OpenAI-style ``/v1/models`` response body.
+    
+    Args:
+        data: Decoded JSON response.
+        
+    Returns:
+        List of model names, or None if the body is not in the expected format.
+    """
+    if isinstance(data, dict) and isinstance(data.get("data"), list):
+        return [model.get("id") for model in data["data"] if "id" in model]
+    return None
+
+
+@dataclass(frozen=True)
+class ChannelAdapter:
+    """How to list models for a provider channel type."""
+    models_path: str  # Path appended to the provider base URL
+    parser: Callable[[Any], Optional[List[str]]]  # Decoded body -> model names
+    object_pairs_hook: Callable[[List[Tuple[str, Any]]], Dict[str, Any]] = _keep_model_list_keys
+
+
+# Both supported channel types expose the OpenAI-style models endpoint today
+OPENAI_ADAPTER = ChannelAdapter(models_path="/v1/models", parser=_parse_model_names)
+
+CHANNEL_ADAPTERS: Dict[str, ChannelAdapter] = {
+    "openai": OPENAI_ADAPTER,
+    "anthropic": OPENAI_ADAPTER,
+}
+
+
+def get_channel_adapter(channel_type: str) -> ChannelAdapter:
+    """Get the adapter for a channel type, defaulting to the OpenAI-compatible one."""
+    return CHANNEL_ADAPTERS.get(channel_type, OPENAI_ADAPTER)
+
 
 class ProviderService:
     """Service for managing LLM API providers."""
@@ -55,13 +250,14 @@ class ProviderService:
             raise ValueError("Provider credential validation failed")
         
         # Encrypt API key
-        encrypted_key = self.encryption_service.encrypt(api_key)
+        encrypted_key = await asyncio.to_thread(self.encryption_service.encrypt, api_key)
         
         # Create provider
         provider = Provider(
             name=name,
             base_url=base_url,
             api_key_encrypted=encrypted_key,
+            api_key_masked=mask_api_key(api_key),
             channel_type=channel_type
         )
         
@@ -92,36 +288,49 @@ class ProviderService:
         Returns:
             True if validation succeeds, False otherwise.
         """
+        if _is_recently_validated(base_url, api_key, channel_type):
+            logger.info(f"Provider validation for {base_url} served from cache")
+            return True
+        
         try:
             # Normalize base URL - remove trailing slash
             base_url = base_url.rstrip('/')
             
             # Construct test endpoint based on channel type
-            if channel_type == "openai":
-                test_url = f"{base_url}/v1/models"
-            elif channel_type == "anthropic":
-                test_url = f"{base_url}/v1/models"
-            else:
-                # Default to OpenAI-compatible endpoint
-                test_url = f"{base_url}/v1/models"
+            adapter = get_channel_adapter(channel_type)
+            test_url = f"{base_url}{adapter.models_path}"
             
             headers = {
                 "Authorization": f"Bearer {api_key}",
                 "Content-Type": "application/json"
             }
             
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(test_url, headers=headers)
+            client = get_http_client()
+            response = await client.get(test_url, headers=headers, timeout=10.0)
+            
+            # Accept 200 or 401/403 as valid (some providers return auth errors for invalid keys)
+            # We just want to confirm the endpoint is reachable
+            if response.status_code in [200, 401, 403]:
+                logger.info(f"Provider validation successful for {base_url}")
+                
+                # The validation request is the same models call fetch_models makes,
+                # so keep the list for a follow-up fetch
+                if response.status_code == 200:
+                    try:
+                        model_names = adapter.parser(
+                            response.json(object_pairs_hook=adapter.object_pairs_hook)
+                        )
+                    except ValueError:
+                        model_names = None
+                    if model_names is not None:
+                        _store_cached_models(base_url, api_key, model_names)
+                
+                _remember_validation(base_url, api_key, channel_type)
+                return True
+            else:
+                logger.warning(f"Provider validation failed with status {response.status_code}")
+                return False
                 
-                # Accept 200 or 401/403 as valid (some providers return auth errors for invalid keys)
-                # We just want to confirm the endpoint is reachable
-                if response.status_code in [200, 401, 403]:
-                    logger.info(f"Provider validation successful for {base_url}")
-                    return True
-                else:
-                    logger.warning(f"Provider validation failed with status {response.status_code}")
-                    return False
-                    
         except httpx.TimeoutException:
             logger.error(f"Provider validation timeout for {base_url}")
             return False
@@ -144,6 +353,14 @@ class ProviderService:
         """
         providers = db.query(Provider).all()
         
+        # Count models per provider in one grouped query instead of loading
+        # each provider's models collection
+        model_counts = dict(
+            db.query(Model.provider_id, func.count(Model.id))
+            .group_by(Model.provider_id)
+            .all()
+        )
+        
         result = []
         for provider in providers:
             provider_dict = {
@@ -154,26 +371,37 @@ class ProviderService:
                 "created_at": provider.created_at,
                 "updated_at": provider.updated_at,
                 "last_fetched_at": provider.last_fetched_at,
-                "model_count": len(provider.models) if hasattr(provider, 'models') else 0
+                "model_count": model_counts.get(provider.id, 0)
             }
             
             if include_masked_keys:
-                # Mask API key - show only first 3 and last 4 characters
-                try:
-                    decrypted_key = self.encryption_service.decrypt(provider.api_key_encrypted)
-                    if len(decrypted_key) > 10:
-                        masked_key = f"{decrypted_key[:3]}{'*' * 15}{decrypted_key[-4:]}"
-                    else:
-                        masked_key = "*" * len(decrypted_key)
-                    provider_dict["api_key_masked"] = masked_key
-                except Exception as e:
-                    logger.error(f"Failed to decrypt API key for provider {provider.id}: {e}")
-                    provider_dict["api_key_masked"] = "***ERROR***"
+                provider_dict["api_key_masked"] = self.get_masked_key(provider)
             
             result.append(provider_dict)
         
         return result
 
+    def get_masked_key(self, provider: Provider) -> str:
+        """Get the masked API key for a provider.
+        
+        Uses the stored mask; only rows written before the mask column existed
+        fall back to decrypting the key.
+        
+        Args:
+            provider: Provider instance.
+            
+        Returns:
+            Masked API key, or "***ERROR***" if the key cannot be decrypted.
+        """
+        if provider.api_key_masked:
+            return provider.api_key_masked
+        
+        try:
+            return mask_api_key(self.encryption_service.decrypt(provider.api_key_encrypted))
+        except Exception as e:
+            logger.error(f"Failed to decrypt API key for provider {provider.id}: {e}")
+            return "***ERROR***"
+
     def get_provider(self, db: Session, provider_id: int) -> Optional[Provider]:
         """Get a provider by ID.
         
@@ -245,10 +473,25 @@ class ProviderService:
         if not provider:
             return None
         
-        # If credentials are being updated, validate them
-        if base_url or api_key:
+        # Only an endpoint that actually differs from the stored one (base URL,
+        # key or channel type) needs to be validated; the stored key is
+        # decrypted only when a key was submitted or the new endpoint has to be
+        # checked with it
+        base_url_changed = bool(base_url) and base_url != provider.base_url
+        channel_type_changed = bool(channel_type) and channel_type != provider.channel_type
+        api_key_changed = False
+        stored_api_key = None
+        if api_key:
+            stored_api_key = await asyncio.to_thread(
+                self.encryption_service.decrypt, provider.api_key_encrypted
+            )
+            api_key_changed = api_key != stored_api_key
+        
+        if base_url_changed or api_key_changed or channel_type_changed:
             test_base_url = base_url if base_url else provider.base_url
-            test_api_key = api_key if api_key else self.encryption_service.decrypt(provider.api_key_encrypted)
+            test_api_key = api_key or stored_api_key or await asyncio.to_thread(
+                self.encryption_service.decrypt, provider.api_key_encrypted
+            )
             test_channel_type = channel_type if channel_type else provider.channel_type
             
             is_valid = await self.validate_provider(test_base_url, test_api_key, test_channel_type)
@@ -258,11 +501,14 @@ class ProviderService:
         # Update fields
         if name:
             provider.name = name
-        if base_url:
+        if base_url_changed:
             provider.base_url = base_url
-        if api_key:
-            provider.api_key_encrypted = self.encryption_service.encrypt(api_key)
-        if channel_type:
+        if api_key_changed:
+            provider.api_key_encrypted = await asyncio.to_thread(
+                self.encryption_service.encrypt, api_key
+            )
+            provider.api_key_masked = mask_api_key(api_key)
+        if channel_type_changed:
             provider.channel_type = channel_type
         
         provider.updated_at = datetime.utcnow()
@@ -287,15 +533,18 @@ class ProviderService:
         Returns:
             True if deleted, False if provider not found.
         """
-        provider = self.get_provider(db, provider_id)
-        if not provider:
-            return False
-        
-        # Count associated models for logging
-        model_count = db.query(Model).filter(Model.provider_id == provider_id).count()
-        
         try:
-            db.delete(provider)
+            # Bulk DELETEs instead of SELECT + count + ORM delete. Models are
+            # removed explicitly so the cascade does not depend on SQLite's
+            # foreign key enforcement being enabled, and the rowcount replaces
+            # the separate count query.
+            model_count = db.query(Model).filter(Model.provider_id == provider_id).delete()
+            deleted = db.query(Provider).filter(Provider.id == provider_id).delete()
+            
+            if not deleted:
+                db.rollback()
+                return False
+            
             db.commit()
             logger.info(f"Provider {provider_id} deleted successfully (cascade deleted {model_count} models)")
             return True
@@ -324,61 +573,208 @@ class ProviderService:
         
         # Decrypt API key
         try:
-            api_key = self.encryption_service.decrypt(provider.api_key_encrypted)
+            api_key = await asyncio.to_thread(
+                self.encryption_service.decrypt, provider.api_key_encrypted
+            )
         except Exception as e:
             logger.error(f"Failed to decrypt API key for provider {provider_id}: {e}")
             raise ValueError("Failed to decrypt provider API key")
         
-        # Fetch models from provider
-        models_data = await self._fetch_models_from_api(
-            provider.base_url,
-            api_key,
-            provider.channel_type
-        )
+        # Fetch models from provider, unless validation just returned them
+        models_data = _pop_cached_models(provider.base_url, api_key)
+        if models_data is None:
+            models_data = await self._fetch_models_from_api(
+                provider.base_url,
+                api_key,
+                provider.channel_type
+            )
         
-        if not models_data:
-            logger.warning(f"No models returned from provider {provider_id}")
-            # Update last_fetched_at even if no models
-            provider.last_fetched_at = datetime.utcnow()
+        try:
+            stored_models = self._store_models(db, provider, models_data)
             db.commit()
-            return []
+            logger.info(f"Fetched and stored {len(stored_models)} models for provider {provider_id}")
+            return stored_models
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to store models for provider {provider_id}: {e}")
+            raise
+
+    async def validate_providers_bulk(
+        self,
+        credentials: List[Dict[str, str]],
+        concurrency: int = 16
+    ) -> List[bool]:
+        """Validate several sets of provider credentials concurrently.
         
-        # Store models in database
-        stored_models = []
-        for model_name in models_data:
-            # Check if model already exists
-            existing_model = db.query(Model).filter(
-                Model.provider_id == provider_id,
-                Model.original_name == model_name
-            ).first()
-            
-            if existing_model:
-                # Update existing model
-                existing_model.is_active = True
-                existing_model.updated_at = datetime.utcnow()
-                stored_models.append(existing_model)
-            else:
-                # Create new model
-                new_model = Model(
-                    provider_id=provider_id,
-                    original_name=model_name,
-                    normalized_name=None,
-                    is_active=True
+        Args:
+            credentials: List of dictionaries with base_url, api_key and
+                        (optionally) channel_type keys.
+            concurrency: Maximum number of validation requests in flight.
+            
+        Returns:
+            List of validation results, in the same order as ``credentials``.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def _validate_one(creds: Dict[str, str]) -> bool:
+            async with semaphore:
+                return await self.validate_provider(
+                    creds["base_url"],
+                    creds["api_key"],
+                    creds.get("channel_type", "openai")
                 )
-                db.add(new_model)
-                stored_models.append(new_model)
         
-        # Update provider's last_fetched_at
-        provider.last_fetched_at = datetime.utcnow()
+        results = await asyncio.gather(
+            *[_validate_one(creds) for creds in credentials],
+            return_exceptions=True
+        )
+        return [result is True for result in results]
+
+    async def fetch_models_bulk(
+        self,
+        db: Session,
+        provider_ids: List[int],
+        concurrency: int = 16
+    ) -> Dict[str, Any]:
+        """Fetch models for several providers concurrently and store them.
+        
+        API calls run concurrently (bounded by ``concurrency``). All database
+        writes happen afterwards and are committed together.
+        
+        Args:
+            db: Database session.
+            provider_ids: Provider IDs to fetch models for.
+            concurrency: Maximum number of fetch requests in flight.
+            
+        Returns:
+            Dictionary with:
+                - models: Mapping of provider ID to the list of stored Model instances
+                - errors: Mapping of provider ID to an error message
+        """
+        providers = db.query(Provider).filter(Provider.id.in_(provider_ids)).all()
+        errors: Dict[int, str] = {
+            provider_id: f"Provider {provider_id} not found"
+            for provider_id in set(provider_ids) - {p.id for p in providers}
+        }
+        
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def _fetch_one(provider: Provider) -> List[str]:
+            api_key = await asyncio.to_thread(
+                self.encryption_service.decrypt, provider.api_key_encrypted
+            )
+            cached = _pop_cached_models(provider.base_url, api_key)
+            if cached is not None:
+                return cached
+            async with semaphore:
+                return await self._fetch_models_from_api(
+                    provider.base_url,
+                    api_key,
+                    provider.channel_type
+                )
+        
+        results = await asyncio.gather(
+            *[_fetch_one(provider) for provider in providers],
+            return_exceptions=True
+        )
         
+        stored: Dict[int, List[Model]] = {}
         try:
+            for provider, result in zip(providers, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Failed to fetch models for provider {provider.id}: {result}")
+                    errors[provider.id] = str(result)
+                    continue
+                stored[provider.id] = self._store_models(db, provider, result)
+            
             db.commit()
-            logger.info(f"Fetched and stored {len(stored_models)} models for provider {provider_id}")
-            return stored_models
+            logger.info(
+                f"Fetched and stored models for {len(stored)} providers "
+                f"({len(errors)} failed)"
+            )
         except Exception as e:
             db.rollback()
-            logger.error(f"Failed to store models for provider {provider_id}: {e}")
+            logger.error(f"Failed to store models for providers {provider_ids}: {e}")
             raise
+        
+        return {"models": stored, "errors": errors}
+
+    def _store_models(
+        self,
+        db: Session,
+        provider: Provider,
+        models_data: List[str]
+    ) -> List[Model]:
+        """Upsert fetched model names for a provider without committing.
+        
+        Args:
+            db: Database session.
+            provider: Provider the models belong to.
+            models_data: Model names returned by the provider API.
+            
+        Returns:
+            List of Model instances created or reactivated.
+        """
+        provider_id = provider.id
+        
+        # Update last_fetched_at even if no models. Kept naive UTC to match
+        # the other DateTime columns.
+        provider.last_fetched_at = datetime.utcnow()
+        
+        if not models_data:
+            logger.warning(f"No models returned from provider {provider_id}")
+            return []
+        
+        # Skip names the API listed more than once, keeping first-seen order
+        model_names = list(dict.fromkeys(models_data))
+        
+        # Load all existing models for the fetched names in one query
+        existing_models = {
+            model.original_name: model
+            for model in db.query(Model).filter(
+                Model.provider_id == provider_id,
+                Model.original_name.in_(model_names)
+            ).all()
+        }
+        new_names = [name for name in model_names if name not in existing_models]
+        
+        # Reactivate every existing model with a single UPDATE; the loaded
+        # instances are synchronized in memory. Stamped by the database
+        # clock, like the onupdate default of Model.updated_at.
+        if existing_models:
+            db.execute(
+                update(Model)
+                .where(
+                    Model.provider_id == provider_id,
+                    Model.original_name.in_(list(existing_models))
+                )
+                .values(is_active=True, updated_at=utcnow())
+            )
+        
+        # Insert the new models in one executemany, getting the rows back as
+        # ORM instances in parameter order; stamped by the database clock too
+        created_models = {}
+        if new_names:
+            created = db.scalars(
+                insert(Model)
+                .values(created_at=utcnow(), updated_at=utcnow())
+                .returning(Model, sort_by_parameter_order=True),
+                [
+                    {
+                        "provider_id": provider_id,
+                        "original_name": name,
+                        "normalized_name": None,
+                        "is_active": True
+                    }
+                    for name in new_names
+                ]
+            ).all()
+            created_models = dict(zip(new_names, created))
+        
+        return [
+            existing_models.get(name) or created_models[name]
+            for name in model_names
+        ]
 
     async def _fetch_models_from_api(
         self,
@@ -404,44 +800,42 @@ class ProviderService:
             base_url = base_url.rstrip('/')
             
             # Construct models endpoint based on channel type
-            if channel_type == "openai":
-                models_url = f"{base_url}/v1/models"
-            elif channel_type == "anthropic":
-                models_url = f"{base_url}/v1/models"
-            else:
-                # Default to OpenAI-compatible endpoint
-                models_url = f"{base_url}/v1/models"
+            adapter = get_channel_adapter(channel_type)
+            models_url = f"{base_url}{adapter.models_path}"
             
             headers = {
                 "Authorization": f"Bearer {api_key}",
                 "Content-Type": "application/json"
             }
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(models_url, headers=headers)
-                response.raise_for_status()
-                
-                data = response.json()
+            client = get_http_client()
+            for attempt in range(MODELS_FETCH_ATTEMPTS):
+                response = await client.get(models_url, headers=headers, timeout=30.0)
+                if (
+                    response.status_code not in RETRYABLE_STATUS_CODES
+                    or attempt == MODELS_FETCH_ATTEMPTS - 1
+                ):
+                    break
                 
-                # Parse response based on channel type
-                if channel_type == "openai" or channel_type == "anthropic":
-                    # OpenAI format: {"data": [{"id": "model-name"}, ...]}
-                    if "data" in data and isinstance(data["data"], list):
-                        model_names = [model.get("id") for model in data["data"] if "id" in model]
-                        logger.info(f"Fetched {len(model_names)} models from {base_url}")
-                        return model_names
-                    else:
-                        logger.warning(f"Unexpected response format from {base_url}: {data}")
-                        return []
-                else:
-                    # Try to parse as OpenAI format by default
-                    if "data" in data and isinstance(data["data"], list):
-                        model_names = [model.get("id") for model in data["data"] if "id" in model]
-                        return model_names
-                    else:
-                        logger.warning(f"Unexpected response format from {base_url}")
-                        return []
-                        
+                delay = _retry_delay(response, attempt)
+                logger.warning(
+                    f"Got {response.status_code} fetching models from {base_url}, "
+                    f"retrying in {delay:.1f}s (attempt {attempt + 1}/{MODELS_FETCH_ATTEMPTS})"
+                )
+                await asyncio.sleep(delay)
+            
+            response.raise_for_status()
+            
+            data = response.json(object_pairs_hook=adapter.object_pairs_hook)
+            
+            model_names = adapter.parser(data)
+            if model_names is None:
+                logger.warning(f"Unexpected response format from {base_url}: {data}")
+                return []
+            
+            logger.info(f"Fetched {len(model_names)} models from {base_url}")
+            return model_names
+                    
         except httpx.TimeoutException:
             logger.error(f"Timeout fetching models from {base_url}")
             raise
@@ -7,12 +7,17 @@ complete split configurations ready for GPT-Load API calls.
 
 import re
 import logging
+from functools import lru_cache
 from typing import Dict, List, Tuple, Any
 from collections import defaultdict
 from dataclasses import dataclass
 
 logger = logging.getLogger(__name__)
 
+# Characters GPT-Load does not allow in group names, and runs of hyphens
+_DISALLOWED_CHARS = re.compile(r'[^a-z0-9\-_]')
+_MULTI_HYPHEN = re.compile(r'-+')
+
 
 @dataclass
 class ProviderConfig:
@@ -53,6 +58,7 @@ class ProviderSplitter:
     """
     
     @staticmethod
+    @lru_cache(maxsize=4096)
     def sanitize_name(name: str) -> str:
         """Sanitize name to meet GPT-Load requirements.
         
@@ -60,6 +66,9 @@ class ProviderSplitter:
         - Contain only lowercase letters, numbers, hyphens, or underscores
         - Be 1-100 characters long
         
+        Results are cached, since the same provider and model names are
+        sanitized many times while splitting.
+        
         Args:
             name: Original name to sanitize.
             
@@ -70,10 +79,10 @@ class ProviderSplitter:
         name = name.lower()
         
         # Replace disallowed characters with hyphens
-        name = re.sub(r'[^a-z0-9\-_]', '-', name)
+        name = _DISALLOWED_CHARS.sub('-', name)
         
         # Remove consecutive hyphens
-        name = re.sub(r'-+', '-', name)
+        name = _MULTI_HYPHEN.sub('-', name)
         
         # Remove leading/trailing hyphens
         name = name.strip('-')
@@ -109,53 +118,58 @@ class ProviderSplitter:
         """
         split_groups: List[SplitGroup] = []
         model_to_providers = defaultdict(list)  # {normalized_model: [(provider_name, original_name)]}
+        # [(normalized_model, original_name)] per provider, aligned with `providers`,
+        # so step 3 does not resolve renames a second time
+        normalized_by_provider: List[List[Tuple[str, str]]] = []
         
         # Step 1: Collect all models with their normalized names and sources
         for provider in providers:
             provider_name = provider.name
-            models = provider.models
             renames = rename_mapping.get(provider_name, {})
             
-            for original_model in models:
-                # Get normalized name (or use original if not renamed)
-                normalized_model = renames.get(original_model, original_model)
+            # Get normalized name (or use original if not renamed)
+            pairs = [
+                (renames.get(original_model, original_model), original_model)
+                for original_model in provider.models
+            ]
+            normalized_by_provider.append(pairs)
+            
+            for normalized_model, original_model in pairs:
                 model_to_providers[normalized_model].append((provider_name, original_model))
         
-        # Step 2: Identify duplicate models (appear in multiple places)
-        duplicate_models = {
-            model: sources
-            for model, sources in model_to_providers.items()
-            if len(sources) > 1
-        }
+        # Step 2: Duplicate models are those with more than one source; they are
+        # checked in place below instead of being copied into a separate dict
+        duplicate_count = sum(1 for sources in model_to_providers.values() if len(sources) > 1)
         
-        logger.info(f"Found {len(duplicate_models)} duplicate models across all providers")
+        logger.info(f"Found {duplicate_count} duplicate models across all providers")
         
         # Step 3: Split each provider into groups
-        for provider in providers:
+        # Index duplicate groups by (provider_name, normalized_model, original_name)
+        # so step 4 can find them without scanning every split group. Non-duplicate
+        # groups never serve a duplicate model, so they are not indexed.
+        group_index: Dict[Tuple[str, str, str], List[str]] = defaultdict(list)
+        for provider, pairs in zip(providers, normalized_by_provider):
             provider_name = provider.name
             base_url = provider.base_url
             api_key = provider.api_key
             channel_type = provider.channel_type
-            models = provider.models
-            renames = rename_mapping.get(provider_name, {})
             
             # Categorize models: duplicates vs non-duplicates
             duplicate_in_provider = defaultdict(list)  # {normalized_model: [original_names]}
             non_duplicate_models = {}  # {normalized_model: original_model}
             
-            for original_model in models:
-                normalized_model = renames.get(original_model, original_model)
-                
-                if normalized_model in duplicate_models:
+            for normalized_model, original_model in pairs:
+                if len(model_to_providers[normalized_model]) > 1:
                     # This model appears in multiple places (within or across providers)
                     duplicate_in_provider[normalized_model].append(original_model)
                 else:
                     # This model is unique
                     non_duplicate_models[normalized_model] = original_model
             
+            sanitized_provider = ProviderSplitter.sanitize_name(provider_name)
+            
             # Create group for non-duplicate models
             if non_duplicate_models:
-                sanitized_provider = ProviderSplitter.sanitize_name(provider_name)
                 group_name = f"{sanitized_provider}-0-no-aggregate-models"
                 
                 split_group = SplitGroup(
@@ -165,19 +179,17 @@ class ProviderSplitter:
                     base_url=base_url,
                     api_key=api_key,
                     channel_type=channel_type,
-                    model_redirect_rules={
-                        normalized: original
-                        for normalized, original in non_duplicate_models.items()
-                    }
+                    # Built fresh for this provider and never mutated afterwards,
+                    # so the group can take ownership without a copy
+                    model_redirect_rules=non_duplicate_models
                 )
                 split_groups.append(split_group)
                 logger.debug(f"Created non-duplicate group: {group_name} with {len(non_duplicate_models)} models")
             
             # Create separate group for each duplicate model instance
             for normalized_model, original_names in duplicate_in_provider.items():
+                sanitized_model = ProviderSplitter.sanitize_name(normalized_model)
                 for idx, original_name in enumerate(original_names):
-                    sanitized_provider = ProviderSplitter.sanitize_name(provider_name)
-                    sanitized_model = ProviderSplitter.sanitize_name(normalized_model)
                     group_name = f"{sanitized_provider}-{idx + 1}-{sanitized_model}"
                     
                     split_group = SplitGroup(
@@ -192,25 +204,26 @@ class ProviderSplitter:
                         }
                     )
                     split_groups.append(split_group)
+                    group_index[(provider_name, normalized_model, original_name)].append(group_name)
                     logger.debug(f"Created duplicate group: {group_name} for model {normalized_model}")
         
         # Step 4: Generate aggregation mappings
         aggregations = {}
-        for model, sources in duplicate_models.items():
+        for model, sources in model_to_providers.items():
+            if len(sources) <= 1:
+                continue
+            
             provider_groups = []
             seen_groups = set()  # Prevent duplicates
             
             # Find all groups that offer this model
             for provider_name, original_name in sources:
-                # Find the corresponding group name
-                for split_group in split_groups:
-                    if (split_group.provider_name == provider_name and
-                        model in split_group.model_redirect_rules and
-                        split_group.model_redirect_rules[model] == original_name and
-                        split_group.group_name not in seen_groups):
-                        provider_groups.append(split_group.group_name)
-                        seen_groups.add(split_group.group_name)
-                        break  # Found the matching group
+                # Take the first matching group not already used
+                for group_name in group_index.get((provider_name, model, original_name), ()):
+                    if group_name not in seen_groups:
+                        provider_groups.append(group_name)
+                        seen_groups.add(group_name)
+                        break
             
             aggregations[model] = provider_groups
         
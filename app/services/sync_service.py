@@ -1,25 +1,68 @@
 """Sync service for orchestrating configuration synchronization."""
 
+import hashlib
+import itertools
 import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable, Iterator
+from sqlalchemy import and_, func, or_, select, text, update
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 import asyncio
 
+from app.config import settings
+from app.database.database import no_expire_on_commit, utcnow
+from app.models.gptload_group import GPTLoadGroup
+from app.models.model import Model
+from app.models.provider import Provider
 from app.models.sync_record import SyncRecord
-from app.services.config_generator import ConfigurationGenerator
+from app.services.config_generator import ConfigurationGenerator, summarize_incremental_changes
 from app.services.model_service import ModelService
 from app.services.provider_service import ProviderService
 
 logger = logging.getLogger(__name__)
 
+# Advisory lock key identifying "a configuration sync is running" (PostgreSQL)
+SYNC_ADVISORY_LOCK_KEY = 0x554E4C4C
+
+
+def _format_group_change(verb: str, kind: str, change: Dict[str, Any]) -> str:
+    """Describe a group change, naming the first three groups.
+    
+    Args:
+        verb: What happened to the groups ("Created", "Updated", ...).
+        kind: Group kind ("standard" or "aggregate").
+        change: Entry of summarize_incremental_changes ({"count", "names"}).
+        
+    Returns:
+        e.g. "Created 5 standard groups: a, b, c and 2 more".
+    """
+    count = change["count"]
+    tail = f" and {count - 3} more" if count > 3 else ""
+    return f"{verb} {count} {kind} groups: {', '.join(change['names'])}{tail}"
+
 
 class SyncService:
     """Service for orchestrating configuration synchronization to GPT-Load and uni-api."""
 
-    # Class-level lock to prevent concurrent syncs
-    _sync_lock = asyncio.Lock()
-    _current_sync_id: Optional[int] = None
+    # Running syncs keyed by database URL (see _sync_key), shared by every
+    # instance (the API builds a service per request) so status polls are
+    # answered from memory. Each entry holds sync_id, status, started_at and
+    # monotonic_start (time.monotonic() at the same point, for elapsed-time
+    # math); an entry with no sync_id yet is a reservation made by
+    # _acquire_sync_lock.
+    _current_syncs: Dict[str, Dict[str, Any]] = {}
+    # Guards _current_syncs against status reads from the threadpool
+    _current_syncs_lock = threading.Lock()
+    # Exports are numbered when their YAML is generated; the last number
+    # written to each path keeps an older export from overwriting a newer one
+    _export_generations = itertools.count(1)
+    _exported_generations: Dict[str, int] = {}
+    _export_lock = threading.Lock()
 
     def __init__(
         self,
@@ -42,22 +85,33 @@ class SyncService:
         self,
         db: Session,
         provider_ids: Optional[List[int]] = None,
-        export_yaml_path: Optional[str] = None
+        export_yaml_path: Optional[str] = None,
+        do_commit: bool = True,
+        force: bool = False
     ) -> SyncRecord:
         """Coordinate incremental configuration sync to GPT-Load and uni-api.
         
         This method uses smart diff-based updates instead of full recreation:
         1. Create a sync record with 'in_progress' status
-        2. Generate GPT-Load configuration incrementally (only apply changes)
-        3. Generate uni-api YAML configuration
-        4. Optionally export YAML to file
-        5. Update sync record with results
+        2. Skip the remaining steps if nothing changed since the last clean sync
+        3. Generate GPT-Load configuration incrementally (only apply changes)
+        4. Generate uni-api YAML configuration
+        5. Update sync record with results and release the sync lock
+        6. Export YAML to file and record the outcome in export_status
         
         Args:
             db: Database session.
             provider_ids: Optional list of provider IDs to sync.
                          If None, syncs all providers.
             export_yaml_path: Optional path to export uni-api YAML file.
+            do_commit: Whether to commit the final write of the sync record
+                      (its terminal state). This does not make the sync
+                      transactional: the configuration generator commits
+                      its group changes as it goes, which also commits the
+                      in-progress record and anything else pending in db.
+            force: Run every step even if the configuration fingerprint
+                  matches the last clean sync (e.g. after GPT-Load was
+                  changed by hand).
             
         Returns:
             SyncRecord with sync results.
@@ -65,175 +119,516 @@ class SyncService:
         Raises:
             RuntimeError: If another sync is already in progress.
         """
-        # Check if sync is already in progress
-        if self._sync_lock.locked():
-            logger.warning("Sync already in progress")
-            raise RuntimeError("A sync operation is already in progress")
-        
-        async with self._sync_lock:
-            # Create sync record
-            sync_record = SyncRecord(
-                status="in_progress",
-                started_at=datetime.utcnow()
-            )
-            db.add(sync_record)
-            db.commit()
-            db.refresh(sync_record)
-            
-            # Store current sync ID
-            self._current_sync_id = sync_record.id
-            
-            logger.info(f"Starting incremental sync operation {sync_record.id}")
-            
-            try:
-                # Step 1: Generate GPT-Load configuration incrementally
-                logger.info("Step 1: Generating GPT-Load configuration (incremental)")
-                gptload_result = await self.config_generator.generate_gptload_configuration_incremental(
-                    db,
-                    provider_ids
+        # Use default export path if not provided
+        if not export_yaml_path:
+            export_yaml_path = "/app/uni-api-config/api.yaml"
+        
+        with self._acquire_sync_lock(db):
+            with self._database_sync_lock(db), no_expire_on_commit(db):
+                # Create sync record
+                # Timestamps come from the database clock; started_at is read
+                # back with the INSERT
+                sync_record = SyncRecord(
+                    status="in_progress",
+                    started_at=utcnow()
                 )
+                db.add(sync_record)
+                # Flush to get the ID; the record is committed together with the
+                # terminal status instead of in its own transaction
+                db.flush()
+                # Read the ID once for the log lines below
+                sid = sync_record.id
                 
-                # Check for errors in GPT-Load generation
-                if gptload_result.get("errors"):
-                    error_summary = "; ".join(gptload_result["errors"])
-                    logger.error(f"Errors during GPT-Load configuration: {error_summary}")
-                    
-                    # If there are errors but some changes were applied, continue
-                    has_changes = (
-                        gptload_result.get("standard_groups_created") or
-                        gptload_result.get("standard_groups_updated") or
-                        gptload_result.get("aggregate_groups_created")
-                    )
-                    
-                    if not has_changes:
-                        raise Exception(f"GPT-Load configuration failed: {error_summary}")
+                # Publish the running sync for status polls
+                self._set_current_sync(db, sync_record)
                 
-                # Step 2: Generate uni-api YAML
-                logger.info("Step 2: Generating uni-api YAML configuration")
-                yaml_content = self.config_generator.generate_uniapi_yaml(db)
+                logger.info("Starting incremental sync operation %s", sid)
                 
-                # Step 3: Export YAML (use default path if not provided)
-                if not export_yaml_path:
-                    export_yaml_path = "/app/uni-api-config/api.yaml"
-                
-                logger.info(f"Step 3: Exporting uni-api YAML to {export_yaml_path}")
-                yaml_export_error = None
                 try:
-                    self.config_generator.export_uniapi_yaml_to_file(
+                    # Nothing to do if the inputs are the ones the last clean
+                    # sync produced its output from and that output is still there
+                    if not force:
+                        fingerprint = self._compute_config_fingerprint(db, provider_ids, export_yaml_path)
+                        if (
+                            os.path.exists(export_yaml_path)
+                            and fingerprint == self._last_sync_fingerprint(db)
+                        ):
+                            logger.info("Configuration unchanged since last sync, skipping")
+                            await asyncio.to_thread(
+                                self._finish_sync_record, db, sync_record, do_commit,
+                                status="success",
+                                changes_summary="No changes since last sync",
+                                config_fingerprint=fingerprint
+                            )
+                            return sync_record
+                    
+                    # Step 1: Generate GPT-Load configuration incrementally
+                    logger.info("Step 1: Generating GPT-Load configuration (incremental)")
+                    gptload_result = await self.config_generator.generate_gptload_configuration_incremental(
                         db,
-                        export_yaml_path
+                        provider_ids
                     )
-                except (IOError, OSError) as e:
-                    # Log error but don't fail the entire sync
-                    yaml_export_error = str(e)
-                    logger.warning(f"YAML export failed but sync will continue: {yaml_export_error}")
-                
-                # Build changes summary (include YAML export error if present)
-                changes_summary = self._build_incremental_changes_summary(
-                    gptload_result, 
-                    yaml_content,
-                    yaml_export_error
-                )
-                
-                # Update sync record with success
-                sync_record.status = "success"
-                sync_record.completed_at = datetime.utcnow()
-                sync_record.changes_summary = changes_summary
-                db.commit()
-                db.refresh(sync_record)
-                
-                logger.info(f"Incremental sync operation {sync_record.id} completed successfully")
-                
-                return sync_record
-                
-            except Exception as e:
-                # Update sync record with failure
-                error_message = str(e)
-                logger.error(f"Incremental sync operation {sync_record.id} failed: {error_message}")
-                
-                sync_record.status = "failed"
-                sync_record.completed_at = datetime.utcnow()
-                sync_record.error_message = error_message
-                db.commit()
-                db.refresh(sync_record)
-                
-                return sync_record
-                
+                    
+                    # Check for errors in GPT-Load generation
+                    if gptload_result.get("errors"):
+                        error_summary = "; ".join(gptload_result["errors"])
+                        logger.error("Errors during GPT-Load configuration: %s", error_summary)
+                        
+                        # If there are errors but some changes were applied, continue
+                        has_changes = (
+                            gptload_result.get("standard_groups_created") or
+                            gptload_result.get("standard_groups_updated") or
+                            gptload_result.get("aggregate_groups_created")
+                        )
+                        
+                        if not has_changes:
+                            raise Exception(f"GPT-Load configuration failed: {error_summary}")
+                    
+                    # Step 2: Generate uni-api YAML
+                    logger.info("Step 2: Generating uni-api YAML configuration")
+                    # Runs after step 1 because it reads the groups step 1 wrote;
+                    # it is blocking DB/CPU work, so keep it off the event loop.
+                    # The session is handed over, not shared: this coroutine
+                    # does not touch it until the thread returns.
+                    # It merges with the file it is about to be exported to.
+                    yaml_content, yaml_provider_count = await asyncio.to_thread(
+                        self.config_generator.generate_uniapi_yaml_with_count,
+                        db,
+                        existing_yaml_path=export_yaml_path
+                    )
+                    # Numbered under the sync lock, so later syncs' exports are
+                    # known to be newer (see _write_export)
+                    export_generation = next(SyncService._export_generations)
+                    
+                    # Build changes summary
+                    changes_summary = self._build_incremental_changes_summary(
+                        gptload_result, 
+                        yaml_provider_count
+                    )
+                    
+                    # Taken after the sync's own writes, so the next sync sees
+                    # the same value if nothing else changed; stored once the
+                    # export has succeeded
+                    fingerprint = None
+                    if not gptload_result.get("errors"):
+                        fingerprint = self._compute_config_fingerprint(
+                            db, provider_ids, export_yaml_path
+                        )
+                    
+                    # Update sync record with success
+                    await asyncio.to_thread(
+                        self._finish_sync_record, db, sync_record, do_commit,
+                        status="success",
+                        changes_summary=changes_summary,
+                        export_status="pending"
+                    )
+                    
+                    logger.info("Incremental sync operation %s completed successfully", sid)
+                    
+                except Exception as e:
+                    # Update sync record with failure
+                    error_message = str(e)
+                    logger.error("Incremental sync operation %s failed: %s", sid, error_message)
+                    
+                    await asyncio.to_thread(
+                        self._finish_sync_record, db, sync_record, do_commit,
+                        status="failed",
+                        error_message=error_message
+                    )
+                    
+                    return sync_record
+        
+        # Step 3: Export YAML (the content generated above) once the sync
+        # lock is released, so the next sync does not wait for the file write
+        await self._export_synced_yaml(
+            db, sync_record, do_commit, export_yaml_path, yaml_content,
+            export_generation, fingerprint,
+            lambda error: self._build_incremental_changes_summary(
+                gptload_result, yaml_provider_count, error
+            )
+        )
+        
+        return sync_record
+
+    @staticmethod
+    def _sync_key(db: Session) -> str:
+        """Key the sync state of the database behind a session.
+        
+        Args:
+            db: Database session.
+            
+        Returns:
+            The database URL (with any password masked).
+        """
+        return str(db.get_bind().url)
+
+    @contextmanager
+    def _acquire_sync_lock(self, db: Session) -> Iterator[None]:
+        """Reserve the sync slot of db's database, failing instead of waiting if it is taken.
+        
+        Only one sync runs per database; syncs against different databases
+        do not contend. The running sync is forgotten when the block exits.
+        
+        Args:
+            db: Database session the sync will run on.
+            
+        Raises:
+            RuntimeError: If another sync is already in progress on this database.
+        """
+        key = self._sync_key(db)
+        with SyncService._current_syncs_lock:
+            if key in SyncService._current_syncs:
+                logger.warning("Sync already in progress")
+                raise RuntimeError("A sync operation is already in progress")
+            SyncService._current_syncs[key] = {"sync_id": None}
+        
+        try:
+            yield
+        finally:
+            with SyncService._current_syncs_lock:
+                SyncService._current_syncs.pop(key, None)
+
+    @staticmethod
+    @contextmanager
+    def _database_sync_lock(db: Session) -> Iterator[None]:
+        """Hold a database-wide sync lock so syncs exclude each other across workers.
+        
+        On PostgreSQL this takes a session-level advisory lock on a dedicated
+        connection, so commits made by the sync itself do not release it. The
+        connection runs in autocommit mode, so it does not sit idle in a
+        transaction (holding a snapshot and risking
+        idle_in_transaction_session_timeout) for the length of the sync.
+        Other databases (SQLite) are served by a single process, where the
+        per-database _current_syncs registry already excludes concurrent
+        syncs: _acquire_sync_lock claims the database's entry under
+        _current_syncs_lock before a sync starts.
+        
+        Args:
+            db: Database session of the sync.
+            
+        Raises:
+            RuntimeError: If another worker holds the lock.
+        """
+        engine = db.get_bind()
+        if engine.dialect.name != "postgresql":
+            yield
+            return
+        
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            acquired = conn.execute(
+                text("SELECT pg_try_advisory_lock(:key)"),
+                {"key": SYNC_ADVISORY_LOCK_KEY}
+            ).scalar()
+            if not acquired:
+                logger.warning("Sync already in progress in another worker")
+                raise RuntimeError("A sync operation is already in progress")
+            
+            try:
+                yield
             finally:
-                # Clear current sync ID
-                self._current_sync_id = None
+                conn.execute(
+                    text("SELECT pg_advisory_unlock(:key)"),
+                    {"key": SYNC_ADVISORY_LOCK_KEY}
+                )
+
+    @staticmethod
+    def _compute_config_fingerprint(
+        db: Session,
+        provider_ids: Optional[List[int]],
+        export_yaml_path: str
+    ) -> str:
+        """Fingerprint everything a sync reads.
+        
+        Row counts, highest IDs and latest modification times of providers
+        and GPT-Load groups come from one aggregate query. Models are hashed
+        row by row over the columns a sync uses: their updated_at comes from
+        the database clock, which can stamp two quick edits identically
+        (SQLite resolves milliseconds), so its maximum alone can miss an edit.
+        Together with the sync arguments and GPT-Load settings this
+        identifies the sync inputs.
+        
+        Args:
+            db: Database session.
+            provider_ids: Provider IDs the sync is limited to, if any.
+            export_yaml_path: Path the uni-api YAML is exported to.
+            
+        Returns:
+            Hex SHA-256 fingerprint.
+        """
+        aggregates = []
+        for id_column, modified_column in (
+            (Provider.id, Provider.updated_at),
+            (GPTLoadGroup.id, GPTLoadGroup.last_sync_timestamp),
+        ):
+            aggregates.extend([
+                select(func.count(id_column)).scalar_subquery(),
+                select(func.max(id_column)).scalar_subquery(),
+                select(func.max(modified_column)).scalar_subquery(),
+            ])
+        row = db.execute(select(*aggregates)).one()
+        
+        digest = hashlib.sha256()
+        for value in row:
+            digest.update(f"{value}|".encode())
+        # Plain tuples, not ORM instances
+        model_rows = db.execute(
+            select(
+                Model.id, Model.provider_id, Model.normalized_name,
+                Model.is_active, Model.updated_at
+            ).order_by(Model.id)
+        )
+        for model_row in model_rows:
+            digest.update(repr(tuple(model_row)).encode())
+        
+        parts = [
+            ",".join(str(pid) for pid in sorted(provider_ids)) if provider_ids else "*",
+            export_yaml_path,
+            settings.gptload_url,
+            settings.gptload_auth_key or "",
+        ]
+        digest.update("|".join(parts).encode())
+        return digest.hexdigest()
+
+    @staticmethod
+    def _last_sync_fingerprint(db: Session) -> Optional[str]:
+        """Get the configuration fingerprint of the most recent successful sync.
+        
+        Args:
+            db: Database session.
+            
+        Returns:
+            The fingerprint, or None if that sync did not record one.
+        """
+        return db.query(SyncRecord.config_fingerprint).filter(
+            SyncRecord.status == "success"
+        ).order_by(
+            SyncRecord.started_at.desc(),
+            SyncRecord.id.desc()
+        ).limit(1).scalar()
+
+    @classmethod
+    def _set_current_sync(cls, db: Session, sync_record: SyncRecord) -> None:
+        """Remember the running sync so status polls need no database read.
+        
+        Args:
+            db: Database session the sync runs on.
+            sync_record: The in-progress sync record.
+        """
+        entry = {
+            "sync_id": sync_record.id,
+            "status": sync_record.status,
+            "started_at": sync_record.started_at,
+            "monotonic_start": time.monotonic()
+        }
+        with cls._current_syncs_lock:
+            cls._current_syncs[cls._sync_key(db)] = entry
+
+    @classmethod
+    def _get_current_sync(cls, db: Optional[Session] = None) -> Optional[Dict[str, Any]]:
+        """Look up the running sync of db's database.
+        
+        Args:
+            db: Database session; if None, any running sync is returned.
+            
+        Returns:
+            The running sync's entry, or None if no sync has started.
+        """
+        with cls._current_syncs_lock:
+            if db is not None:
+                entry = cls._current_syncs.get(cls._sync_key(db))
+            else:
+                entry = next(
+                    (e for e in cls._current_syncs.values() if e.get("sync_id")),
+                    None
+                )
+        if not entry or not entry.get("sync_id"):
+            return None
+        return entry
+
+    @staticmethod
+    def _finish_sync_record(
+        db: Session,
+        sync_record: SyncRecord,
+        do_commit: bool,
+        **values: Any
+    ) -> None:
+        """Persist the terminal state of a sync record.
+        
+        Writes the state with one UPDATE ... RETURNING rather than through the
+        unit of work, stamping completed_at from the database clock, and mirrors
+        the written values onto sync_record as already persisted.
+        
+        Called through asyncio.to_thread so the commit's disk flush does not
+        block the event loop.
+        
+        Args:
+            db: Database session.
+            sync_record: The sync record to finish.
+            do_commit: Commit the transaction if True, otherwise leave the
+                UPDATE in the caller's transaction.
+            **values: Column values to write (status, changes_summary, ...).
+        """
+        values["completed_at"] = db.execute(
+            update(SyncRecord)
+            .where(SyncRecord.id == sync_record.id)
+            .values(completed_at=utcnow(), **values)
+            .returning(SyncRecord.completed_at)
+            .execution_options(synchronize_session=False)
+        ).scalar_one()
+        
+        for key, value in values.items():
+            set_committed_value(sync_record, key, value)
+        
+        if do_commit:
+            db.commit()
+
+    async def _export_synced_yaml(
+        self,
+        db: Session,
+        sync_record: SyncRecord,
+        do_commit: bool,
+        export_yaml_path: str,
+        yaml_content: str,
+        export_generation: int,
+        fingerprint: Optional[str],
+        failed_summary: Callable[[str], str]
+    ) -> None:
+        """Export the uni-api YAML of a finished sync and record the outcome.
+        
+        Runs after the sync lock is released: the sync record is already
+        final apart from export_status, which is written with a second small
+        UPDATE. A failed export does not fail the sync.
+        
+        Args:
+            db: Database session.
+            sync_record: The finished sync record.
+            do_commit: Commit the export status if True.
+            export_yaml_path: Path to export the uni-api YAML to.
+            yaml_content: The YAML generated by the sync.
+            export_generation: Number taken when the YAML was generated.
+            fingerprint: Configuration fingerprint to store if the export
+                succeeds, or None.
+            failed_summary: Builds the changes summary for an export error.
+        """
+        logger.info("Step 3: Exporting uni-api YAML to %s", export_yaml_path)
+        try:
+            written = await asyncio.to_thread(
+                self._write_export, export_yaml_path, yaml_content, export_generation
+            )
+        except (IOError, OSError) as e:
+            # Log error but don't fail the entire sync
+            yaml_export_error = str(e)
+            logger.warning("YAML export failed but sync will continue: %s", yaml_export_error)
+            values = {
+                "export_status": "failed",
+                "changes_summary": failed_summary(yaml_export_error)
+            }
+        else:
+            if written:
+                values = {"export_status": "success"}
+                if fingerprint:
+                    values["config_fingerprint"] = fingerprint
+            else:
+                logger.info("A later sync already exported %s, skipping", export_yaml_path)
+                values = {"export_status": "superseded"}
+        
+        with no_expire_on_commit(db):
+            await asyncio.to_thread(
+                self._update_sync_record, db, sync_record, do_commit, **values
+            )
+
+    def _write_export(self, export_yaml_path: str, yaml_content: str, export_generation: int) -> bool:
+        """Write exported YAML unless a later sync's YAML is already there.
+        
+        Exports run outside the sync lock, so a slow write can finish after
+        the next sync's; the older content must not overwrite the newer.
+        
+        Args:
+            export_yaml_path: Path to write the YAML to.
+            yaml_content: YAML configuration string.
+            export_generation: Number taken when the YAML was generated.
+            
+        Returns:
+            True if the file was written, False if it was superseded.
+        """
+        with SyncService._export_lock:
+            if SyncService._exported_generations.get(export_yaml_path, 0) > export_generation:
+                return False
+            self.config_generator.write_uniapi_yaml(export_yaml_path, yaml_content)
+            SyncService._exported_generations[export_yaml_path] = export_generation
+            return True
+
+    @staticmethod
+    def _update_sync_record(
+        db: Session,
+        sync_record: SyncRecord,
+        do_commit: bool,
+        **values: Any
+    ) -> None:
+        """Write columns of a sync record after it was finished.
+        
+        Args:
+            db: Database session.
+            sync_record: The sync record to update.
+            do_commit: Commit the transaction if True.
+            **values: Column values to write.
+        """
+        db.execute(
+            update(SyncRecord)
+            .where(SyncRecord.id == sync_record.id)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        
+        for key, value in values.items():
+            set_committed_value(sync_record, key, value)
+        
+        if do_commit:
+            db.commit()
 
     def _build_incremental_changes_summary(
         self,
         gptload_result: Dict[str, Any],
-        yaml_content: str,
+        yaml_provider_count: int,
         yaml_export_error: Optional[str] = None
     ) -> str:
         """Build a human-readable summary of incremental sync changes.
         
         Args:
             gptload_result: Result from incremental GPT-Load configuration.
-            yaml_content: Generated uni-api YAML content.
+            yaml_provider_count: Number of provider entries in the generated
+                uni-api YAML.
             yaml_export_error: Optional error message from YAML export.
             
         Returns:
             Summary string with detailed change information.
         """
+        # Pre-aggregated by the configuration generator; raw results (e.g.
+        # built by hand) are aggregated here
+        changes = gptload_result.get("change_summary") or summarize_incremental_changes(gptload_result)
         summary_parts = []
         
-        # Standard groups
-        created_std = gptload_result.get("standard_groups_created", [])
-        updated_std = gptload_result.get("standard_groups_updated", [])
-        deleted_std = gptload_result.get("standard_groups_deleted", [])
-        
-        if created_std:
-            group_names = [g.get('name', 'unknown') for g in created_std]
-            summary_parts.append(f"Created {len(created_std)} standard groups: {', '.join(group_names[:3])}")
-            if len(group_names) > 3:
-                summary_parts[-1] += f" and {len(group_names) - 3} more"
-        
-        if updated_std:
-            group_names = [g.get('name', 'unknown') for g in updated_std]
-            summary_parts.append(f"Updated {len(updated_std)} standard groups: {', '.join(group_names[:3])}")
-            if len(group_names) > 3:
-                summary_parts[-1] += f" and {len(group_names) - 3} more"
-        
-        if deleted_std:
-            group_names = [g.get('name', 'unknown') for g in deleted_std]
-            summary_parts.append(f"Deleted {len(deleted_std)} standard groups: {', '.join(group_names[:3])}")
-            if len(group_names) > 3:
-                summary_parts[-1] += f" and {len(group_names) - 3} more"
-        
-        # Aggregate groups
-        created_agg = gptload_result.get("aggregate_groups_created", [])
-        deleted_agg = gptload_result.get("aggregate_groups_deleted", [])
-        
-        if created_agg:
-            group_names = [g.get('name', 'unknown') for g in created_agg]
-            summary_parts.append(f"Created {len(created_agg)} aggregate groups: {', '.join(group_names[:3])}")
-            if len(group_names) > 3:
-                summary_parts[-1] += f" and {len(group_names) - 3} more"
-        
-        if deleted_agg:
-            reasons = {}
-            for g in deleted_agg:
-                reason = g.get('reason', 'unknown')
-                reasons[reason] = reasons.get(reason, 0) + 1
-            
-            reason_strs = [f"{count} {reason}" for reason, count in reasons.items()]
-            summary_parts.append(f"Deleted {len(deleted_agg)} aggregate groups ({', '.join(reason_strs)})")
+        # Standard groups, then aggregate groups
+        for verb, key, kind in (
+            ("Created", "standard_groups_created", "standard"),
+            ("Updated", "standard_groups_updated", "standard"),
+            ("Deleted", "standard_groups_deleted", "standard"),
+            ("Created", "aggregate_groups_created", "aggregate"),
+        ):
+            if changes[key]["count"]:
+                summary_parts.append(_format_group_change(verb, kind, changes[key]))
+        
+        # Deleted aggregate groups are summarized by reason
+        deleted_agg = changes["aggregate_groups_deleted"]
+        if deleted_agg["count"]:
+            reason_strs = [f"{count} {reason}" for reason, count in deleted_agg["reasons"].items()]
+            summary_parts.append(f"Deleted {deleted_agg['count']} aggregate groups ({', '.join(reason_strs)})")
         
         # Errors
-        errors = gptload_result.get("errors", [])
-        if errors:
-            summary_parts.append(f"{len(errors)} errors: {errors[0][:50]}")
-            if len(errors) > 1:
-                summary_parts[-1] += f" and {len(errors) - 1} more"
-        
-        # Count providers in YAML
-        yaml_lines = yaml_content.split('\n')
-        provider_lines = [line for line in yaml_lines if line.strip().startswith('- provider:')]
-        yaml_provider_count = len(provider_lines)
+        errors = changes["errors"]
+        if errors["count"]:
+            more_errors = f" and {errors['count'] - 1} more" if errors["count"] > 1 else ""
+            summary_parts.append(f"{errors['count']} errors: {errors['first'][:50]}{more_errors}")
         
         if yaml_export_error:
             summary_parts.append(f"uni-api: {yaml_provider_count} provider entries (export failed: {yaml_export_error[:50]})")
@@ -246,7 +641,8 @@ class SyncService:
         self,
         db: Session,
         provider_ids: Optional[List[int]] = None,
-        export_yaml_path: Optional[str] = None
+        export_yaml_path: Optional[str] = None,
+        do_commit: bool = True
     ) -> SyncRecord:
         """Coordinate full configuration sync to GPT-Load and uni-api.
         
@@ -254,14 +650,19 @@ class SyncService:
         1. Create a sync record with 'in_progress' status
         2. Generate GPT-Load configuration (create groups via API)
         3. Generate uni-api YAML configuration
-        4. Optionally export YAML to file
-        5. Update sync record with results
+        4. Update sync record with results and release the sync lock
+        5. Export YAML to file and record the outcome in export_status
         
         Args:
             db: Database session.
             provider_ids: Optional list of provider IDs to sync.
                          If None, syncs all providers.
             export_yaml_path: Optional path to export uni-api YAML file.
+            do_commit: Whether to commit the final write of the sync record
+                      (its terminal state). This does not make the sync
+                      transactional: the configuration generator commits
+                      its group changes as it goes, which also commits the
+                      in-progress record and anything else pending in db.
             
         Returns:
             SyncRecord with sync results.
@@ -269,109 +670,124 @@ class SyncService:
         Raises:
             RuntimeError: If another sync is already in progress.
         """
-        # Check if sync is already in progress
-        if self._sync_lock.locked():
-            logger.warning("Sync already in progress")
-            raise RuntimeError("A sync operation is already in progress")
-        
-        async with self._sync_lock:
-            # Create sync record
-            sync_record = SyncRecord(
-                status="in_progress",
-                started_at=datetime.utcnow()
-            )
-            db.add(sync_record)
-            db.commit()
-            db.refresh(sync_record)
-            
-            # Store current sync ID
-            self._current_sync_id = sync_record.id
-            
-            logger.info(f"Starting sync operation {sync_record.id}")
-            
-            try:
-                # Step 1: Generate GPT-Load configuration
-                logger.info("Step 1: Generating GPT-Load configuration")
-                gptload_result = await self.config_generator.generate_gptload_configuration(
-                    db,
-                    provider_ids
+        with self._acquire_sync_lock(db):
+            with self._database_sync_lock(db), no_expire_on_commit(db):
+                # Create sync record
+                # Timestamps come from the database clock; started_at is read
+                # back with the INSERT
+                sync_record = SyncRecord(
+                    status="in_progress",
+                    started_at=utcnow()
                 )
+                db.add(sync_record)
+                # Flush to get the ID; the record is committed together with the
+                # terminal status instead of in its own transaction
+                db.flush()
+                # Read the ID once for the log lines below
+                sid = sync_record.id
                 
-                # Check for errors in GPT-Load generation
-                if gptload_result.get("errors"):
-                    error_summary = "; ".join(gptload_result["errors"])
-                    logger.error(f"Errors during GPT-Load configuration: {error_summary}")
-                    
-                    # If there are errors but some groups were created, continue
-                    if not gptload_result.get("standard_groups") and not gptload_result.get("aggregate_groups"):
-                        raise Exception(f"GPT-Load configuration failed: {error_summary}")
-                
-                # Step 2: Generate uni-api YAML
-                logger.info("Step 2: Generating uni-api YAML configuration")
-                yaml_content = self.config_generator.generate_uniapi_yaml(db)
+                # Publish the running sync for status polls
+                self._set_current_sync(db, sync_record)
                 
-                # Step 3: Export YAML (use default path if not provided)
-                if not export_yaml_path:
-                    export_yaml_path = "/app/uni-api-config/api.yaml"
+                logger.info("Starting sync operation %s", sid)
                 
-                logger.info(f"Step 3: Exporting uni-api YAML to {export_yaml_path}")
-                yaml_export_error = None
                 try:
-                    self.config_generator.export_uniapi_yaml_to_file(
+                    # Step 1: Generate GPT-Load configuration
+                    logger.info("Step 1: Generating GPT-Load configuration")
+                    gptload_result = await self.config_generator.generate_gptload_configuration(
                         db,
-                        export_yaml_path
+                        provider_ids
                     )
-                except (IOError, OSError) as e:
-                    # Log error but don't fail the entire sync
-                    yaml_export_error = str(e)
-                    logger.warning(f"YAML export failed but sync will continue: {yaml_export_error}")
-                
-                # Build changes summary (include YAML export error if present)
-                changes_summary = self._build_changes_summary(
-                    gptload_result, 
-                    yaml_content,
-                    yaml_export_error
-                )
-                
-                # Update sync record with success
-                sync_record.status = "success"
-                sync_record.completed_at = datetime.utcnow()
-                sync_record.changes_summary = changes_summary
-                db.commit()
-                db.refresh(sync_record)
-                
-                logger.info(f"Sync operation {sync_record.id} completed successfully")
-                
-                return sync_record
-                
-            except Exception as e:
-                # Update sync record with failure
-                error_message = str(e)
-                logger.error(f"Sync operation {sync_record.id} failed: {error_message}")
-                
-                sync_record.status = "failed"
-                sync_record.completed_at = datetime.utcnow()
-                sync_record.error_message = error_message
-                db.commit()
-                db.refresh(sync_record)
-                
-                return sync_record
-                
-            finally:
-                # Clear current sync ID
-                self._current_sync_id = None
+                    
+                    # Check for errors in GPT-Load generation
+                    if gptload_result.get("errors"):
+                        error_summary = "; ".join(gptload_result["errors"])
+                        logger.error("Errors during GPT-Load configuration: %s", error_summary)
+                        
+                        # If there are errors but some groups were created, continue
+                        if not gptload_result.get("standard_groups") and not gptload_result.get("aggregate_groups"):
+                            raise Exception(f"GPT-Load configuration failed: {error_summary}")
+                    
+                    # Step 2: Generate uni-api YAML
+                    logger.info("Step 2: Generating uni-api YAML configuration")
+                    # Runs after step 1 because it reads the groups step 1 wrote;
+                    # it is blocking DB/CPU work, so keep it off the event loop.
+                    # The session is handed over, not shared: this coroutine
+                    # does not touch it until the thread returns.
+                    # It merges with the file it is about to be exported to.
+                    if not export_yaml_path:
+                        export_yaml_path = "/app/uni-api-config/api.yaml"
+                    yaml_content, yaml_provider_count = await asyncio.to_thread(
+                        self.config_generator.generate_uniapi_yaml_with_count,
+                        db,
+                        existing_yaml_path=export_yaml_path
+                    )
+                    # Numbered under the sync lock, so later syncs' exports are
+                    # known to be newer (see _write_export)
+                    export_generation = next(SyncService._export_generations)
+                    
+                    # Build changes summary
+                    changes_summary = self._build_changes_summary(
+                        gptload_result, 
+                        yaml_provider_count
+                    )
+                    
+                    # Taken after the sync's own writes, so the next sync sees
+                    # the same value if nothing else changed; stored once the
+                    # export has succeeded
+                    fingerprint = None
+                    if not gptload_result.get("errors"):
+                        fingerprint = self._compute_config_fingerprint(
+                            db, provider_ids, export_yaml_path
+                        )
+                    
+                    # Update sync record with success
+                    await asyncio.to_thread(
+                        self._finish_sync_record, db, sync_record, do_commit,
+                        status="success",
+                        changes_summary=changes_summary,
+                        export_status="pending"
+                    )
+                    
+                    logger.info("Sync operation %s completed successfully", sid)
+                    
+                except Exception as e:
+                    # Update sync record with failure
+                    error_message = str(e)
+                    logger.error("Sync operation %s failed: %s", sid, error_message)
+                    
+                    await asyncio.to_thread(
+                        self._finish_sync_record, db, sync_record, do_commit,
+                        status="failed",
+                        error_message=error_message
+                    )
+                    
+                    return sync_record
+        
+        # Step 3: Export YAML (the content generated above) once the sync
+        # lock is released, so the next sync does not wait for the file write
+        await self._export_synced_yaml(
+            db, sync_record, do_commit, export_yaml_path, yaml_content,
+            export_generation, fingerprint,
+            lambda error: self._build_changes_summary(
+                gptload_result, yaml_provider_count, error
+            )
+        )
+        
+        return sync_record
 
     def _build_changes_summary(
         self,
         gptload_result: Dict[str, Any],
-        yaml_content: str,
+        yaml_provider_count: int,
         yaml_export_error: Optional[str] = None
     ) -> str:
         """Build a human-readable summary of sync changes.
         
         Args:
             gptload_result: Result from GPT-Load configuration generation.
-            yaml_content: Generated uni-api YAML content.
+            yaml_provider_count: Number of provider entries in the generated
+                uni-api YAML.
             yaml_export_error: Optional error message from YAML export.
             
         Returns:
@@ -381,30 +797,23 @@ class SyncService:
         aggregate_count = len(gptload_result.get("aggregate_groups", []))
         error_count = len(gptload_result.get("errors", []))
         
-        # Count providers in YAML
-        yaml_lines = yaml_content.split('\n')
-        provider_lines = [line for line in yaml_lines if line.strip().startswith('- provider:')]
-        yaml_provider_count = len(provider_lines)
+        error_suffix = f"; {error_count} errors encountered" if error_count else ""
+        export_suffix = f" (export failed: {yaml_export_error[:50]})" if yaml_export_error else ""
         
-        summary_parts = [
+        return (
             f"GPT-Load: {standard_count} standard groups, {aggregate_count} aggregate groups created"
-        ]
-        
-        if error_count > 0:
-            summary_parts.append(f"{error_count} errors encountered")
-        
-        if yaml_export_error:
-            summary_parts.append(f"uni-api: {yaml_provider_count} provider entries generated (export failed: {yaml_export_error[:50]})")
-        else:
-            summary_parts.append(f"uni-api: {yaml_provider_count} provider entries generated")
-        
-        return "; ".join(summary_parts)
+            f"{error_suffix}; uni-api: {yaml_provider_count} provider entries generated{export_suffix}"
+        )
 
-    def get_sync_status(self, db: Session) -> Optional[Dict[str, Any]]:
+    def get_sync_status(self, db: Optional[Session] = None) -> Optional[Dict[str, Any]]:
         """Get status of current sync operation.
         
+        The running sync is tracked in memory, so this normally makes no
+        database query; the database is only read when the sync ID was set
+        without its state (e.g. by tests).
+        
         Args:
-            db: Database session.
+            db: Database session (optional).
             
         Returns:
             Dictionary with sync status information, or None if no sync in progress.
@@ -414,23 +823,40 @@ class SyncService:
                 - started_at: Start timestamp
                 - duration_seconds: Elapsed time in seconds
         """
-        if not self._current_sync_id:
+        current = self._get_current_sync(db)
+        if current is None:
+            return None
+        
+        if current.get("started_at") is not None:
+            return {
+                "sync_id": current["sync_id"],
+                "status": current["status"],
+                "started_at": current["started_at"].isoformat(),
+                "duration_seconds": time.monotonic() - current["monotonic_start"]
+            }
+        
+        if db is None:
             return None
         
-        sync_record = db.query(SyncRecord).filter(
-            SyncRecord.id == self._current_sync_id
+        # Polled frequently, so only load the columns the status needs
+        row = db.query(
+            SyncRecord.id,
+            SyncRecord.status,
+            SyncRecord.started_at
+        ).filter(
+            SyncRecord.id == current["sync_id"]
         ).first()
         
-        if not sync_record:
+        if not row:
             return None
         
         # Calculate duration
-        duration = (datetime.utcnow() - sync_record.started_at).total_seconds()
+        duration = (datetime.utcnow() - row.started_at).total_seconds()
         
         return {
-            "sync_id": sync_record.id,
-            "status": sync_record.status,
-            "started_at": sync_record.started_at.isoformat(),
+            "sync_id": row.id,
+            "status": row.status,
+            "started_at": row.started_at.isoformat(),
             "duration_seconds": duration
         }
 
@@ -438,21 +864,47 @@ class SyncService:
         self,
         db: Session,
         limit: int = 10,
-        offset: int = 0
+        offset: int = 0,
+        before: Optional[datetime] = None,
+        before_id: Optional[int] = None
     ) -> List[SyncRecord]:
         """Get history of past sync operations.
         
         Args:
             db: Database session.
             limit: Maximum number of records to return.
-            offset: Number of records to skip.
+            offset: Number of records to skip. Ignored when before is given.
+            before: Optional keyset cursor; only records started before this
+                   time are returned. Pass the started_at of the last record
+                   of the previous page instead of a growing offset.
+            before_id: Optional id of the last record of the previous page.
+                      With before, the cursor is the (started_at, id) pair,
+                      so records sharing the cursor's started_at are not
+                      skipped.
             
         Returns:
             List of SyncRecord instances, ordered by most recent first.
         """
-        return db.query(SyncRecord).order_by(
-            SyncRecord.started_at.desc()
-        ).limit(limit).offset(offset).all()
+        query = db.query(SyncRecord)
+        if before is not None:
+            if before_id is not None:
+                query = query.filter(or_(
+                    SyncRecord.started_at < before,
+                    and_(SyncRecord.started_at == before, SyncRecord.id < before_id)
+                ))
+            else:
+                query = query.filter(SyncRecord.started_at < before)
+        
+        query = query.order_by(
+            SyncRecord.started_at.desc(),
+            SyncRecord.id.desc()
+        ).limit(limit)
+        
+        # A cursor replaces the offset; skipped rows would still be scanned
+        if before is None:
+            query = query.offset(offset)
+        
+        return query.all()
 
     def get_sync_record(self, db: Session, sync_id: int) -> Optional[SyncRecord]:
         """Get a specific sync record by ID.
@@ -464,7 +916,8 @@ class SyncService:
         Returns:
             SyncRecord instance or None if not found.
         """
-        return db.query(SyncRecord).filter(SyncRecord.id == sync_id).first()
+        # Answered from the session's identity map when the record is loaded
+        return db.get(SyncRecord, sync_id)
 
     async def retry_failed_sync(
         self,
@@ -497,16 +950,70 @@ class SyncService:
         if failed_sync.status != "failed":
             raise ValueError(f"Sync record {sync_id} is not in failed status (current: {failed_sync.status})")
         
-        logger.info(f"Retrying failed sync {sync_id}")
+        logger.info("Retrying failed sync %s", sync_id)
         
         # Perform a new sync (syncs all providers by default)
         return await self.sync_configuration(db, export_yaml_path=export_yaml_path)
 
-    def is_sync_in_progress(self) -> bool:
+    async def retry_failed_syncs(
+        self,
+        db: Session,
+        sync_ids: List[int],
+        export_yaml_path: Optional[str] = None
+    ) -> SyncRecord:
+        """Retry several failed sync operations at once.
+        
+        A retry always re-syncs every provider, so one new sync covers all of
+        the given records; they are checked with a single query and a single
+        sync is run instead of one per record.
+        
+        Args:
+            db: Database session.
+            sync_ids: IDs of the failed syncs to retry.
+            export_yaml_path: Optional path to export uni-api YAML file.
+            
+        Returns:
+            New SyncRecord with retry results.
+            
+        Raises:
+            ValueError: If no IDs are given, or any sync record is not found
+                       or not in failed status.
+            RuntimeError: If another sync is already in progress.
+        """
+        if not sync_ids:
+            raise ValueError("No sync records to retry")
+        
+        requested_ids = set(sync_ids)
+        statuses = dict(
+            db.query(SyncRecord.id, SyncRecord.status).filter(
+                SyncRecord.id.in_(requested_ids)
+            ).all()
+        )
+        
+        missing = sorted(requested_ids - statuses.keys())
+        if missing:
+            raise ValueError(f"Sync records not found: {missing}")
+        
+        not_failed = sorted(sid for sid, status in statuses.items() if status != "failed")
+        if not_failed:
+            raise ValueError(f"Sync records are not in failed status: {not_failed}")
+        
+        logger.info("Retrying %s failed syncs with one sync: %s", len(requested_ids), sorted(requested_ids))
+        
+        # Perform a new sync (syncs all providers by default)
+        return await self.sync_configuration(db, export_yaml_path=export_yaml_path)
+
+    def is_sync_in_progress(self, db: Optional[Session] = None) -> bool:
         """Check if a sync operation is currently in progress.
         
+        Args:
+            db: Database session; if None, syncs on any database count.
+            
         Returns:
             True if sync is in progress, False otherwise.
         """
-        return self._sync_lock.locked()
+        with self._current_syncs_lock:
+            if db is not None:
+                return self._sync_key(db) in self._current_syncs
+            return bool(self._current_syncs)
 
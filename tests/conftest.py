@@ -0,0 +1,82 @@
+"""Shared test fixtures."""
+
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.database.database import Base
+
+
+@pytest.fixture(scope="session")
+def _engine():
+    """Create the test database schema once for the whole test session."""
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    
+    # pysqlite defers BEGIN and ignores SAVEPOINT semantics unless the
+    # transaction is started explicitly
+    @event.listens_for(engine, "connect")
+    def _disable_pysqlite_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+    
+    # Durability is worthless for a throwaway test database
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=MEMORY")
+        cursor.execute("PRAGMA synchronous=OFF")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+    
+    @event.listens_for(engine, "begin")
+    def _begin(conn):
+        conn.exec_driver_sql("BEGIN")
+    
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db_session(_engine):
+    """Create a test database session whose changes are rolled back afterwards.
+    
+    The session joins an outer transaction; its commits only release
+    SAVEPOINTs, so the shared schema stays empty between tests.
+    """
+    conn = _engine.connect()
+    trans = conn.begin()
+    session = Session(bind=conn, join_transaction_mode="create_savepoint")
+    yield session
+    session.close()
+    trans.rollback()
+    conn.close()
+
+
+@pytest.fixture
+def record_statements():
+    """Provide a context manager collecting the SQL a session executes.
+    
+    Usage: ``with record_statements(session) as statements: ...``
+    """
+    @contextmanager
+    def record(session):
+        statements = []
+        bind = session.get_bind()
+        
+        def append(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        event.listen(bind, "before_cursor_execute", append)
+        try:
+            yield statements
+        finally:
+            event.remove(bind, "before_cursor_execute", append)
+    
+    return record
@@ -1,71 +1,123 @@
 """Tests for configuration generator service."""
 
+import functools
 import pytest
 import os
-import sys
-from unittest.mock import patch
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import re
+import yaml
+from pathlib import Path
+from unittest.mock import MagicMock
+from sqlalchemy import insert
 from cryptography.fernet import Fernet
 
-from app.database.database import Base
 from app.models.provider import Provider
 from app.models.model import Model
 from app.models.gptload_group import GPTLoadGroup
-from app.services.config_generator import ConfigurationGenerator
+from app.services.config_generator import ConfigurationGenerator, _YAMLSafeLoader
 from app.services.model_service import ModelService
 from app.services.provider_service import ProviderService
 from app.services.encryption_service import EncryptionService
 
 
-def get_test_env() -> dict:
-    """Get test environment with all required settings."""
-    test_key = Fernet.generate_key().decode()
-    return {
-        "ENCRYPTION_KEY": test_key,
-        "GPTLOAD_AUTH_KEY": "test-auth-key",
-        "GPTLOAD_URL": "http://localhost:3001",
-        "DATABASE_URL": "sqlite:///./test.db",
+# Expected generator output, compared as whole documents
+GOLDEN_DIR = Path(__file__).parent / "golden"
+
+# Messages of the validation errors raised by validate_uniapi_config
+MISSING_PROVIDERS_RE = re.compile(r"missing 'providers' key")
+MISSING_KEY_RE = re.compile(r"missing required key")
+INVALID_URL_RE = re.compile(r"invalid base_url")
+
+
+def _load_yaml(stream) -> dict:
+    """Parse YAML with the same (libyaml-backed when available) loader as the generator."""
+    return yaml.load(stream, Loader=_YAMLSafeLoader)
+
+
+def _providers_by_name(config: dict) -> dict:
+    """Index the providers of a parsed uni-api config by provider name."""
+    return {provider["provider"]: provider for provider in config["providers"]}
+
+
+def _api_keys_by_key(config: dict) -> dict:
+    """Index the api_keys of a parsed uni-api config by key."""
+    return {api_key["api"]: api_key for api_key in config["api_keys"]}
+
+
+def _group_values(name: str, group_type: str = "standard", **overrides) -> dict:
+    """Column values of a GPT-Load group with the values most tests share.
+    
+    Standard groups default to provider 1 and aggregate groups to no
+    provider; gptload_group_id defaults to 1.
+    """
+    values = {
+        "name": name,
+        "group_type": group_type,
+        "gptload_group_id": 1,
+        "provider_id": 1 if group_type == "standard" else None,
     }
+    values.update(overrides)
+    return values
+
+
+def _make_group(name: str, group_type: str = "standard", **overrides) -> GPTLoadGroup:
+    """Build a GPT-Load group with the values most tests share (see _group_values)."""
+    return GPTLoadGroup(**_group_values(name, group_type, **overrides))
 
 
-@pytest.fixture
-def db_session():
-    """Create a test database session."""
-    engine = create_engine("sqlite:///:memory:")
-    Base.metadata.create_all(engine)
-    SessionLocal = sessionmaker(bind=engine)
-    session = SessionLocal()
-    yield session
-    session.close()
+def _insert_groups(db_session, *groups: dict) -> None:
+    """Insert GPT-Load group rows with one executemany.
+    
+    For tests that only need the rows, not ORM instances.
+    """
+    db_session.execute(insert(GPTLoadGroup), list(groups))
+
+
+def _make_provider(
+    encryption_service,
+    name: str,
+    base_url: str,
+    channel_type: str = "openai",
+    api_key: str = "test-key"
+) -> Provider:
+    """Build a provider with an encrypted API key."""
+    return Provider(
+        name=name,
+        base_url=base_url,
+        api_key_encrypted=_encrypt(encryption_service, api_key),
+        channel_type=channel_type
+    )
 
 
-@pytest.fixture
+@functools.lru_cache(maxsize=None)
+def _encrypt(encryption_service, plaintext: str) -> str:
+    """Encrypt a test API key once per service and plaintext.
+    
+    Providers may share a ciphertext: nothing here relies on each row
+    having its own Fernet token.
+    """
+    return encryption_service.encrypt(plaintext)
+
+
+@pytest.fixture(scope="session")
 def encryption_service():
-    """Create encryption service for tests."""
-    with patch.dict(os.environ, get_test_env(), clear=True):
-        if 'app.config' in sys.modules:
-            del sys.modules['app.config']
-        if 'app.services.encryption_service' in sys.modules:
-            del sys.modules['app.services.encryption_service']
-        
-        from app.services.encryption_service import EncryptionService
-        return EncryptionService()
-
-
-@pytest.fixture
+    """Create encryption service for tests with its own key."""
+    return EncryptionService(encryption_key=Fernet.generate_key().decode())
+
+
+# The services hold no per-test state, so one instance serves every test
+@pytest.fixture(scope="session")
 def model_service():
     """Create model service for tests."""
     return ModelService()
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def provider_service(encryption_service):
     """Create provider service for tests."""
     return ProviderService(encryption_service)
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def config_generator(model_service, provider_service):
     """Create configuration generator for tests."""
     return ConfigurationGenerator(model_service, provider_service)
@@ -74,25 +126,11 @@ def config_generator(model_service, provider_service):
 def test_generate_uniapi_yaml_basic(config_generator, db_session):
     """Test basic uni-api YAML generation."""
     # Create some GPT-Load groups
-    groups = [
-        GPTLoadGroup(
-            gptload_group_id=1,
-            name="test-aggregate",
-            group_type="aggregate",
-            provider_id=None,
-            normalized_model="gpt-4"
-        ),
-        GPTLoadGroup(
-            gptload_group_id=2,
-            name="test-provider-no-aggregate-models",
-            group_type="standard",
-            provider_id=1,
-            normalized_model=None
-        )
-    ]
-    for group in groups:
-        db_session.add(group)
-    db_session.commit()
+    _insert_groups(
+        db_session,
+        _group_values("test-aggregate", group_type="aggregate", normalized_model="gpt-4"),
+        _group_values("test-provider-no-aggregate-models", gptload_group_id=2)
+    )
     
     # Generate YAML
     yaml_content = config_generator.generate_uniapi_yaml(
@@ -101,55 +139,24 @@ def test_generate_uniapi_yaml_basic(config_generator, db_session):
         gptload_auth_key="test-key"
     )
     
-    # Verify YAML contains expected content
-    assert "providers:" in yaml_content
-    assert "test-aggregate" in yaml_content
-    # Standard groups must end with '-no-aggregate-models' to be included
-    assert "test-provider-no-aggregate-models" in yaml_content
-    assert "http://localhost:3001/proxy/test-aggregate" in yaml_content
-    assert "http://localhost:3001/proxy/test-provider-no-aggregate-models" in yaml_content
-    assert "api_keys:" in yaml_content
-    assert "preferences:" in yaml_content
-    # Verify the gptload all-models API key is added
-    assert "sk-all-models-from-gptload" in yaml_content
-    assert "test-aggregate/*" in yaml_content
-    assert "test-provider-no-aggregate-models/*" in yaml_content
+    # The whole document, layout included: both groups (standard groups must
+    # end with '-no-aggregate-models' to be included), the default api_keys
+    # and preferences, and the gptload all-models API key
+    assert yaml_content == (GOLDEN_DIR / "uniapi_basic.yaml").read_text()
 
 
 def test_generate_uniapi_yaml_filters_duplicate_standards(config_generator, db_session):
     """Test that standard groups with models in aggregates are filtered out."""
-    # Create aggregate group for gpt-4
-    aggregate = GPTLoadGroup(
-        gptload_group_id=1,
-        name="gpt-4-aggregate",
-        group_type="aggregate",
-        provider_id=None,
-        normalized_model="gpt-4"
-    )
-    db_session.add(aggregate)
-    
-    # Create standard group with gpt-4 (should be filtered)
-    standard_duplicate = GPTLoadGroup(
-        gptload_group_id=2,
-        name="provider-0-gpt-4",
-        group_type="standard",
-        provider_id=1,
-        normalized_model="gpt-4"
-    )
-    db_session.add(standard_duplicate)
-    
-    # Create standard group with non-duplicate models (should be included)
-    # Must end with '-no-aggregate-models' to be included in uni-api config
-    standard_unique = GPTLoadGroup(
-        gptload_group_id=3,
-        name="provider-no-aggregate-models",
-        group_type="standard",
-        provider_id=1,
-        normalized_model=None
+    _insert_groups(
+        db_session,
+        # Aggregate group for gpt-4
+        _group_values("gpt-4-aggregate", group_type="aggregate", normalized_model="gpt-4"),
+        # Standard group with gpt-4 (should be filtered)
+        _group_values("provider-0-gpt-4", gptload_group_id=2, normalized_model="gpt-4"),
+        # Standard group with non-duplicate models (should be included)
+        # Must end with '-no-aggregate-models' to be included in uni-api config
+        _group_values("provider-no-aggregate-models", gptload_group_id=3)
     )
-    db_session.add(standard_unique)
-    
-    db_session.commit()
     
     # Generate YAML
     yaml_content = config_generator.generate_uniapi_yaml(
@@ -158,14 +165,57 @@ def test_generate_uniapi_yaml_filters_duplicate_standards(config_generator, db_s
         gptload_auth_key="test-key"
     )
     
+    providers = _providers_by_name(_load_yaml(yaml_content))
+    
     # Verify aggregate is included
-    assert "gpt-4-aggregate" in yaml_content
+    assert "gpt-4-aggregate" in providers
     
     # Verify non-duplicate standard is included (must end with '-no-aggregate-models')
-    assert "provider-no-aggregate-models" in yaml_content
+    assert "provider-no-aggregate-models" in providers
     
     # Verify duplicate standard is NOT included (doesn't end with '-no-aggregate-models')
-    assert "provider-0-gpt-4" not in yaml_content
+    assert "provider-0-gpt-4" not in providers
+
+
+def test_generate_uniapi_yaml_with_count(config_generator, db_session):
+    """Test the provider count matches the entries written to the YAML."""
+    _insert_groups(
+        db_session,
+        _group_values("gpt-4-aggregate", group_type="aggregate", normalized_model="gpt-4"),
+        # Filtered out: does not end with '-no-aggregate-models'
+        _group_values("provider-0-gpt-4", gptload_group_id=2, normalized_model="gpt-4"),
+        _group_values("provider-no-aggregate-models", gptload_group_id=3)
+    )
+    
+    yaml_content, provider_count = config_generator.generate_uniapi_yaml_with_count(
+        db_session,
+        gptload_base_url="http://localhost:3001",
+        gptload_auth_key="test-key"
+    )
+    
+    assert provider_count == 2
+    assert len(_load_yaml(yaml_content)["providers"]) == 2
+
+
+def test_generate_uniapi_yaml_reuses_unchanged_dump(config_generator, db_session, monkeypatch):
+    """Test the YAML is only dumped again when the configuration changes."""
+    monkeypatch.setattr(ConfigurationGenerator, "_last_yaml_dump", None)
+    _insert_groups(db_session, _group_values("cached-no-aggregate-models"))
+    dump = MagicMock(wraps=config_generator._dump_yaml_with_indent)
+    monkeypatch.setattr(config_generator, "_dump_yaml_with_indent", dump)
+    
+    def generate(auth_key):
+        return config_generator.generate_uniapi_yaml(
+            db_session, gptload_base_url="http://localhost:3001", gptload_auth_key=auth_key
+        )
+    
+    first = generate("test-key")
+    assert generate("test-key") == first
+    assert dump.call_count == 1
+    
+    changed = generate("other-key")
+    assert dump.call_count == 2
+    assert _providers_by_name(_load_yaml(changed))["cached-no-aggregate-models"]["api"] == "other-key"
 
 
 def test_validate_uniapi_config_valid(config_generator):
@@ -194,7 +244,7 @@ def test_validate_uniapi_config_missing_providers(config_generator):
         "preferences": {}
     }
     
-    with pytest.raises(ValueError, match="missing 'providers' key"):
+    with pytest.raises(ValueError, match=MISSING_PROVIDERS_RE):
         config_generator._validate_uniapi_config(invalid_config)
 
 
@@ -209,7 +259,7 @@ def test_validate_uniapi_config_invalid_provider(config_generator):
         ]
     }
     
-    with pytest.raises(ValueError, match="missing required key"):
+    with pytest.raises(ValueError, match=MISSING_KEY_RE):
         config_generator._validate_uniapi_config(invalid_config)
 
 
@@ -226,30 +276,18 @@ def test_validate_uniapi_config_invalid_base_url(config_generator):
         ]
     }
     
-    with pytest.raises(ValueError, match="invalid base_url"):
+    with pytest.raises(ValueError, match=INVALID_URL_RE):
         config_generator._validate_uniapi_config(invalid_config)
 
 
 def test_get_gptload_groups(config_generator, db_session):
     """Test retrieving GPT-Load groups from database."""
     # Create test groups
-    groups = [
-        GPTLoadGroup(
-            gptload_group_id=1,
-            name="test-standard",
-            group_type="standard",
-            provider_id=1
-        ),
-        GPTLoadGroup(
-            gptload_group_id=2,
-            name="test-aggregate",
-            group_type="aggregate",
-            provider_id=None
-        )
-    ]
-    for group in groups:
-        db_session.add(group)
-    db_session.commit()
+    _insert_groups(
+        db_session,
+        _group_values("test-standard"),
+        _group_values("test-aggregate", group_type="aggregate", gptload_group_id=2)
+    )
     
     # Get all groups
     all_groups = config_generator.get_gptload_groups(db_session)
@@ -268,14 +306,9 @@ def test_get_gptload_groups(config_generator, db_session):
 
 def test_get_gptload_group_by_id(config_generator, db_session):
     """Test retrieving a specific GPT-Load group by ID."""
-    group = GPTLoadGroup(
-        gptload_group_id=123,
-        name="test-group",
-        group_type="standard",
-        provider_id=1
-    )
+    group = _make_group("test-group", gptload_group_id=123)
     db_session.add(group)
-    db_session.commit()
+    db_session.flush()
     
     # Get by GPT-Load ID
     retrieved = config_generator.get_gptload_group_by_id(db_session, 123)
@@ -289,14 +322,9 @@ def test_get_gptload_group_by_id(config_generator, db_session):
 
 def test_delete_gptload_group(config_generator, db_session):
     """Test deleting a GPT-Load group from database."""
-    group = GPTLoadGroup(
-        gptload_group_id=123,
-        name="test-group",
-        group_type="standard",
-        provider_id=1
-    )
+    group = _make_group("test-group", gptload_group_id=123)
     db_session.add(group)
-    db_session.commit()
+    db_session.flush()
     
     # Delete the group
     result = config_generator.delete_gptload_group(db_session, 123)
@@ -314,14 +342,9 @@ def test_delete_gptload_group(config_generator, db_session):
 def test_export_uniapi_yaml_to_file(config_generator, db_session, tmp_path):
     """Test exporting uni-api YAML to a file."""
     # Create a test group
-    group = GPTLoadGroup(
-        gptload_group_id=1,
-        name="test-group",
-        group_type="standard",
-        provider_id=1
-    )
+    group = _make_group("test-group")
     db_session.add(group)
-    db_session.commit()
+    db_session.flush()
     
     # Export to temporary file
     file_path = tmp_path / "api.yaml"
@@ -332,137 +355,76 @@ def test_export_uniapi_yaml_to_file(config_generator, db_session, tmp_path):
         gptload_auth_key="test-key"
     )
     
-    # Verify file was created
-    assert os.path.exists(result_path)
     assert result_path == str(file_path)
     
-    # Verify file content
-    with open(file_path, 'r') as f:
-        content = f.read()
-        assert "providers:" in content
-        assert "test-group" in content
-
-
-def test_build_base_url_openai(config_generator, db_session, encryption_service):
-    """Test build_base_url for OpenAI channel type."""
-    # Create provider with OpenAI channel type
-    provider = Provider(
-        name="test-openai",
-        base_url="https://api.openai.com",
-        api_key_encrypted=encryption_service.encrypt("test-key"),
-        channel_type="openai"
-    )
-    db_session.add(provider)
-    db_session.commit()
-    
-    # Create standard group
-    group = GPTLoadGroup(
-        gptload_group_id=1,
-        name="test-openai-group",
-        group_type="standard",
-        provider_id=provider.id
-    )
-    db_session.add(group)
-    db_session.commit()
-    
-    # Build base URL
-    base_url = config_generator.build_base_url(
-        db_session,
-        group,
-        "http://localhost:3001"
-    )
-    
-    # Verify OpenAI format
-    assert base_url == "http://localhost:3001/proxy/test-openai-group/v1/chat/completions"
+    # Verify file content (reading it fails if it was not created)
+    config = _load_yaml(file_path.read_text())
+    assert "test-group" in _providers_by_name(config)
 
 
-def test_build_base_url_anthropic(config_generator, db_session, encryption_service):
-    """Test build_base_url for Anthropic channel type."""
-    # Create provider with Anthropic channel type
-    provider = Provider(
-        name="test-anthropic",
-        base_url="https://api.anthropic.com",
-        api_key_encrypted=encryption_service.encrypt("test-key"),
-        channel_type="anthropic"
-    )
-    db_session.add(provider)
-    db_session.commit()
-    
-    # Create standard group
-    group = GPTLoadGroup(
-        gptload_group_id=1,
-        name="test-anthropic-group",
-        group_type="standard",
-        provider_id=provider.id
-    )
-    db_session.add(group)
-    db_session.commit()
+def test_write_uniapi_yaml_creates_directory(config_generator, tmp_path):
+    """Test writing already generated YAML creates the directory and sets permissions."""
+    file_path = tmp_path / "nested" / "api.yaml"
     
-    # Build base URL
-    base_url = config_generator.build_base_url(
-        db_session,
-        group,
-        "http://localhost:3001"
-    )
+    result_path = config_generator.write_uniapi_yaml(str(file_path), "providers: []\n")
     
-    # Verify Anthropic format
-    assert base_url == "http://localhost:3001/proxy/test-anthropic-group/v1/messages"
+    assert result_path == str(file_path)
+    assert file_path.read_text() == "providers: []\n"
+    assert (os.stat(file_path).st_mode & 0o777) == 0o644
 
 
-def test_build_base_url_gemini(config_generator, db_session, encryption_service):
-    """Test build_base_url for Gemini channel type."""
-    # Create provider with Gemini channel type
-    provider = Provider(
-        name="test-gemini",
-        base_url="https://generativelanguage.googleapis.com",
-        api_key_encrypted=encryption_service.encrypt("test-key"),
-        channel_type="gemini"
-    )
-    db_session.add(provider)
-    db_session.commit()
-    
-    # Create standard group
-    group = GPTLoadGroup(
-        gptload_group_id=1,
-        name="test-gemini-group",
-        group_type="standard",
-        provider_id=provider.id
-    )
-    db_session.add(group)
-    db_session.commit()
+def test_write_uniapi_yaml_replaces_file_atomically(config_generator, tmp_path):
+    """Test overwriting the YAML replaces the file and leaves no temporary file."""
+    file_path = tmp_path / "api.yaml"
+    file_path.write_text("providers:\n  - provider: old\n")
     
-    # Build base URL
-    base_url = config_generator.build_base_url(
-        db_session,
-        group,
-        "http://localhost:3001"
-    )
+    config_generator.write_uniapi_yaml(str(file_path), "providers: []\n")
     
-    # Verify Gemini format
-    assert base_url == "http://localhost:3001/proxy/test-gemini-group/v1beta"
+    assert file_path.read_text() == "providers: []\n"
+    assert os.listdir(tmp_path) == ["api.yaml"]
 
 
-def test_build_base_url_unknown_defaults_to_openai(config_generator, db_session, encryption_service):
-    """Test build_base_url defaults to OpenAI format for unknown channel types."""
-    # Create provider with unknown channel type
-    provider = Provider(
-        name="test-unknown",
-        base_url="https://api.unknown.com",
-        api_key_encrypted=encryption_service.encrypt("test-key"),
-        channel_type="unknown"
+def test_write_uniapi_yaml_temporary_file_prefix(config_generator, tmp_path, monkeypatch):
+    """Test the temporary file is named after the target, so leftovers are recognisable."""
+    file_path = tmp_path / "api.yaml"
+    replaced = []
+    real_replace = os.replace
+    
+    def record_replace(src, dst):
+        replaced.append(os.path.basename(src))
+        real_replace(src, dst)
+    
+    monkeypatch.setattr(os, "replace", record_replace)
+    config_generator.write_uniapi_yaml(str(file_path), "providers: []\n")
+    
+    assert len(replaced) == 1
+    assert replaced[0].startswith(".api.yaml.")
+    assert replaced[0].endswith(".tmp")
+
+
+@pytest.mark.parametrize("channel_type,suffix", [
+    ("openai", "/v1/chat/completions"),
+    ("anthropic", "/v1/messages"),
+    ("gemini", "/v1beta"),
+    # Unknown channel types default to the OpenAI format
+    ("unknown", "/v1/chat/completions"),
+])
+def test_build_base_url(config_generator, db_session, encryption_service, channel_type, suffix):
+    """Test build_base_url uses the API path of the provider's channel type."""
+    provider = _make_provider(
+        encryption_service,
+        f"test-{channel_type}",
+        "https://api.example.com",
+        channel_type=channel_type
     )
     db_session.add(provider)
-    db_session.commit()
+    # Flush for the provider ID; everything is committed once below
+    db_session.flush()
     
     # Create standard group
-    group = GPTLoadGroup(
-        gptload_group_id=1,
-        name="test-unknown-group",
-        group_type="standard",
-        provider_id=provider.id
-    )
+    group = _make_group(f"test-{channel_type}-group", provider_id=provider.id)
     db_session.add(group)
-    db_session.commit()
+    db_session.flush()
     
     # Build base URL
     base_url = config_generator.build_base_url(
@@ -471,22 +433,15 @@ def test_build_base_url_unknown_defaults_to_openai(config_generator, db_session,
         "http://localhost:3001"
     )
     
-    # Verify defaults to OpenAI format
-    assert base_url == "http://localhost:3001/proxy/test-unknown-group/v1/chat/completions"
+    assert base_url == f"http://localhost:3001/proxy/test-{channel_type}-group{suffix}"
 
 
 def test_build_base_url_aggregate_defaults_to_openai(config_generator, db_session):
     """Test build_base_url defaults to OpenAI format for aggregate groups."""
     # Create aggregate group (no provider_id)
-    group = GPTLoadGroup(
-        gptload_group_id=1,
-        name="test-aggregate",
-        group_type="aggregate",
-        provider_id=None,
-        normalized_model="gpt-4"
-    )
+    group = _make_group("test-aggregate", group_type="aggregate", normalized_model="gpt-4")
     db_session.add(group)
-    db_session.commit()
+    db_session.flush()
     
     # Build base URL
     base_url = config_generator.build_base_url(
@@ -503,53 +458,38 @@ def test_generate_uniapi_yaml_with_multiple_channel_types(config_generator, db_s
     """Test uni-api YAML generation with multiple channel types."""
     # Create providers with different channel types
     providers = [
-        Provider(
-            name="openai-provider",
-            base_url="https://api.openai.com",
-            api_key_encrypted=encryption_service.encrypt("key1"),
-            channel_type="openai"
+        _make_provider(
+            encryption_service,
+            "openai-provider",
+            "https://api.openai.com",
+            api_key="key1"
         ),
-        Provider(
-            name="anthropic-provider",
-            base_url="https://api.anthropic.com",
-            api_key_encrypted=encryption_service.encrypt("key2"),
-            channel_type="anthropic"
+        _make_provider(
+            encryption_service,
+            "anthropic-provider",
+            "https://api.anthropic.com",
+            channel_type="anthropic",
+            api_key="key2"
         ),
-        Provider(
-            name="gemini-provider",
-            base_url="https://generativelanguage.googleapis.com",
-            api_key_encrypted=encryption_service.encrypt("key3"),
-            channel_type="gemini"
+        _make_provider(
+            encryption_service,
+            "gemini-provider",
+            "https://generativelanguage.googleapis.com",
+            channel_type="gemini",
+            api_key="key3"
         )
     ]
-    for provider in providers:
-        db_session.add(provider)
-    db_session.commit()
+    db_session.add_all(providers)
+    # Flush for the provider IDs; everything is committed once below
+    db_session.flush()
     
     # Create groups for each provider (must end with '-no-aggregate-models' to be included)
-    groups = [
-        GPTLoadGroup(
-            gptload_group_id=1,
-            name="openai-no-aggregate-models",
-            group_type="standard",
-            provider_id=providers[0].id
-        ),
-        GPTLoadGroup(
-            gptload_group_id=2,
-            name="anthropic-no-aggregate-models",
-            group_type="standard",
-            provider_id=providers[1].id
-        ),
-        GPTLoadGroup(
-            gptload_group_id=3,
-            name="gemini-no-aggregate-models",
-            group_type="standard",
-            provider_id=providers[2].id
-        )
-    ]
-    for group in groups:
-        db_session.add(group)
-    db_session.commit()
+    _insert_groups(
+        db_session,
+        _group_values("openai-no-aggregate-models", provider_id=providers[0].id),
+        _group_values("anthropic-no-aggregate-models", gptload_group_id=2, provider_id=providers[1].id),
+        _group_values("gemini-no-aggregate-models", gptload_group_id=3, provider_id=providers[2].id)
+    )
     
     # Generate YAML
     yaml_content = config_generator.generate_uniapi_yaml(
@@ -559,15 +499,16 @@ def test_generate_uniapi_yaml_with_multiple_channel_types(config_generator, db_s
     )
     
     # Verify each channel type has correct path
-    assert "http://localhost:3001/proxy/openai-no-aggregate-models/v1/chat/completions" in yaml_content
-    assert "http://localhost:3001/proxy/anthropic-no-aggregate-models/v1/messages" in yaml_content
-    assert "http://localhost:3001/proxy/gemini-no-aggregate-models/v1beta" in yaml_content
+    providers = _providers_by_name(_load_yaml(yaml_content))
+    assert {name: provider["base_url"] for name, provider in providers.items()} == {
+        "openai-no-aggregate-models": "http://localhost:3001/proxy/openai-no-aggregate-models/v1/chat/completions",
+        "anthropic-no-aggregate-models": "http://localhost:3001/proxy/anthropic-no-aggregate-models/v1/messages",
+        "gemini-no-aggregate-models": "http://localhost:3001/proxy/gemini-no-aggregate-models/v1beta",
+    }
 
 
-def test_read_existing_yaml_file_exists(config_generator, tmp_path):
-    """Test reading existing YAML file when it exists."""
-    # Create a test YAML file
-    yaml_file = tmp_path / "api.yaml"
+def test_read_existing_yaml_from_text(config_generator):
+    """Test parsing the text of an existing YAML file."""
     yaml_content = """
 providers:
   - provider: existing-provider
@@ -581,10 +522,7 @@ api_keys:
 preferences:
   rate_limit: "1000/min"
 """
-    yaml_file.write_text(yaml_content)
-    
-    # Read the file
-    result = config_generator._read_existing_yaml(str(yaml_file))
+    result = config_generator._read_existing_yaml_from_text(yaml_content)
     
     # Verify content
     assert result is not None
@@ -601,25 +539,17 @@ def test_read_existing_yaml_file_not_exists(config_generator):
     assert result is None
 
 
-def test_read_existing_yaml_malformed(config_generator, tmp_path):
-    """Test reading malformed YAML file."""
-    # Create a malformed YAML file
-    yaml_file = tmp_path / "api.yaml"
-    yaml_file.write_text("invalid: yaml: content: [")
-    
+def test_read_existing_yaml_malformed(config_generator):
+    """Test parsing malformed YAML."""
     # Should return None and log error
-    result = config_generator._read_existing_yaml(str(yaml_file))
+    result = config_generator._read_existing_yaml_from_text("invalid: yaml: content: [")
     assert result is None
 
 
-def test_read_existing_yaml_empty_file(config_generator, tmp_path):
-    """Test reading empty YAML file."""
-    # Create an empty YAML file
-    yaml_file = tmp_path / "api.yaml"
-    yaml_file.write_text("")
-    
+def test_read_existing_yaml_empty_file(config_generator):
+    """Test parsing an empty YAML file."""
     # Should return None
-    result = config_generator._read_existing_yaml(str(yaml_file))
+    result = config_generator._read_existing_yaml_from_text("")
     assert result is None
 
 
@@ -846,14 +776,9 @@ preferences:
     yaml_file.write_text(existing_content)
     
     # Create a test group
-    group = GPTLoadGroup(
-        gptload_group_id=1,
-        name="new-group",
-        group_type="standard",
-        provider_id=1
-    )
+    group = _make_group("new-group")
     db_session.add(group)
-    db_session.commit()
+    db_session.flush()
     
     # Generate YAML with existing file
     yaml_content = config_generator.generate_uniapi_yaml(
@@ -863,20 +788,21 @@ preferences:
         existing_yaml_path=str(yaml_file)
     )
     
+    config = _load_yaml(yaml_content)
+    providers = _providers_by_name(config)
+    
     # Verify dummy provider is removed
-    assert "provider_name" not in yaml_content
+    assert "provider_name" not in providers
     
     # Verify new group is added
-    assert "new-group" in yaml_content
+    assert "new-group" in providers
     
     # Verify custom api_keys are preserved
-    assert "custom-admin-key" in yaml_content
-    assert "admin" in yaml_content
+    assert _api_keys_by_key(config)["custom-admin-key"]["role"] == "admin"
     
     # Verify custom preferences are preserved
-    assert "5000/min" in yaml_content
-    assert "custom_setting" in yaml_content
-    assert "preserved" in yaml_content
+    assert config["preferences"]["rate_limit"] == "5000/min"
+    assert config["preferences"]["custom_setting"] == "preserved"
 
 
 def test_export_uniapi_yaml_to_file_with_merging(config_generator, db_session, tmp_path, encryption_service):
@@ -899,14 +825,9 @@ preferences:
     yaml_file.write_text(existing_content)
     
     # Create a test group
-    group = GPTLoadGroup(
-        gptload_group_id=1,
-        name="test-group",
-        group_type="standard",
-        provider_id=1
-    )
+    group = _make_group("test-group")
     db_session.add(group)
-    db_session.commit()
+    db_session.flush()
     
     # Export to file (should merge with existing)
     result_path = config_generator.export_uniapi_yaml_to_file(
@@ -917,31 +838,26 @@ preferences:
     )
     
     # Read the file
-    with open(yaml_file, 'r') as f:
-        content = f.read()
+    config = _load_yaml(yaml_file.read_text())
+    providers = _providers_by_name(config)
     
     # Verify dummy provider is removed
-    assert "provider_name" not in content
+    assert "provider_name" not in providers
     
     # Verify new group is added
-    assert "test-group" in content
+    assert "test-group" in providers
     
     # Verify preserved settings
-    assert "preserved-key" in content
-    assert "2000/min" in content
+    assert "preserved-key" in _api_keys_by_key(config)
+    assert config["preferences"]["rate_limit"] == "2000/min"
 
 
 def test_generate_uniapi_yaml_no_existing_file(config_generator, db_session):
     """Test generating uni-api YAML when no existing file exists."""
     # Create a test group (must end with '-no-aggregate-models' to be included)
-    group = GPTLoadGroup(
-        gptload_group_id=1,
-        name="test-no-aggregate-models",
-        group_type="standard",
-        provider_id=1
-    )
+    group = _make_group("test-no-aggregate-models")
     db_session.add(group)
-    db_session.commit()
+    db_session.flush()
     
     # Generate YAML with non-existent file path
     yaml_content = config_generator.generate_uniapi_yaml(
@@ -952,26 +868,21 @@ def test_generate_uniapi_yaml_no_existing_file(config_generator, db_session):
     )
     
     # Verify default sections are used
-    assert "sk-user-key" in yaml_content
-    assert "999999/min" in yaml_content
-    assert "test-no-aggregate-models" in yaml_content
+    config = _load_yaml(yaml_content)
+    api_keys = _api_keys_by_key(config)
+    assert "sk-user-key" in api_keys
+    assert config["preferences"]["rate_limit"] == "999999/min"
+    assert "test-no-aggregate-models" in _providers_by_name(config)
     # Verify the gptload all-models API key is added
-    assert "sk-all-models-from-gptload" in yaml_content
-    assert "test-no-aggregate-models/*" in yaml_content
+    assert api_keys["sk-all-models-from-gptload"]["model"] == ["test-no-aggregate-models/*"]
 
 
 def test_export_uniapi_yaml_creates_directory(config_generator, db_session, tmp_path):
     """Test that export creates directory if it doesn't exist."""
     # Create a test group
-    group = GPTLoadGroup(
-        gptload_group_id=1,
-        name="test-group",
-        group_type="standard",
-        provider_id=1,
-        normalized_model=None
-    )
+    group = _make_group("test-group")
     db_session.add(group)
-    db_session.commit()
+    db_session.flush()
     
     # Use a nested directory path that doesn't exist
     nested_dir = tmp_path / "nested" / "directory" / "structure"
@@ -990,24 +901,16 @@ def test_export_uniapi_yaml_creates_directory(config_generator, db_session, tmp_
     assert nested_dir.is_dir()
     
     # Verify file was written
-    assert os.path.exists(result_path)
-    with open(result_path, 'r') as f:
-        content = f.read()
-        assert "test-group" in content
+    config = _load_yaml(Path(result_path).read_text())
+    assert "test-group" in _providers_by_name(config)
 
 
 def test_export_uniapi_yaml_sets_permissions(config_generator, db_session, tmp_path):
     """Test that export sets proper file permissions."""
     # Create a test group
-    group = GPTLoadGroup(
-        gptload_group_id=1,
-        name="test-group",
-        group_type="standard",
-        provider_id=1,
-        normalized_model=None
-    )
+    group = _make_group("test-group")
     db_session.add(group)
-    db_session.commit()
+    db_session.flush()
     
     # Export to file
     file_path = tmp_path / "api.yaml"
@@ -1018,13 +921,13 @@ def test_export_uniapi_yaml_sets_permissions(config_generator, db_session, tmp_p
         gptload_auth_key="test-key"
     )
     
-    # Verify file permissions (0o644 = readable by all, writable by owner)
-    # On Windows, this might not work exactly the same, so we just check the file exists
-    assert os.path.exists(str(file_path))
+    # Verify file permissions (0o644 = readable by all, writable by owner);
+    # stat() fails if the file does not exist
+    stat_info = file_path.stat()
     
-    # On Unix-like systems, verify permissions
+    # On Windows, this might not work exactly the same, so only check
+    # permissions on Unix-like systems
     if os.name != 'nt':  # Not Windows
-        stat_info = os.stat(str(file_path))
         permissions = stat_info.st_mode & 0o777
         assert permissions == 0o644
 
@@ -1032,15 +935,9 @@ def test_export_uniapi_yaml_sets_permissions(config_generator, db_session, tmp_p
 def test_export_uniapi_yaml_handles_io_error(config_generator, db_session, tmp_path):
     """Test that export handles IOError gracefully."""
     # Create a test group
-    group = GPTLoadGroup(
-        gptload_group_id=1,
-        name="test-group",
-        group_type="standard",
-        provider_id=1,
-        normalized_model=None
-    )
+    group = _make_group("test-group")
     db_session.add(group)
-    db_session.commit()
+    db_session.flush()
     
     # Create a file and then try to write to it as if it were a directory
     # This will cause an error when trying to create a subdirectory
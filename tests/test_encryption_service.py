@@ -16,61 +16,29 @@ def get_test_env(encryption_key: str) -> dict:
     }
 
 
-def test_encryption_service_encrypt_decrypt():
-    """Test that encryption service can encrypt and decrypt data."""
-    # Set a valid encryption key for testing
-    test_key = Fernet.generate_key().decode()
-    
-    with patch.dict(os.environ, get_test_env(test_key), clear=True):
-        # Clear any cached imports
-        if 'app.config' in sys.modules:
-            del sys.modules['app.config']
-        if 'app.services.encryption_service' in sys.modules:
-            del sys.modules['app.services.encryption_service']
-        
-        # Import after patching environment
-        from app.services.encryption_service import EncryptionService
-        
-        service = EncryptionService()
-        
-        # Test encryption and decryption
-        plaintext = "sk-test-api-key-12345"
-        encrypted = service.encrypt(plaintext)
-        
-        # Encrypted should be different from plaintext
-        assert encrypted != plaintext
-        
-        # Decryption should return original
-        decrypted = service.decrypt(encrypted)
-        assert decrypted == plaintext
+@pytest.fixture(scope="module")
+def encryption_service():
+    """Create one encryption service with a fresh key for the module."""
+    from app.services.encryption_service import EncryptionService
+    return EncryptionService(encryption_key=Fernet.generate_key().decode())
 
 
-def test_encryption_service_multiple_values():
-    """Test that encryption service handles multiple different values."""
-    test_key = Fernet.generate_key().decode()
+@pytest.mark.parametrize("plaintext", [
+    "sk-test-api-key-12345",
+    "sk-openai-key-123",
+    "sk-anthropic-key-456",
+    "very-long-api-key-" + "x" * 100,
+    "short",
+])
+def test_encryption_service_encrypt_decrypt(encryption_service, plaintext):
+    """Test that encryption service can encrypt and decrypt data."""
+    encrypted = encryption_service.encrypt(plaintext)
     
-    with patch.dict(os.environ, get_test_env(test_key), clear=True):
-        # Clear any cached imports
-        if 'app.config' in sys.modules:
-            del sys.modules['app.config']
-        if 'app.services.encryption_service' in sys.modules:
-            del sys.modules['app.services.encryption_service']
-        
-        from app.services.encryption_service import EncryptionService
-        
-        service = EncryptionService()
-        
-        values = [
-            "sk-openai-key-123",
-            "sk-anthropic-key-456",
-            "very-long-api-key-" + "x" * 100,
-            "short",
-        ]
-        
-        for value in values:
-            encrypted = service.encrypt(value)
-            decrypted = service.decrypt(encrypted)
-            assert decrypted == value
+    # Encrypted should be different from plaintext
+    assert encrypted != plaintext
+    
+    # Decryption should return original
+    assert encryption_service.decrypt(encrypted) == plaintext
 
 
 def test_encryption_service_missing_key():
@@ -527,3 +527,91 @@ class TestGPTLoadClient:
         
         assert result["deleted_group_id"] == 10
         assert result["sub_group_count"] == 2
+
+    @pytest.mark.asyncio
+    async def test_create_new_provider_groups_attaches_matching_aggregates(self, gptload_client):
+        """Test new groups are only attached to aggregates for their own models."""
+        gptload_client.create_standard_group = AsyncMock(
+            side_effect=[{"id": 21}, Exception("boom"), {"id": 23}]
+        )
+        gptload_client.add_keys_to_group = AsyncMock()
+        gptload_client.add_sub_groups_with_equal_weights = AsyncMock()
+        
+        new_groups = [
+            {"name": "p-0-gpt-4o", "api_key": "k1", "model_redirect_rules": {"gpt-4o": "gpt4o"}},
+            {"name": "p-1-gpt-4o", "api_key": "k2", "model_redirect_rules": {"gpt-4o": "gpt-4o"}},
+            {"name": "p-no-aggregate-models", "model_redirect_rules": {"other": "other"}},
+        ]
+        existing_aggregates = {"aggregate-gpt-4o": 100, "aggregate-claude-3": 101}
+        
+        result = await gptload_client.create_new_provider_groups(new_groups, existing_aggregates)
+        
+        assert result["created_groups"] == [
+            {"name": "p-0-gpt-4o", "id": 21},
+            {"name": "p-no-aggregate-models", "id": 23},
+        ]
+        assert result["updated_aggregates"] == [100]
+        assert len(result["errors"]) == 1
+        gptload_client.add_sub_groups_with_equal_weights.assert_awaited_once_with(100, [21], weight=10)
+        gptload_client.add_keys_to_group.assert_awaited_once_with(21, ["k1"])
+
+    @pytest.mark.asyncio
+    async def test_create_new_provider_groups_attaches_once_per_aggregate(self, gptload_client):
+        """Test names that sanitize to the same aggregate only attach once."""
+        gptload_client.create_standard_group = AsyncMock(return_value={"id": 31})
+        gptload_client.add_sub_groups_with_equal_weights = AsyncMock()
+        
+        new_groups = [
+            {"name": "p-0-gpt-4o", "model_redirect_rules": {"gpt-4o": "a", "gpt.4o": "b"}},
+        ]
+        
+        result = await gptload_client.create_new_provider_groups(
+            new_groups, {"aggregate-gpt-4o": 100}
+        )
+        
+        assert result["updated_aggregates"] == [100]
+        assert result["errors"] == []
+        gptload_client.add_sub_groups_with_equal_weights.assert_awaited_once_with(100, [31], weight=10)
+
+    @pytest.mark.asyncio
+    async def test_sync_config_step1_creates_groups_concurrently(self, gptload_client):
+        """Test standard groups are created with bounded concurrency, in input order."""
+        import asyncio
+        from app.services.provider_splitter import SplitGroup
+        
+        in_flight = 0
+        peak = 0
+        
+        async def create_standard_group(name, **kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            if name == "p-2-bad":
+                raise Exception("boom")
+            return {"id": int(name.split("-")[1]) + 100}
+        
+        gptload_client.create_standard_group = create_standard_group
+        split_groups = [
+            SplitGroup(
+                group_name=name,
+                group_type="standard",
+                provider_name="p",
+                base_url="https://api.test.com",
+                api_key=f"key-{name}",
+                channel_type="openai",
+                model_redirect_rules={"m": "m"}
+            )
+            for name in ["p-0-a", "p-1-b", "p-2-bad", "p-3-c", "p-4-d"]
+        ]
+        
+        result = await gptload_client.sync_config_step1(split_groups, concurrency=2)
+        
+        assert peak == 2
+        assert list(result["group_name_to_id"].items()) == [
+            ("p-0-a", 100), ("p-1-b", 101), ("p-3-c", 103), ("p-4-d", 104)
+        ]
+        assert result["group_name_to_apikey"]["p-3-c"] == "key-p-3-c"
+        assert result["errors"] == ["p-2-bad: boom"]
+        assert result["success"] is False
@@ -1,53 +1,19 @@
 """Tests for model service."""
 
 import pytest
-import os
-import sys
-from unittest.mock import patch
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 from datetime import datetime
 from cryptography.fernet import Fernet
 
-from app.database.database import Base
 from app.models.provider import Provider
 from app.models.model import Model
+from app.services.encryption_service import EncryptionService
 from app.services.model_service import ModelService, ProviderSplit
 
 
-def get_test_env() -> dict:
-    """Get test environment with all required settings."""
-    test_key = Fernet.generate_key().decode()
-    return {
-        "ENCRYPTION_KEY": test_key,
-        "GPTLOAD_AUTH_KEY": "test-auth-key",
-        "DATABASE_URL": "sqlite:///./test.db",
-    }
-
-
-@pytest.fixture
-def db_session():
-    """Create a test database session."""
-    engine = create_engine("sqlite:///:memory:")
-    Base.metadata.create_all(engine)
-    SessionLocal = sessionmaker(bind=engine)
-    session = SessionLocal()
-    yield session
-    session.close()
-
-
-@pytest.fixture
+@pytest.fixture(scope="module")
 def encryption_service():
     """Create encryption service for tests."""
-    with patch.dict(os.environ, get_test_env(), clear=True):
-        # Clear any cached imports
-        if 'app.config' in sys.modules:
-            del sys.modules['app.config']
-        if 'app.services.encryption_service' in sys.modules:
-            del sys.modules['app.services.encryption_service']
-        
-        from app.services.encryption_service import EncryptionService
-        return EncryptionService()
+    return EncryptionService(encryption_key=Fernet.generate_key().decode())
 
 
 @pytest.fixture
@@ -135,6 +101,23 @@ class TestModelNormalization:
                 db_session, sample_models[1].id, "unified-model", allow_duplicates=False
             )
 
+    def test_normalize_model_locks_provider_before_duplicate_check(
+        self, db_session, model_service, sample_models, record_statements
+    ):
+        """Test the provider row is locked before the duplicate probe runs."""
+        from sqlalchemy.dialects import postgresql
+        from app.services.model_service import _STMT_LOCK_PROVIDER
+        
+        with record_statements(db_session) as statements:
+            model_service.normalize_model(db_session, sample_models[0].id, "unified-model")
+        
+        provider_lock = next(i for i, sql in enumerate(statements) if "FROM providers" in sql)
+        duplicate_probe = next(
+            i for i, sql in enumerate(statements) if "models.normalized_name = ?" in sql
+        )
+        assert provider_lock < duplicate_probe
+        assert "FOR UPDATE" in str(_STMT_LOCK_PROVIDER.compile(dialect=postgresql.dialect()))
+
     def test_reset_model_name(self, db_session, model_service, sample_models):
         """Test resetting model name to original."""
         model = sample_models[0]
@@ -266,6 +249,50 @@ class TestModelDeletion:
             model_service.bulk_delete_models(db_session, model_ids, wrong_provider_id)
 
 
+class TestModelLookupCache:
+    """Tests for the per-session models-by-provider cache."""
+
+    def test_get_models_by_provider_cached_until_mutation(
+        self, db_session, model_service, sample_models, record_statements
+    ):
+        """Test repeated lookups reuse the cached list until the session writes."""
+        from sqlalchemy import update
+        
+        provider_id = sample_models[0].provider_id
+        
+        with record_statements(db_session) as statements:
+            assert len(model_service.get_models_by_provider(db_session, provider_id)) == 3
+            assert len(model_service.get_models_by_provider(db_session, provider_id)) == 3
+        selects = [sql for sql in statements if sql.lstrip().upper().startswith("SELECT")]
+        assert len(selects) == 1
+        
+        # A flushed but uncommitted insert is seen by the next lookup
+        db_session.add(Model(provider_id=provider_id, original_name="new-model"))
+        db_session.flush()
+        assert len(model_service.get_models_by_provider(db_session, provider_id)) == 4
+        
+        # So is a bulk UPDATE, which bypasses the flush
+        db_session.execute(
+            update(Model).where(Model.original_name == "new-model").values(is_active=False)
+        )
+        assert len(model_service.get_models_by_provider(db_session, provider_id)) == 3
+        
+        db_session.commit()
+        assert len(model_service.get_models_by_provider(db_session, provider_id)) == 3
+
+    def test_get_models_by_provider_refreshed_after_delete(
+        self, db_session, model_service, sample_models
+    ):
+        """Test mutations through the service invalidate the cache."""
+        provider_id = sample_models[0].provider_id
+        model_service.get_models_by_provider(db_session, provider_id)
+        
+        model_service.delete_model(db_session, sample_models[0].id)
+        
+        models = model_service.get_models_by_provider(db_session, provider_id)
+        assert sample_models[0].id not in [m.id for m in models]
+
+
 class TestProviderSplitting:
     """Tests for provider splitting algorithm."""
 
@@ -347,6 +374,28 @@ class TestProviderSplitting:
                 assert rules["gpt-4-omni"] == "gpt-4o"
 
 
+    def test_split_providers_by_duplicates_batch(
+        self, db_session, model_service, sample_models
+    ):
+        """Test splitting several providers at once, skipping unknown IDs."""
+        provider_id = sample_models[0].provider_id
+        model_service.delete_model(db_session, sample_models[2].id)
+        
+        result = model_service.split_providers_by_duplicates(
+            db_session, [provider_id, 9999]
+        )
+        
+        # Unknown provider IDs are omitted; inactive models are excluded
+        assert list(result) == [provider_id]
+        assert len(result[provider_id]) == 1
+        assert len(result[provider_id][0].models) == 2
+
+    def test_split_provider_not_found(self, db_session, model_service):
+        """Test splitting a provider that does not exist."""
+        with pytest.raises(ValueError, match="not found"):
+            model_service.split_provider_by_duplicates(db_session, 9999)
+
+
 class TestCrossProviderDuplicates:
     """Tests for cross-provider duplicate detection."""
 
@@ -403,6 +452,45 @@ class TestCrossProviderDuplicates:
         # unique-model should not be in duplicates
         assert "unique-model" not in duplicates
 
+    def test_get_cross_provider_duplicates_limited_to_providers(
+        self, db_session, model_service, encryption_service
+    ):
+        """Test that the provider filter applies before counting providers."""
+        providers = [
+            Provider(
+                name=f"Provider{i}",
+                base_url=f"https://api.provider{i}.com",
+                api_key_encrypted=encryption_service.encrypt(f"key{i}"),
+                channel_type="openai"
+            )
+            for i in range(3)
+        ]
+        db_session.add_all(providers)
+        db_session.commit()
+        
+        db_session.add_all([
+            Model(provider_id=providers[0].id, original_name="gpt-4o", is_active=True),
+            Model(provider_id=providers[1].id, original_name="gpt-4o", is_active=True),
+            Model(
+                provider_id=providers[2].id,
+                original_name="gpt4o",
+                normalized_name="gpt-4o",
+                is_active=True
+            ),
+            Model(provider_id=providers[2].id, original_name="claude-3", is_active=True),
+        ])
+        db_session.commit()
+        
+        # Only providers 0 and 2 in scope: gpt-4o still spans two providers
+        duplicates = model_service.get_cross_provider_duplicates(
+            db_session, [providers[0].id, providers[2].id]
+        )
+        assert set(duplicates) == {"gpt-4o"}
+        assert {pid for pid, _ in duplicates["gpt-4o"]} == {providers[0].id, providers[2].id}
+        
+        # A single provider in scope never yields cross-provider duplicates
+        assert model_service.get_cross_provider_duplicates(db_session, [providers[0].id]) == {}
+
 
 
 class TestBatchNormalize:
@@ -170,6 +170,43 @@ class TestModelModel:
         # Model should be deleted
         deleted_model = db_session.query(Model).filter(Model.id == model_id).first()
         assert deleted_model is None
+    
+    def test_model_effective_name(self, db_session):
+        """Test effective_name in Python and SQL falls back to original_name."""
+        provider = Provider(
+            name="TestProvider",
+            base_url="https://api.test.com",
+            api_key_encrypted="encrypted_key",
+            channel_type="openai"
+        )
+        db_session.add(provider)
+        db_session.commit()
+        
+        db_session.add_all([
+            Model(provider_id=provider.id, original_name="gpt-4o", normalized_name="gpt-4-omni"),
+            Model(provider_id=provider.id, original_name="gpt-4o-mini", normalized_name=None),
+            Model(provider_id=provider.id, original_name="claude-3", normalized_name=""),
+        ])
+        db_session.commit()
+        
+        models = db_session.query(Model).order_by(Model.id).all()
+        assert [m.effective_name for m in models] == ["gpt-4-omni", "gpt-4o-mini", "claude-3"]
+        
+        sql_names = [
+            row[0] for row in db_session.query(Model.effective_name).order_by(Model.id).all()
+        ]
+        assert sql_names == ["gpt-4-omni", "gpt-4o-mini", "claude-3"]
+
+    def test_model_updated_at_stamped_in_utc(self):
+        """Test updated_at is stamped with UTC from the database clock on every dialect."""
+        from sqlalchemy import update
+        from sqlalchemy.dialects import postgresql, sqlite
+        
+        stmt = update(Model).values(is_active=False)
+        
+        assert "TIMEZONE('utc', CURRENT_TIMESTAMP)" in str(stmt.compile(dialect=postgresql.dialect()))
+        # Sub-second, unlike SQLite's CURRENT_TIMESTAMP
+        assert "strftime('%Y-%m-%d %H:%M:%f', 'now')" in str(stmt.compile(dialect=sqlite.dialect()))
 
 
 class TestGPTLoadGroupModel:
@@ -35,32 +35,21 @@ def test_db():
     db.close()
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def encryption_service():
     """Create encryption service with test key."""
-    import os
-    import sys
-    
-    # Generate a test encryption key
-    test_key = Fernet.generate_key().decode()
-    
-    # Set environment and clear module cache
-    with patch.dict(os.environ, {
-        "ENCRYPTION_KEY": test_key,
-        "GPTLOAD_AUTH_KEY": "test-auth-key",
-        "DATABASE_URL": "sqlite:///:memory:",
-    }, clear=True):
-        # Clear any cached imports
-        if 'app.config' in sys.modules:
-            del sys.modules['app.config']
-        if 'app.services.encryption_service' in sys.modules:
-            del sys.modules['app.services.encryption_service']
-        
-        # Import after patching environment
-        from app.services.encryption_service import EncryptionService
-        
-        service = EncryptionService()
-        yield service
+    return EncryptionService(encryption_key=Fernet.generate_key().decode())
+
+
+@pytest.fixture(autouse=True)
+def clear_provider_caches():
+    """Keep module-level validation and model caches from leaking between tests."""
+    from app.services import provider_service as provider_service_module
+    provider_service_module._validation_cache.clear()
+    provider_service_module._models_cache.clear()
+    yield
+    provider_service_module._validation_cache.clear()
+    provider_service_module._models_cache.clear()
 
 
 @pytest.fixture
@@ -166,6 +155,55 @@ class TestProviderCRUD:
         assert providers[1]["api_key_masked"].startswith("sk-")
         assert "*" in providers[1]["api_key_masked"]
 
+    @pytest.mark.asyncio
+    async def test_list_providers_uses_stored_mask(self, test_db, provider_service):
+        """Test the mask is stored on add and listing does not decrypt keys."""
+        with patch.object(provider_service, 'validate_provider', return_value=True):
+            provider = await provider_service.add_provider(
+                test_db,
+                name="TestProvider",
+                base_url="https://api.test.com",
+                api_key="sk-test-key-1234567890",
+                channel_type="openai"
+            )
+        
+        assert provider.api_key_masked == "sk-***************7890"
+        
+        with patch.object(
+            provider_service.encryption_service, 'decrypt', side_effect=AssertionError
+        ):
+            providers = provider_service.list_providers(test_db)
+        
+        assert providers[0]["api_key_masked"] == "sk-***************7890"
+
+    def test_list_providers_model_count(self, test_db, provider_service, encryption_service):
+        """Test listing providers reports the number of models per provider."""
+        provider1 = Provider(
+            name="Provider1",
+            base_url="https://api.provider1.com",
+            api_key_encrypted=encryption_service.encrypt("sk-provider1-key-1234567890"),
+            channel_type="openai"
+        )
+        provider2 = Provider(
+            name="Provider2",
+            base_url="https://api.provider2.com",
+            api_key_encrypted=encryption_service.encrypt("sk-provider2-key-0987654321"),
+            channel_type="openai"
+        )
+        test_db.add_all([provider1, provider2])
+        test_db.commit()
+        
+        test_db.add_all([
+            Model(provider_id=provider1.id, original_name="gpt-4"),
+            Model(provider_id=provider1.id, original_name="gpt-4o", is_active=False),
+        ])
+        test_db.commit()
+        
+        providers = provider_service.list_providers(test_db, include_masked_keys=False)
+        
+        counts = {p["name"]: p["model_count"] for p in providers}
+        assert counts == {"Provider1": 2, "Provider2": 0}
+
     def test_get_provider(self, test_db, provider_service, encryption_service):
         """Test getting a provider by ID."""
         # Add provider
@@ -236,6 +274,61 @@ class TestProviderCRUD:
             assert updated.name == "UpdatedProvider"
             assert updated.base_url == "https://api.updated.com"
 
+    @pytest.mark.asyncio
+    async def test_update_provider_skips_validation_for_unchanged_credentials(
+        self, test_db, provider_service, encryption_service
+    ):
+        """Test resubmitting the stored credentials does not revalidate them."""
+        provider = Provider(
+            name="TestProvider",
+            base_url="https://api.test.com",
+            api_key_encrypted=encryption_service.encrypt("sk-test-key"),
+            channel_type="openai"
+        )
+        test_db.add(provider)
+        test_db.commit()
+        encrypted_key = provider.api_key_encrypted
+        
+        with patch.object(provider_service, 'validate_provider', new=AsyncMock()) as mock_validate:
+            updated = await provider_service.update_provider(
+                test_db,
+                provider.id,
+                name="RenamedProvider",
+                base_url="https://api.test.com",
+                api_key="sk-test-key"
+            )
+        
+        mock_validate.assert_not_awaited()
+        assert updated.name == "RenamedProvider"
+        assert updated.api_key_encrypted == encrypted_key
+
+    @pytest.mark.asyncio
+    async def test_update_provider_validates_channel_type_change(
+        self, test_db, provider_service, encryption_service
+    ):
+        """Test switching channel type revalidates with the stored credentials."""
+        provider = Provider(
+            name="TestProvider",
+            base_url="https://api.test.com",
+            api_key_encrypted=encryption_service.encrypt("sk-test-key"),
+            channel_type="openai"
+        )
+        test_db.add(provider)
+        test_db.commit()
+        
+        with patch.object(
+            provider_service, 'validate_provider', new=AsyncMock(return_value=True)
+        ) as mock_validate:
+            updated = await provider_service.update_provider(
+                test_db,
+                provider.id,
+                base_url="https://api.test.com",
+                channel_type="anthropic"
+            )
+        
+        mock_validate.assert_awaited_once_with("https://api.test.com", "sk-test-key", "anthropic")
+        assert updated.channel_type == "anthropic"
+
     @pytest.mark.asyncio
     async def test_update_provider_not_found(self, test_db, provider_service):
         """Test updating a non-existent provider."""
@@ -313,8 +406,8 @@ class TestProviderValidation:
         mock_response = MagicMock()
         mock_response.status_code = 200
         
-        with patch('httpx.AsyncClient') as mock_client:
-            mock_client.return_value.__aenter__.return_value.get = AsyncMock(return_value=mock_response)
+        with patch('app.services.provider_service.get_http_client') as mock_client:
+            mock_client.return_value.get = AsyncMock(return_value=mock_response)
             
             result = await provider_service.validate_provider(
                 "https://api.test.com",
@@ -324,13 +417,28 @@ class TestProviderValidation:
             
             assert result is True
 
+    @pytest.mark.asyncio
+    async def test_validate_provider_uses_cache(self, provider_service):
+        """Test repeated validations of the same credentials skip the request."""
+        mock_response = MagicMock()
+        mock_response.status_code = 401
+        
+        with patch('app.services.provider_service.get_http_client') as mock_client:
+            mock_client.return_value.get = AsyncMock(return_value=mock_response)
+            
+            assert await provider_service.validate_provider("https://api.test.com", "sk-test-key")
+            assert await provider_service.validate_provider("https://api.test.com/", "sk-test-key")
+            assert await provider_service.validate_provider("https://api.test.com", "sk-other-key")
+            
+            assert mock_client.return_value.get.await_count == 2
+
     @pytest.mark.asyncio
     async def test_validate_provider_timeout(self, provider_service):
         """Test provider validation with timeout."""
         import httpx
         
-        with patch('httpx.AsyncClient') as mock_client:
-            mock_client.return_value.__aenter__.return_value.get = AsyncMock(
+        with patch('app.services.provider_service.get_http_client') as mock_client:
+            mock_client.return_value.get = AsyncMock(
                 side_effect=httpx.TimeoutException("Timeout")
             )
             
@@ -347,8 +455,8 @@ class TestProviderValidation:
         """Test provider validation with request error."""
         import httpx
         
-        with patch('httpx.AsyncClient') as mock_client:
-            mock_client.return_value.__aenter__.return_value.get = AsyncMock(
+        with patch('app.services.provider_service.get_http_client') as mock_client:
+            mock_client.return_value.get = AsyncMock(
                 side_effect=httpx.RequestError("Connection failed")
             )
             
@@ -361,6 +469,44 @@ class TestProviderValidation:
             assert result is False
 
 
+    @pytest.mark.asyncio
+    async def test_validate_provider_uses_channel_adapter_path(self, provider_service):
+        """Test the models URL comes from the channel adapter table."""
+        mock_response = MagicMock()
+        mock_response.status_code = 401
+        
+        with patch('app.services.provider_service.get_http_client') as mock_client:
+            mock_client.return_value.get = AsyncMock(return_value=mock_response)
+            
+            for channel_type in ("openai", "anthropic", "unknown"):
+                await provider_service.validate_provider(
+                    "https://api.test.com/",
+                    "sk-test-key",
+                    channel_type
+                )
+            
+            urls = [call.args[0] for call in mock_client.return_value.get.call_args_list]
+            assert urls == ["https://api.test.com/v1/models"] * 3
+
+
+    @pytest.mark.asyncio
+    async def test_validate_providers_bulk(self, provider_service):
+        """Test bulk validation keeps input order and treats errors as failures."""
+        async def fake_validate(base_url, api_key, channel_type):
+            if base_url.endswith("error.com"):
+                raise RuntimeError("boom")
+            return base_url.endswith("ok.com")
+        
+        with patch.object(provider_service, 'validate_provider', side_effect=fake_validate):
+            results = await provider_service.validate_providers_bulk([
+                {"base_url": "https://api.ok.com", "api_key": "k1"},
+                {"base_url": "https://api.bad.com", "api_key": "k2"},
+                {"base_url": "https://api.error.com", "api_key": "k3", "channel_type": "anthropic"},
+            ], concurrency=2)
+        
+        assert results == [True, False, False]
+
+
 class TestModelFetching:
     """Test model fetching from providers."""
 
@@ -388,8 +534,8 @@ class TestModelFetching:
             ]
         }
         
-        with patch('httpx.AsyncClient') as mock_client:
-            mock_client.return_value.__aenter__.return_value.get = AsyncMock(return_value=mock_response)
+        with patch('app.services.provider_service.get_http_client') as mock_client:
+            mock_client.return_value.get = AsyncMock(return_value=mock_response)
             
             models = await provider_service.fetch_models(test_db, provider.id)
             
@@ -402,6 +548,70 @@ class TestModelFetching:
             test_db.refresh(provider)
             assert provider.last_fetched_at is not None
 
+    @pytest.mark.asyncio
+    async def test_fetch_models_reuses_validation_response(
+        self, test_db, provider_service, encryption_service
+    ):
+        """Test fetch right after validation reuses the validated model list."""
+        from app.services import provider_service as provider_service_module
+        provider_service_module._models_cache.clear()
+        
+        provider = Provider(
+            name="TestProvider",
+            base_url="https://api.cached.com/",
+            api_key_encrypted=encryption_service.encrypt("sk-cached-key"),
+            channel_type="openai"
+        )
+        test_db.add(provider)
+        test_db.commit()
+        
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"data": [{"id": "gpt-4"}, {"id": "gpt-4o"}]}
+        
+        with patch('app.services.provider_service.get_http_client') as mock_client:
+            mock_client.return_value.get = AsyncMock(return_value=mock_response)
+            
+            assert await provider_service.validate_provider(
+                "https://api.cached.com", "sk-cached-key", "openai"
+            ) is True
+            models = await provider_service.fetch_models(test_db, provider.id)
+            
+            assert [m.original_name for m in models] == ["gpt-4", "gpt-4o"]
+            assert mock_client.return_value.get.await_count == 1
+            
+            # The cached list is consumed, so the next fetch hits the API again
+            await provider_service.fetch_models(test_db, provider.id)
+            assert mock_client.return_value.get.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_fetch_models_ignores_repeated_names(
+        self, test_db, provider_service, encryption_service
+    ):
+        """Test a model listed twice by the API is stored once."""
+        provider = Provider(
+            name="TestProvider",
+            base_url="https://api.test.com",
+            api_key_encrypted=encryption_service.encrypt("sk-test-key"),
+            channel_type="openai"
+        )
+        test_db.add(provider)
+        test_db.commit()
+        
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {
+            "data": [{"id": "gpt-4"}, {"id": "gpt-4o"}, {"id": "gpt-4"}]
+        }
+        
+        with patch('app.services.provider_service.get_http_client') as mock_client:
+            mock_client.return_value.get = AsyncMock(return_value=mock_response)
+            
+            models = await provider_service.fetch_models(test_db, provider.id)
+            
+            assert [m.original_name for m in models] == ["gpt-4", "gpt-4o"]
+            assert test_db.query(Model).filter(Model.provider_id == provider.id).count() == 2
+
     @pytest.mark.asyncio
     async def test_fetch_models_empty_list(self, test_db, provider_service, encryption_service):
         """Test fetching models with empty response."""
@@ -420,8 +630,8 @@ class TestModelFetching:
         mock_response.status_code = 200
         mock_response.json.return_value = {"data": []}
         
-        with patch('httpx.AsyncClient') as mock_client:
-            mock_client.return_value.__aenter__.return_value.get = AsyncMock(return_value=mock_response)
+        with patch('app.services.provider_service.get_http_client') as mock_client:
+            mock_client.return_value.get = AsyncMock(return_value=mock_response)
             
             models = await provider_service.fetch_models(test_db, provider.id)
             
@@ -458,6 +668,7 @@ class TestModelFetching:
         )
         test_db.add(existing_model)
         test_db.commit()
+        stamped_at = existing_model.updated_at
         
         # Mock API response
         mock_response = MagicMock()
@@ -469,13 +680,145 @@ class TestModelFetching:
             ]
         }
         
-        with patch('httpx.AsyncClient') as mock_client:
-            mock_client.return_value.__aenter__.return_value.get = AsyncMock(return_value=mock_response)
+        with patch('app.services.provider_service.get_http_client') as mock_client:
+            mock_client.return_value.get = AsyncMock(return_value=mock_response)
             
             models = await provider_service.fetch_models(test_db, provider.id)
             
             assert len(models) == 2
+            assert [m.original_name for m in models] == ["gpt-4", "gpt-3.5-turbo"]
+            assert models[0].id == existing_model.id
+            assert models[1].id is not None
+            
+            # Every row touched by the sync is stamped by the database clock
+            assert models[0].updated_at != stamped_at
+            assert models[1].updated_at is not None
             
             # Verify existing model is reactivated
             test_db.refresh(existing_model)
             assert existing_model.is_active is True
+
+    @pytest.mark.asyncio
+    async def test_fetch_models_bulk(self, test_db, provider_service, encryption_service):
+        """Test fetching models for several providers with one commit."""
+        ok_provider = Provider(
+            name="OkProvider",
+            base_url="https://api.ok.com",
+            api_key_encrypted=encryption_service.encrypt("sk-ok-key"),
+            channel_type="openai"
+        )
+        failing_provider = Provider(
+            name="FailingProvider",
+            base_url="https://api.failing.com",
+            api_key_encrypted=encryption_service.encrypt("sk-failing-key"),
+            channel_type="openai"
+        )
+        test_db.add_all([ok_provider, failing_provider])
+        test_db.commit()
+        
+        async def fake_fetch(base_url, api_key, channel_type):
+            if "failing" in base_url:
+                raise RuntimeError("upstream error")
+            return ["gpt-4", "gpt-4o"]
+        
+        with patch.object(provider_service, '_fetch_models_from_api', side_effect=fake_fetch):
+            result = await provider_service.fetch_models_bulk(
+                test_db, [ok_provider.id, failing_provider.id, 999]
+            )
+        
+        assert [m.original_name for m in result["models"][ok_provider.id]] == ["gpt-4", "gpt-4o"]
+        assert set(result["errors"]) == {failing_provider.id, 999}
+        assert test_db.query(Model).filter(Model.provider_id == ok_provider.id).count() == 2
+        assert test_db.query(Model).filter(Model.provider_id == failing_provider.id).count() == 0
+
+    @pytest.mark.asyncio
+    async def test_fetch_models_bulk_rolls_back_failed_store(self, test_db, provider_service, encryption_service):
+        """Test a constraint violation while storing models leaves the session usable."""
+        from sqlalchemy.exc import IntegrityError
+        
+        provider = Provider(
+            name="TestProvider",
+            base_url="https://api.test.com",
+            api_key_encrypted=encryption_service.encrypt("sk-test-key"),
+            channel_type="openai"
+        )
+        test_db.add(provider)
+        test_db.commit()
+        
+        # As if a concurrent fetch inserted the same model first
+        def conflicting_store(db, provider, models_data):
+            db.add_all([
+                Model(provider_id=provider.id, original_name=name)
+                for name in models_data * 2
+            ])
+            db.flush()
+        
+        with patch.object(provider_service, '_fetch_models_from_api', AsyncMock(return_value=["gpt-4"])), \
+                patch.object(provider_service, '_store_models', side_effect=conflicting_store):
+            with pytest.raises(IntegrityError):
+                await provider_service.fetch_models_bulk(test_db, [provider.id])
+        
+        assert test_db.query(Model).count() == 0
+
+    @pytest.mark.asyncio
+    async def test_fetch_models_from_api_drops_metadata(self, provider_service):
+        """Test model metadata is discarded while decoding the response."""
+        import httpx
+        
+        body = (
+            b'{"object": "list", "data": ['
+            b'{"id": "gpt-4", "owned_by": "openai", "permission": [{"id": "perm-1"}]},'
+            b'{"id": "gpt-4o", "created": 1700000000}]}'
+        )
+        response = httpx.Response(
+            200, content=body, request=httpx.Request("GET", "https://api.test.com/v1/models")
+        )
+        
+        with patch('app.services.provider_service.get_http_client') as mock_client:
+            mock_client.return_value.get = AsyncMock(return_value=response)
+            
+            models = await provider_service._fetch_models_from_api(
+                "https://api.test.com", "sk-test-key", "openai"
+            )
+        
+        assert models == ["gpt-4", "gpt-4o"]
+
+    @pytest.mark.asyncio
+    async def test_fetch_models_from_api_retries_rate_limit(self, provider_service):
+        """Test 429 responses are retried after the Retry-After delay."""
+        import httpx
+        
+        request = httpx.Request("GET", "https://api.test.com/v1/models")
+        rate_limited = httpx.Response(429, headers={"Retry-After": "1.5"}, request=request)
+        ok = httpx.Response(200, json={"data": [{"id": "gpt-4"}]}, request=request)
+        
+        with patch('app.services.provider_service.get_http_client') as mock_client, \
+             patch('app.services.provider_service.asyncio.sleep', new=AsyncMock()) as mock_sleep:
+            mock_client.return_value.get = AsyncMock(side_effect=[rate_limited, ok])
+            
+            models = await provider_service._fetch_models_from_api(
+                "https://api.test.com", "sk-test-key", "openai"
+            )
+        
+        assert models == ["gpt-4"]
+        mock_sleep.assert_awaited_once_with(1.5)
+
+    @pytest.mark.asyncio
+    async def test_fetch_models_from_api_gives_up_after_retries(self, provider_service):
+        """Test persistent 5xx responses raise once the attempts are used up."""
+        import httpx
+        
+        request = httpx.Request("GET", "https://api.test.com/v1/models")
+        unavailable = httpx.Response(503, request=request)
+        
+        with patch('app.services.provider_service.get_http_client') as mock_client, \
+             patch('app.services.provider_service.asyncio.sleep', new=AsyncMock()) as mock_sleep:
+            mock_client.return_value.get = AsyncMock(return_value=unavailable)
+            
+            with pytest.raises(httpx.HTTPStatusError):
+                await provider_service._fetch_models_from_api(
+                    "https://api.test.com", "sk-test-key", "openai"
+                )
+        
+        assert mock_client.return_value.get.await_count == 3
+        assert [c.args[0] for c in mock_sleep.await_args_list] == [1.0, 2.0]
@@ -1,5 +1,6 @@
 """Tests for sync service."""
 
+import asyncio
 import pytest
 from datetime import datetime
 from unittest.mock import AsyncMock, MagicMock, patch, PropertyMock
@@ -67,18 +68,95 @@ class TestSyncConfiguration:
     """Tests for sync_configuration method."""
 
     @pytest.mark.asyncio
-    async def test_concurrent_sync_prevention(self, sync_service):
+    async def test_concurrent_sync_prevention(self, sync_service, mock_db):
         """Test that concurrent syncs are prevented."""
         # Acquire the lock manually
-        await sync_service._sync_lock.acquire()
-        
-        try:
+        with sync_service._acquire_sync_lock(mock_db):
             # Try to start sync - should raise RuntimeError
             with pytest.raises(RuntimeError, match="already in progress"):
-                await sync_service.sync_configuration(MagicMock())
-        finally:
-            # Release the lock
-            sync_service._sync_lock.release()
+                await sync_service.sync_configuration(mock_db)
+        
+        assert not sync_service.is_sync_in_progress()
+
+    def test_sync_lock_is_per_database(self, sync_service):
+        """Test a sync on one database does not block a sync on another."""
+        db_a = MagicMock(spec=Session)
+        db_a.get_bind.return_value.url = "sqlite:///a.db"
+        db_b = MagicMock(spec=Session)
+        db_b.get_bind.return_value.url = "sqlite:///b.db"
+        
+        with sync_service._acquire_sync_lock(db_a):
+            with sync_service._acquire_sync_lock(db_b):
+                assert sync_service.is_sync_in_progress(db_a)
+                assert sync_service.is_sync_in_progress(db_b)
+            assert not sync_service.is_sync_in_progress(db_b)
+            
+            with pytest.raises(RuntimeError, match="already in progress"):
+                with sync_service._acquire_sync_lock(db_a):
+                    pass
+        
+        assert not sync_service.is_sync_in_progress()
+
+    @pytest.mark.asyncio
+    async def test_simultaneous_syncs_second_fails_fast(self, sync_service, mock_db):
+        """Test two syncs started together: one runs, the other raises instead of waiting."""
+        mock_db.expire_on_commit = True
+        started = asyncio.Event()
+        release = asyncio.Event()
+        
+        async def slow_generation(*args, **kwargs):
+            started.set()
+            await release.wait()
+            return {"standard_groups": [], "aggregate_groups": [], "errors": []}
+        
+        sync_service.config_generator.generate_gptload_configuration = slow_generation
+        sync_service.config_generator.generate_uniapi_yaml_with_count.return_value = ("providers: []\n", 0)
+        
+        first = asyncio.create_task(sync_service.sync_configuration(mock_db))
+        await asyncio.wait_for(started.wait(), timeout=5)
+        
+        with pytest.raises(RuntimeError, match="already in progress"):
+            await sync_service.sync_configuration(mock_db)
+        assert sync_service.is_sync_in_progress()
+        
+        release.set()
+        await asyncio.wait_for(first, timeout=5)
+        assert not sync_service.is_sync_in_progress()
+
+
+    @pytest.mark.asyncio
+    async def test_sync_rejected_when_advisory_lock_held(self, sync_service, mock_db):
+        """Test a sync fails fast when another worker holds the PostgreSQL lock."""
+        engine = mock_db.get_bind.return_value
+        engine.dialect.name = "postgresql"
+        conn = engine.connect.return_value.execution_options.return_value.__enter__.return_value
+        conn.execute.return_value.scalar.return_value = False
+        
+        with pytest.raises(RuntimeError, match="already in progress"):
+            await sync_service.sync_configuration(mock_db)
+        
+        mock_db.add.assert_not_called()
+        assert not sync_service.is_sync_in_progress()
+
+    def test_advisory_lock_released(self, sync_service, mock_db):
+        """Test the PostgreSQL advisory lock is released after the sync body."""
+        engine = mock_db.get_bind.return_value
+        engine.dialect.name = "postgresql"
+        conn = engine.connect.return_value.execution_options.return_value.__enter__.return_value
+        conn.execute.return_value.scalar.return_value = True
+        
+        with sync_service._database_sync_lock(mock_db):
+            assert conn.execute.call_count == 1
+        
+        # Held without an open transaction on the dedicated connection
+        engine.connect.return_value.execution_options.assert_called_once_with(
+            isolation_level="AUTOCOMMIT"
+        )
+        statements = [str(call.args[0]) for call in conn.execute.call_args_list]
+        assert statements == [
+            "SELECT pg_try_advisory_lock(:key)",
+            "SELECT pg_advisory_unlock(:key)"
+        ]
 
 
 class TestSyncStatus:
@@ -92,7 +170,8 @@ class TestSyncStatus:
     def test_get_sync_status_with_sync(self, sync_service, mock_db):
         """Test getting status when sync is in progress."""
         # Set current sync ID
-        sync_service._current_sync_id = 1
+        key = sync_service._sync_key(mock_db)
+        SyncService._current_syncs[key] = {"sync_id": 1}
         
         # Mock sync record
         mock_sync_record = create_mock_sync_record(id=1, status="in_progress")
@@ -100,7 +179,10 @@ class TestSyncStatus:
         mock_db.query.return_value.filter.return_value.first.return_value = mock_sync_record
         
         # Get status
-        result = sync_service.get_sync_status(mock_db)
+        try:
+            result = sync_service.get_sync_status(mock_db)
+        finally:
+            SyncService._current_syncs.pop(key)
         
         # Verify result
         assert result is not None
@@ -140,7 +222,7 @@ class TestSyncHistory:
         """Test getting a specific sync record."""
         # Mock sync record
         mock_record = create_mock_sync_record(id=1, status="success")
-        mock_db.query.return_value.filter.return_value.first.return_value = mock_record
+        mock_db.get.return_value = mock_record
         
         # Get record
         result = sync_service.get_sync_record(mock_db, 1)
@@ -152,7 +234,7 @@ class TestSyncHistory:
 
     def test_get_sync_record_not_found(self, sync_service, mock_db):
         """Test getting a non-existent sync record."""
-        mock_db.query.return_value.filter.return_value.first.return_value = None
+        mock_db.get.return_value = None
         
         # Get record
         result = sync_service.get_sync_record(mock_db, 999)
@@ -170,7 +252,7 @@ class TestRetrySync:
         # Mock successful sync record
         success_sync = create_mock_sync_record(id=1, status="success")
         
-        mock_db.query.return_value.filter.return_value.first.return_value = success_sync
+        mock_db.get.return_value = success_sync
         
         # Try to retry - should raise ValueError
         with pytest.raises(ValueError, match="not in failed status"):
@@ -179,7 +261,7 @@ class TestRetrySync:
     @pytest.mark.asyncio
     async def test_retry_nonexistent_sync_raises_error(self, sync_service, mock_db):
         """Test that retrying a non-existent sync raises an error."""
-        mock_db.query.return_value.filter.return_value.first.return_value = None
+        mock_db.get.return_value = None
         
         # Try to retry - should raise ValueError
         with pytest.raises(ValueError, match="not found"):
@@ -196,9 +278,9 @@ class TestBuildChangesSummary:
             "aggregate_groups": [{"id": 3}],
             "errors": []
         }
-        yaml_content = "providers:\n  - provider: test1\n  - provider: test2\n"
+        yaml_provider_count = 2
         
-        summary = sync_service._build_changes_summary(gptload_result, yaml_content)
+        summary = sync_service._build_changes_summary(gptload_result, yaml_provider_count)
         
         assert "2 standard groups" in summary
         assert "1 aggregate groups" in summary
@@ -211,11 +293,72 @@ class TestBuildChangesSummary:
             "aggregate_groups": [],
             "errors": ["Error 1", "Error 2"]
         }
-        yaml_content = "providers:\n  - provider: test\n"
+        yaml_provider_count = 1
         
-        summary = sync_service._build_changes_summary(gptload_result, yaml_content)
+        summary = sync_service._build_changes_summary(gptload_result, yaml_provider_count)
         
         assert "1 standard groups" in summary
         assert "2 errors" in summary
         assert "1 provider entries" in summary
+    
+    def test_build_incremental_changes_summary(self, sync_service):
+        """Test the incremental summary names the first three groups of each change."""
+        gptload_result = {
+            "standard_groups_created": [{"name": f"group-{i}"} for i in range(5)],
+            "standard_groups_updated": [{"name": "updated"}],
+            "aggregate_groups_created": [{}],
+            "aggregate_groups_deleted": [{"reason": "orphaned"}, {"reason": "orphaned"}],
+            "errors": ["first error", "second error"]
+        }
+        yaml_provider_count = 1
+        
+        summary = sync_service._build_incremental_changes_summary(gptload_result, yaml_provider_count)
+        
+        assert summary == (
+            "Created 5 standard groups: group-0, group-1, group-2 and 2 more; "
+            "Updated 1 standard groups: updated; "
+            "Created 1 aggregate groups: unknown; "
+            "Deleted 2 aggregate groups (2 orphaned); "
+            "2 errors: first error and 1 more; "
+            "uni-api: 1 provider entries"
+        )
+    
+    def test_build_incremental_changes_summary_uses_change_summary(self, sync_service):
+        """Test a pre-aggregated change_summary is used without the group lists."""
+        from app.services.config_generator import summarize_incremental_changes
+        
+        change_summary = summarize_incremental_changes({
+            "standard_groups_created": [{"name": f"group-{i}"} for i in range(5)],
+            "aggregate_groups_deleted": [{"reason": "cascade"}],
+            "errors": []
+        })
+        
+        summary = sync_service._build_incremental_changes_summary(
+            {"change_summary": change_summary}, 0
+        )
+        
+        assert summary == (
+            "Created 5 standard groups: group-0, group-1, group-2 and 2 more; "
+            "Deleted 1 aggregate groups (1 cascade); "
+            "uni-api: 0 provider entries"
+        )
+    
+    def test_build_changes_summary_with_export_error(self, sync_service):
+        """Test the full summary text when errors occurred and the export failed."""
+        gptload_result = {
+            "standard_groups": [{"id": 1}],
+            "aggregate_groups": [],
+            "errors": ["Error 1"]
+        }
+        yaml_provider_count = 1
+        
+        summary = sync_service._build_changes_summary(
+            gptload_result, yaml_provider_count, yaml_export_error="Permission denied"
+        )
+        
+        assert summary == (
+            "GPT-Load: 1 standard groups, 0 aggregate groups created; "
+            "1 errors encountered; "
+            "uni-api: 1 provider entries generated (export failed: Permission denied)"
+        )
 
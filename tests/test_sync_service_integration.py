@@ -2,9 +2,10 @@
 
 import pytest
 from datetime import datetime
-from unittest.mock import MagicMock
-from sqlalchemy import create_engine
+from unittest.mock import AsyncMock, MagicMock, patch
+from sqlalchemy import create_engine, inspect
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 
 from app.database.database import Base
 from app.models.sync_record import SyncRecord
@@ -14,7 +15,13 @@ from app.services.sync_service import SyncService
 @pytest.fixture
 def test_db():
     """Create a test database."""
-    engine = create_engine("sqlite:///:memory:")
+    # Same thread settings as the app engine: the sync service hands the
+    # session to worker threads
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
     Base.metadata.create_all(engine)
     SessionLocal = sessionmaker(bind=engine)
     db = SessionLocal()
@@ -49,6 +56,24 @@ class TestSyncServiceIntegration:
         status = sync_service.get_sync_status(test_db)
         assert status is None
 
+    def test_get_sync_status_in_progress(self, sync_service, test_db):
+        """Test getting status of a sync that is running."""
+        sync_record = SyncRecord(status="in_progress", started_at=datetime.utcnow())
+        test_db.add(sync_record)
+        test_db.commit()
+        key = sync_service._sync_key(test_db)
+        SyncService._current_syncs[key] = {"sync_id": sync_record.id}
+        
+        try:
+            status = sync_service.get_sync_status(test_db)
+        finally:
+            SyncService._current_syncs.pop(key)
+        
+        assert status["sync_id"] == sync_record.id
+        assert status["status"] == "in_progress"
+        assert status["started_at"] == sync_record.started_at.isoformat()
+        assert status["duration_seconds"] >= 0
+
     def test_is_sync_in_progress_initially_false(self, sync_service):
         """Test that initially no sync is in progress."""
         assert not sync_service.is_sync_in_progress()
@@ -89,7 +114,54 @@ class TestSyncServiceIntegration:
         # Should be ordered by most recent first
         assert history[0].changes_summary == "Sync 2"
 
-    def test_get_specific_sync_record(self, sync_service, test_db):
+    def test_get_sync_history_keyset_pagination(self, sync_service, test_db):
+        """Test paging through history with a started_at cursor."""
+        from datetime import timedelta
+        
+        base = datetime(2024, 1, 1)
+        for i in range(5):
+            test_db.add(SyncRecord(
+                status="success",
+                started_at=base + timedelta(minutes=i),
+                changes_summary=f"Sync {i}"
+            ))
+        test_db.commit()
+        
+        first_page = sync_service.get_sync_history(test_db, limit=2)
+        second_page = sync_service.get_sync_history(
+            test_db, limit=2, before=first_page[-1].started_at
+        )
+        
+        assert [r.changes_summary for r in first_page] == ["Sync 4", "Sync 3"]
+        assert [r.changes_summary for r in second_page] == ["Sync 2", "Sync 1"]
+        
+        # The cursor replaces the offset rather than adding to it
+        assert sync_service.get_sync_history(
+            test_db, limit=2, offset=2, before=first_page[-1].started_at
+        ) == second_page
+
+    def test_get_sync_history_keyset_pagination_with_equal_timestamps(self, sync_service, test_db):
+        """Test the (started_at, id) cursor does not skip records started in the same second."""
+        started_at = datetime(2024, 1, 1)
+        for i in range(5):
+            test_db.add(SyncRecord(
+                status="success",
+                started_at=started_at,
+                changes_summary=f"Sync {i}"
+            ))
+        test_db.commit()
+        
+        pages = [sync_service.get_sync_history(test_db, limit=2)]
+        while pages[-1]:
+            last = pages[-1][-1]
+            pages.append(sync_service.get_sync_history(
+                test_db, limit=2, before=last.started_at, before_id=last.id
+            ))
+        
+        summaries = [r.changes_summary for page in pages for r in page]
+        assert summaries == ["Sync 4", "Sync 3", "Sync 2", "Sync 1", "Sync 0"]
+
+    def test_get_specific_sync_record(self, sync_service, test_db, record_statements):
         """Test getting a specific sync record."""
         # Create a sync record
         sync_record = SyncRecord(
@@ -109,6 +181,11 @@ class TestSyncServiceIntegration:
         assert retrieved.id == sync_record.id
         assert retrieved.status == "success"
         assert retrieved.changes_summary == "Test sync"
+        
+        # A record already in the session is returned without a query
+        with record_statements(test_db) as statements:
+            assert sync_service.get_sync_record(test_db, sync_record.id) is retrieved
+        assert statements == []
 
     def test_build_changes_summary(self, sync_service):
         """Test building changes summary."""
@@ -117,9 +194,9 @@ class TestSyncServiceIntegration:
             "aggregate_groups": [{"id": 3}],
             "errors": []
         }
-        yaml_content = "providers:\n  - provider: test1\n  - provider: test2\n"
+        yaml_provider_count = 2
         
-        summary = sync_service._build_changes_summary(gptload_result, yaml_content)
+        summary = sync_service._build_changes_summary(gptload_result, yaml_provider_count)
         
         assert "2 standard groups" in summary
         assert "1 aggregate groups" in summary
@@ -132,11 +209,294 @@ class TestSyncServiceIntegration:
             "aggregate_groups": [],
             "errors": ["Error 1", "Error 2"]
         }
-        yaml_content = "providers:\n  - provider: test\n"
+        yaml_provider_count = 1
         
-        summary = sync_service._build_changes_summary(gptload_result, yaml_content)
+        summary = sync_service._build_changes_summary(gptload_result, yaml_provider_count)
         
         assert "1 standard groups" in summary
         assert "2 errors" in summary
         assert "1 provider entries" in summary
 
+
+    @pytest.mark.asyncio
+    async def test_sync_configuration_commits_record_then_export(self, sync_service, test_db, tmp_path):
+        """Test a successful sync commits its terminal state, then the export status."""
+        sync_service.config_generator.generate_gptload_configuration = AsyncMock(
+            return_value={"standard_groups": [{"id": 1}], "aggregate_groups": [], "errors": []}
+        )
+        sync_service.config_generator.generate_uniapi_yaml_with_count.return_value = ("providers:\n  - provider: test\n", 1)
+        
+        commits = []
+        original_commit = test_db.commit
+        test_db.commit = lambda: commits.append(1) or original_commit()
+        
+        record = await sync_service.sync_configuration(
+            test_db, export_yaml_path=str(tmp_path / "api.yaml")
+        )
+        
+        assert len(commits) == 2
+        assert record.export_status == "success"
+        assert record.config_fingerprint is not None
+        # The commits do not expire the record, and the terminal UPDATE
+        # returns the database-set completed_at
+        assert inspect(record).expired_attributes == set()
+        assert record.changes_summary.startswith("GPT-Load: 1 standard groups")
+        assert record.completed_at >= record.started_at
+        assert test_db.expire_on_commit is True
+        assert record.status == "success"
+        assert sync_service.get_sync_record(test_db, record.id).status == "success"
+
+    @pytest.mark.asyncio
+    async def test_export_runs_after_sync_lock_is_released(self, sync_service, test_db, tmp_path):
+        """Test the YAML is written once the sync no longer holds its lock."""
+        sync_service.config_generator.generate_gptload_configuration = AsyncMock(
+            return_value={"standard_groups": [{"id": 1}], "aggregate_groups": [], "errors": []}
+        )
+        sync_service.config_generator.generate_uniapi_yaml_with_count.return_value = ("providers:\n", 0)
+        observed = {}
+        
+        def write(path, content):
+            observed["in_progress"] = sync_service.is_sync_in_progress(test_db)
+            observed["status"] = test_db.query(SyncRecord.status).order_by(SyncRecord.id.desc()).scalar()
+        
+        sync_service.config_generator.write_uniapi_yaml.side_effect = write
+        
+        record = await sync_service.sync_configuration(
+            test_db, export_yaml_path=str(tmp_path / "api.yaml")
+        )
+        
+        assert observed == {"in_progress": False, "status": "success"}
+        assert record.export_status == "success"
+
+    @pytest.mark.asyncio
+    async def test_failed_export_is_recorded(self, sync_service, test_db, tmp_path):
+        """Test a failed export keeps the sync successful but records the failure."""
+        sync_service.config_generator.generate_gptload_configuration = AsyncMock(
+            return_value={"standard_groups": [{"id": 1}], "aggregate_groups": [], "errors": []}
+        )
+        sync_service.config_generator.generate_uniapi_yaml_with_count.return_value = ("providers:\n", 0)
+        sync_service.config_generator.write_uniapi_yaml.side_effect = IOError("Permission denied")
+        
+        record = await sync_service.sync_configuration(
+            test_db, export_yaml_path=str(tmp_path / "api.yaml")
+        )
+        
+        stored = sync_service.get_sync_record(test_db, record.id)
+        assert stored.status == "success"
+        assert stored.export_status == "failed"
+        assert "export failed: Permission denied" in stored.changes_summary
+        # Without the export the next sync must not be skipped
+        assert stored.config_fingerprint is None
+
+    def test_older_export_does_not_overwrite_newer(self, sync_service, tmp_path):
+        """Test an export generated earlier is skipped once a later one was written."""
+        path = str(tmp_path / "api.yaml")
+        older = next(SyncService._export_generations)
+        newer = next(SyncService._export_generations)
+        
+        assert sync_service._write_export(path, "new", newer)
+        assert not sync_service._write_export(path, "old", older)
+        
+        sync_service.config_generator.write_uniapi_yaml.assert_called_once_with(path, "new")
+
+    @pytest.mark.asyncio
+    async def test_sync_configuration_without_commit(self, sync_service, test_db, tmp_path):
+        """Test do_commit=False leaves the transaction to the caller."""
+        sync_service.config_generator.generate_gptload_configuration = AsyncMock(
+            side_effect=RuntimeError("GPT-Load unreachable")
+        )
+        
+        record = await sync_service.sync_configuration(
+            test_db, export_yaml_path=str(tmp_path / "api.yaml"), do_commit=False
+        )
+        
+        assert record.status == "failed"
+        assert record.error_message == "GPT-Load unreachable"
+        
+        test_db.rollback()
+        assert sync_service.get_sync_history(test_db) == []
+
+    @pytest.mark.asyncio
+    async def test_sync_configuration_without_commit_success(self, sync_service, test_db, tmp_path):
+        """Test do_commit=False only leaves the terminal write uncommitted."""
+        async def generate(db, provider_ids):
+            # The real generator commits its group changes mid-sync
+            db.commit()
+            return {"standard_groups": [{"id": 1}], "aggregate_groups": [], "errors": []}
+        
+        sync_service.config_generator.generate_gptload_configuration = generate
+        sync_service.config_generator.generate_uniapi_yaml_with_count.return_value = ("providers:\n", 0)
+        
+        record = await sync_service.sync_configuration(
+            test_db, export_yaml_path=str(tmp_path / "api.yaml"), do_commit=False
+        )
+        assert record.status == "success"
+        record_id = record.id
+        
+        # The in-progress record was committed by the generator; the terminal
+        # state was not
+        test_db.rollback()
+        assert sync_service.get_sync_record(test_db, record_id).status == "in_progress"
+
+    @pytest.mark.asyncio
+    async def test_get_sync_status_from_memory_during_sync(self, sync_service, test_db, tmp_path):
+        """Test another service instance sees the running sync without a database."""
+        observed = {}
+        
+        async def generate(db, provider_ids):
+            other = SyncService(MagicMock(), MagicMock(), MagicMock())
+            current = SyncService._get_current_sync(db)
+            with patch("app.services.sync_service.time.monotonic",
+                       return_value=current["monotonic_start"] + 2.5):
+                observed["status"] = other.get_sync_status()
+            return {"standard_groups": [], "aggregate_groups": [], "errors": []}
+        
+        sync_service.config_generator.generate_gptload_configuration = AsyncMock(side_effect=generate)
+        sync_service.config_generator.generate_uniapi_yaml_with_count.return_value = ("providers:\n", 0)
+        
+        record = await sync_service.sync_configuration(
+            test_db, export_yaml_path=str(tmp_path / "api.yaml")
+        )
+        
+        assert observed["status"]["sync_id"] == record.id
+        assert observed["status"]["status"] == "in_progress"
+        assert observed["status"]["duration_seconds"] == 2.5
+        assert sync_service.get_sync_status() is None
+
+    @pytest.mark.asyncio
+    async def test_sync_generates_yaml_once_and_writes_it(self, sync_service, test_db, tmp_path):
+        """Test the sync exports the YAML it generated instead of generating it again."""
+        export_path = str(tmp_path / "api.yaml")
+        generator = sync_service.config_generator
+        generator.generate_gptload_configuration = AsyncMock(
+            return_value={"standard_groups": [], "aggregate_groups": [], "errors": []}
+        )
+        generator.generate_uniapi_yaml_with_count.return_value = ("providers:\n  - provider: test\n", 1)
+        
+        record = await sync_service.sync_configuration(test_db, export_yaml_path=export_path)
+        
+        assert record.status == "success"
+        generator.generate_uniapi_yaml_with_count.assert_called_once_with(test_db, existing_yaml_path=export_path)
+        generator.write_uniapi_yaml.assert_called_once_with(export_path, "providers:\n  - provider: test\n")
+        generator.export_uniapi_yaml_to_file.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_incremental_sync_skips_unchanged_configuration(self, sync_service, test_db, tmp_path):
+        """Test a repeated incremental sync is a no-op until the inputs change."""
+        from app.models.provider import Provider
+        
+        export_path = tmp_path / "api.yaml"
+        generator = sync_service.config_generator
+        generator.generate_gptload_configuration_incremental = AsyncMock(return_value={"errors": []})
+        generator.generate_uniapi_yaml_with_count.return_value = ("providers:\n", 0)
+        generator.write_uniapi_yaml.side_effect = (
+            lambda path, content: export_path.write_text(content)
+        )
+        
+        first = await sync_service.sync_configuration_incremental(test_db, export_yaml_path=str(export_path))
+        second = await sync_service.sync_configuration_incremental(test_db, export_yaml_path=str(export_path))
+        
+        assert first.config_fingerprint is not None
+        assert second.status == "success"
+        assert second.changes_summary == "No changes since last sync"
+        assert generator.generate_gptload_configuration_incremental.await_count == 1
+        
+        # Any change to the inputs makes the next sync do the work again
+        test_db.add(Provider(
+            name="NewProvider",
+            base_url="https://api.new.com",
+            api_key_encrypted="encrypted",
+            channel_type="openai"
+        ))
+        test_db.commit()
+        await sync_service.sync_configuration_incremental(test_db, export_yaml_path=str(export_path))
+        assert generator.generate_gptload_configuration_incremental.await_count == 2
+        
+        # So does forcing it
+        await sync_service.sync_configuration_incremental(
+            test_db, export_yaml_path=str(export_path), force=True
+        )
+        assert generator.generate_gptload_configuration_incremental.await_count == 3
+
+    def test_fingerprint_changes_on_edits_with_same_timestamp(self, sync_service, test_db):
+        """Test two model edits stamped with the same time give different fingerprints."""
+        from app.models.model import Model
+        from app.models.provider import Provider
+        
+        provider = Provider(
+            name="TestProvider",
+            base_url="https://api.test.com",
+            api_key_encrypted="encrypted",
+            channel_type="openai"
+        )
+        test_db.add(provider)
+        test_db.flush()
+        model = Model(provider_id=provider.id, original_name="gpt-4", normalized_name="gpt-4")
+        test_db.add(model)
+        test_db.commit()
+        
+        def fingerprint():
+            return sync_service._compute_config_fingerprint(test_db, None, "api.yaml")
+        
+        # Both renames within the same clock tick
+        stamp = datetime(2024, 1, 1, 12, 0, 0)
+        fingerprints = [fingerprint()]
+        for name in ("gpt-4-turbo", "gpt-4o"):
+            model.normalized_name = name
+            model.updated_at = stamp
+            test_db.commit()
+            fingerprints.append(fingerprint())
+        
+        assert len(set(fingerprints)) == 3
+
+    @pytest.mark.asyncio
+    async def test_retry_failed_syncs_runs_one_sync(self, sync_service, test_db, tmp_path):
+        """Test retrying several failed syncs validates them together and syncs once."""
+        failed = [
+            SyncRecord(status="failed", started_at=datetime.utcnow(), error_message=f"Error {i}")
+            for i in range(3)
+        ]
+        succeeded = SyncRecord(status="success", started_at=datetime.utcnow())
+        test_db.add_all(failed + [succeeded])
+        test_db.commit()
+        failed_ids = [record.id for record in failed]
+        
+        sync_service.config_generator.generate_gptload_configuration = AsyncMock(
+            return_value={"standard_groups": [], "aggregate_groups": [], "errors": []}
+        )
+        sync_service.config_generator.generate_uniapi_yaml_with_count.return_value = ("providers:\n", 0)
+        
+        with pytest.raises(ValueError, match=r"not found: \[999\]"):
+            await sync_service.retry_failed_syncs(test_db, failed_ids + [999])
+        with pytest.raises(ValueError, match=r"not in failed status: \[%d\]" % succeeded.id):
+            await sync_service.retry_failed_syncs(test_db, failed_ids + [succeeded.id])
+        
+        record = await sync_service.retry_failed_syncs(
+            test_db, failed_ids, export_yaml_path=str(tmp_path / "api.yaml")
+        )
+        
+        assert record.status == "success"
+        assert sync_service.config_generator.generate_gptload_configuration.await_count == 1
+
+
+def test_history_reads_on_autocommit_connection(test_db, sync_service):
+    """History served through an autocommit session sees committed records."""
+    from app.database.database import get_read_db
+    
+    session_gen = get_read_db()
+    try:
+        read_db = next(session_gen)
+        assert read_db.get_bind().get_execution_options()["isolation_level"] == "AUTOCOMMIT"
+    finally:
+        session_gen.close()
+    
+    test_db.add(SyncRecord(status="success", started_at=datetime(2024, 1, 1)))
+    test_db.commit()
+    
+    read_engine = test_db.get_bind().execution_options(isolation_level="AUTOCOMMIT")
+    read_db = sessionmaker(bind=read_engine)()
+    try:
+        history = sync_service.get_sync_history(read_db, limit=5)
+        assert [record.status for record in history] == ["success"]
+    finally:
+        read_db.close()